@@ -0,0 +1,54 @@
+"""
+Measure the memory held by the expense tree built over a multi year dataset.
+
+Usage: python benchmarks/bench_expense_tree.py [number_of_years] [number_of_rows]
+"""
+import sys
+import tracemalloc
+import warnings
+
+import omegaconf
+
+import expense_viewer.expense.overall_expense as overall_expense
+import generators
+
+
+def all_expenses(expense):
+    """Go through all the expenses of the tree."""
+    yield expense
+    for child_expense in expense.child_expenses.values():
+        yield from all_expenses(child_expense)
+
+
+def main(number_of_years: int, number_of_rows: int) -> None:
+    """Build the tree and measure the memory before and after creating the data."""
+    warnings.simplefilter("ignore")
+    expenses = generators.make_transactions(
+        number_of_rows, number_of_months=12 * number_of_years
+    )
+    config = omegaconf.OmegaConf.create(generators.make_config())
+    size = expenses.memory_usage(deep=True).sum()
+    print(f"{len(expenses)} transactions, {size / 2**20:.1f} MiB")
+
+    tracemalloc.start()
+    expense = overall_expense.OverallExpense(expense=expenses, config=config)
+    expense.add_child_expenses()
+    built = tracemalloc.get_traced_memory()[0]
+    for child_expense in all_expenses(expense):
+        child_expense.expense
+    materialized = tracemalloc.get_traced_memory()[0]
+    expense.release_expense()
+    released = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{sum(1 for _ in all_expenses(expense))} expenses in the tree")
+    print(f"built tree:            {built / 2**20:.1f} MiB")
+    print(f"all data created:      {materialized / 2**20:.1f} MiB")
+    print(f"after release_expense: {released / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200_000,
+    )
@@ -0,0 +1,68 @@
+"""
+Time the import of the package in fresh interpreters and check it against a budget.
+
+The import time of every module is read from the output of python -X importtime,
+the best time of all the runs is reported for the package and for the slowest
+modules imported with it. The script fails when importing the package takes
+longer than the budget, e.g. because a heavy dependency is imported eagerly again.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget-ms 20 --statement "import expense_viewer"
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def time_imports(statement: str) -> Dict[str, int]:
+    """Get the cumulative import time in microseconds of every top level import."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = dict()
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match is not None:
+            import_times[match.group(4)] = int(match.group(2))
+    return import_times
+
+
+def main(arguments: List[str]) -> None:
+    """Parse the arguments, time the imports and check the budget."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--statement", default="import expense_viewer")
+    parser.add_argument("--module", default="expense_viewer")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    options = parser.parse_args(arguments)
+
+    best_times: Dict[str, int] = dict()
+    for _ in range(options.repeat):
+        for module, microseconds in time_imports(options.statement).items():
+            best_times[module] = min(best_times.get(module, microseconds), microseconds)
+
+    for module, microseconds in sorted(
+        best_times.items(), key=lambda item: item[1], reverse=True
+    )[: options.top]:
+        print(f"{microseconds / 1000:10.2f} ms  {module}")
+
+    package_milliseconds = best_times.get(options.module, 0) / 1000
+    print(
+        f"{options.module} took {package_milliseconds:.2f} ms, the budget is "
+        f"{options.budget_ms:.2f} ms"
+    )
+    if package_milliseconds > options.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
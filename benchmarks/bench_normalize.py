@@ -0,0 +1,62 @@
+"""
+Compare the row wise and the vectorized normalization of a deutsche bank statement.
+
+Usage: python benchmarks/bench_normalize.py [number_of_rows]
+"""
+import pathlib
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import expense_viewer.data_loader as loader
+import generators
+
+
+def row_wise_loader(path: pathlib.Path) -> pd.DataFrame:
+    """Load the statement converting every amount and date on its own."""
+    data = pd.read_csv(
+        path,
+        encoding="latin",
+        skiprows=4,
+        delimiter=";",
+        usecols=list(loader._DEUTSCHE_BANK_COLUMNS),
+    )
+    data = data.drop(data.tail(1).index)
+    for column in ("Debit", "Credit"):
+        data[column] = (
+            data[column].apply(loader.replace_comma_if_string).astype("float64")
+        )
+    data["Value date"] = data["Value date"].apply(pd.to_datetime)
+    data["Credit"] = data["Credit"].fillna(0)
+    data["Debit"] = data["Debit"].fillna(0).apply(abs)
+    return data
+
+
+def main(number_of_rows: int) -> None:
+    """Time both loaders on the same statement and check they agree."""
+    with tempfile.TemporaryDirectory() as directory:
+        statement = pathlib.Path(directory) / "statement.csv"
+        generators.write_deutsche_bank_statement(
+            statement, generators.make_transactions(number_of_rows)
+        )
+
+        timings = dict()
+        outputs = dict()
+        for name, load in (
+            ("row wise", row_wise_loader),
+            ("vectorized", loader._data_loader_deutsche_bank),
+        ):
+            start = time.perf_counter()
+            outputs[name] = load(statement)
+            timings[name] = time.perf_counter() - start
+            print(f"{name:>10}: {timings[name]:.2f}s for {number_of_rows} rows")
+
+    for column in ("Debit", "Credit", "Value date"):
+        assert outputs["row wise"][column].equals(outputs["vectorized"][column])
+    print(f"speedup: {timings['row wise'] / timings['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,433 @@
+"""
+Generate reproducible statements and rule configs for the benchmarks.
+
+All the generators are seeded so that the same arguments always give the same
+transactions. The transactions are made by make_transactions and then written
+in the format of the statements of every bank.
+
+Usage: python benchmarks/generators.py output_dir [number_of_rows] [bank]
+"""
+import csv
+import pathlib
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SALARY_DETAILS = "SALARY ACME GMBH"
+IGNORED_DETAILS = "TRANSFER TO OWN ACCOUNT"
+SAVINGS_DETAILS = "VAULT SAVINGS"
+UNKNOWN_MERCHANT = "UNKNOWN SHOP"
+
+_BRANDS = [
+    "REWE",
+    "LIDL",
+    "EDEKA",
+    "ALDI",
+    "AMAZON",
+    "SHELL",
+    "ARAL",
+    "ADAC",
+    "AXA",
+    "NETFLIX",
+    "SPOTIFY",
+    "DB VERTRIEB",
+    "IKEA",
+    "DM DROGERIE",
+    "ROSSMANN",
+    "APOTHEKE",
+]
+_CITIES = ["BERLIN", "MUENCHEN", "HAMBURG", "KOELN", "FRANKFURT", "STUTTGART"]
+
+_DEUTSCHE_BANK_COLUMNS = [
+    "Booking date",
+    "Value date",
+    "Transaction Type",
+    "Beneficiary / Originator",
+    "Payment Details",
+    "IBAN",
+    "BIC",
+    "Customer Reference",
+    "Debit",
+    "Credit",
+    "Currency",
+]
+_DEUTSCHE_BANK_GERMAN_COLUMNS = {
+    "Booking date": "Buchungstag",
+    "Value date": "Wert",
+    "Transaction Type": "Umsatzart",
+    "Beneficiary / Originator": "Begünstigter / Auftraggeber",
+    "Payment Details": "Verwendungszweck",
+    "IBAN": "IBAN",
+    "BIC": "BIC",
+    "Customer Reference": "Kundenreferenz",
+    "Debit": "Soll",
+    "Credit": "Haben",
+    "Currency": "Währung",
+}
+_REVOLUT_COLUMNS = [
+    "Type",
+    "Product",
+    "Started Date",
+    "Completed Date",
+    "Description",
+    "Amount",
+    "Fee",
+    "Currency",
+    "State",
+    "Balance",
+]
+
+
+def get_merchants(number_of_merchants: int) -> List[str]:
+    """Get merchant names where none of them is contained in another one."""
+    return [
+        f"{_BRANDS[position % len(_BRANDS)]} {position:05d}"
+        for position in range(number_of_merchants)
+    ]
+
+
+def make_transactions(
+    number_of_rows: int,
+    number_of_merchants: int = 200,
+    number_of_months: int = 60,
+    unknown_share: float = 0.1,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Make random transactions in the normalized format of the loaders.
+
+    Every month starts with a salary, the other transactions are card payments
+    at the merchants, payments at unknown shops, transfers to the own account
+    which are ignored, transfers to a savings vault and a few extra credits.
+
+    Parameters
+    ----------
+    number_of_rows : int
+        The number of transactions.
+    number_of_merchants : int
+        The number of merchants the card payments are made at, see get_merchants.
+    number_of_months : int
+        The number of months the transactions are spread over.
+    unknown_share : float
+        The share of the payments at shops which no rule matches.
+    seed : int
+        The seed of the random generator.
+    """
+    random_generator = np.random.default_rng(seed)
+    number_of_months = max(1, min(number_of_months, number_of_rows))
+    month_starts = pd.date_range("2015-01-01", periods=number_of_months, freq="MS")
+
+    # Spread the transactions evenly over the months, every month having a salary
+    months = np.sort(random_generator.integers(0, number_of_months, number_of_rows))
+    months[:number_of_months] = np.arange(number_of_months)
+    months.sort()
+    is_salary = np.r_[True, months[1:] != months[:-1]]
+    days = np.where(is_salary, 0, random_generator.integers(0, 28, number_of_rows))
+    value_dates = month_starts.to_numpy()[months] + days * np.timedelta64(1, "D")
+
+    kind = random_generator.choice(
+        ["payment", "unknown", "ignored", "savings", "credit"],
+        size=number_of_rows,
+        p=[0.95 - unknown_share, unknown_share, 0.02, 0.02, 0.01],
+    )
+    kind[is_salary] = "salary"
+
+    merchants = np.array(get_merchants(number_of_merchants), dtype=object)
+    # Some merchants are a lot more popular than others like in real statements
+    popularity = 1.0 / np.arange(1, number_of_merchants + 1)
+    merchant = merchants[
+        random_generator.choice(
+            number_of_merchants, size=number_of_rows, p=popularity / popularity.sum()
+        )
+    ]
+    city = np.array(_CITIES, dtype=object)[
+        random_generator.integers(0, len(_CITIES), number_of_rows)
+    ]
+    reference = (
+        random_generator.integers(0, 10**8, number_of_rows).astype(str).astype(object)
+    )
+
+    beneficiary = np.select(
+        [kind == "payment", kind == "salary", kind == "unknown"],
+        [merchant, "ACME GMBH", UNKNOWN_MERCHANT],
+        "JOHN DOE",
+    )
+    payment_details = np.select(
+        [
+            kind == "payment",
+            kind == "unknown",
+            kind == "salary",
+            kind == "ignored",
+            kind == "savings",
+        ],
+        [
+            merchant + " " + city + " REF " + reference,
+            UNKNOWN_MERCHANT + " " + city + " REF " + reference,
+            SALARY_DETAILS,
+            IGNORED_DETAILS,
+            SAVINGS_DETAILS,
+        ],
+        "REFUND REF " + reference,
+    )
+    transaction_type = np.select(
+        [np.isin(kind, ["payment", "unknown"]), kind == "salary"],
+        ["Debit Card Payment", "Credit"],
+        "SEPA Credit Transfer",
+    )
+
+    amount = np.round(random_generator.lognormal(3.0, 1.0, number_of_rows), 2)
+    is_credit = np.isin(kind, ["salary", "credit"])
+    credit = np.where(is_credit, amount, 0.0)
+    credit[is_salary] = np.round(random_generator.uniform(2500, 5000, is_salary.sum()))
+    debit = np.where(is_credit, 0.0, amount)
+
+    transactions = pd.DataFrame(
+        {
+            "Value date": value_dates,
+            "Transaction Type": transaction_type,
+            "Beneficiary / Originator": beneficiary,
+            "Payment Details": payment_details,
+            "IBAN": "DE89370400440532013000",
+            "Debit": debit,
+            "Credit": credit,
+        }
+    )
+    # The transactions are sorted by their value date like the loaded statements,
+    # the salary stays the first transaction of its month
+    return transactions.sort_values("Value date", kind="mergesort", ignore_index=True)
+
+
+def make_config(
+    number_of_categories: int = 10,
+    identifiers_per_category: int = 10,
+    number_of_merchants: int = 200,
+) -> Dict[str, Any]:
+    """
+    Make a rule config for the transactions made by make_transactions.
+
+    The merchants are divided among the categories, every identifier matches one
+    or two merchants so that no transaction matches more than one category.
+    Merchants left over when there are more merchants than identifiers are not
+    matched by any rule.
+    """
+    merchants = get_merchants(number_of_merchants)
+    expense_categories = []
+    merchant_position = 0
+    for category_position in range(number_of_categories):
+        identifiers = []
+        for identifier_position in range(identifiers_per_category):
+            if merchant_position >= len(merchants):
+                break
+            # Every third identifier is an alternation of two merchants
+            width = 2 if identifier_position % 3 == 2 else 1
+            value = "|".join(merchants[merchant_position : merchant_position + width])
+            merchant_position += width
+            identifier: Dict[str, Any] = {
+                "column": "Payment Details",
+                "comparison_operator": "contains",
+                "value": value,
+            }
+            if identifier_position % 2 == 0:
+                identifier["label"] = f"Label {category_position}.{identifier_position}"
+            identifiers.append(identifier)
+        if identifiers:
+            expense_categories.append(
+                {
+                    "name": f"Category {category_position}",
+                    "logical_operator": "OR",
+                    "identifiers": identifiers,
+                }
+            )
+
+    def contains(value: str) -> Dict[str, Any]:
+        return {
+            "logical_operator": "OR",
+            "identifiers": [
+                {
+                    "column": "Payment Details",
+                    "comparison_operator": "contains",
+                    "value": value,
+                }
+            ],
+        }
+
+    return {
+        "salary": contains(SALARY_DETAILS),
+        "ignored": contains(IGNORED_DETAILS),
+        "savings": contains(SAVINGS_DETAILS),
+        "expense_categories": expense_categories,
+    }
+
+
+def _format_dates(values: pd.Series, date_format: str) -> pd.Series:
+    """Format the dates, every distinct date is only formatted once."""
+    codes, uniques = pd.factorize(values)
+    return pd.Series(pd.DatetimeIndex(uniques).strftime(date_format).to_numpy()[codes])
+
+
+def _format_amounts(values: pd.Series, german: bool = False) -> pd.Series:
+    """Format the amounts with thousands separators, empty for zero amounts."""
+    formatted = values.map("{:,.2f}".format)
+    if german:
+        formatted = formatted.str.translate(str.maketrans(",.", ".,"))
+    return formatted.where(values != 0.0, "")
+
+
+def write_deutsche_bank_statement(
+    path: pathlib.Path, transactions: pd.DataFrame, german: bool = False
+) -> None:
+    """
+    Write the transactions as a deutsche bank csv statement.
+
+    The statement has the 4 line preamble, the ; delimiter, the latin-1 encoding,
+    debits with a negative sign and the account balance as the last line, like
+    the statements exported from the online banking. The german export has german
+    column names, amounts like 1.234,56 and dates like 18.05.2020.
+    """
+    date_format = "%d.%m.%Y" if german else "%m/%d/%Y"
+    value_dates = _format_dates(transactions["Value date"], date_format)
+    statement = pd.DataFrame(
+        {
+            "Booking date": value_dates,
+            "Value date": value_dates,
+            "Transaction Type": transactions["Transaction Type"].to_numpy(),
+            "Beneficiary / Originator": transactions[
+                "Beneficiary / Originator"
+            ].to_numpy(),
+            "Payment Details": transactions["Payment Details"].to_numpy(),
+            "IBAN": transactions["IBAN"].to_numpy(),
+            "BIC": "COBADEFFXXX",
+            "Customer Reference": "NOTPROVIDED",
+            "Debit": _format_amounts(
+                -transactions["Debit"].reset_index(drop=True), german
+            ),
+            "Credit": _format_amounts(
+                transactions["Credit"].reset_index(drop=True), german
+            ),
+            "Currency": "EUR",
+        },
+        columns=_DEUTSCHE_BANK_COLUMNS,
+    )
+    if german:
+        statement = statement.rename(columns=_DEUTSCHE_BANK_GERMAN_COLUMNS)
+
+    first_date, last_date = value_dates.iloc[0], value_dates.iloc[-1]
+    balance = transactions["Credit"].sum() - transactions["Debit"].sum()
+    if german:
+        preamble = [
+            ["Umsätze Girokonto", "Kundennummer: 1234567 00"],
+            [],
+            [f"Umsätze vom {first_date} bis {last_date}"],
+            ["Alter Kontostand", "", "0,00", "EUR"],
+        ]
+        footer = ["Kontostand", "", _format_amounts(pd.Series([balance]), german)[0]]
+    else:
+        preamble = [
+            ["Transactions Giro Account", "Customer number: 1234567 00"],
+            [],
+            [f"Transactions: {first_date} - {last_date}"],
+            ["Old balance", "", "0.00", "EUR"],
+        ]
+        footer = ["Account balance", "", _format_amounts(pd.Series([balance]))[0]]
+
+    with open(path, "w", encoding="latin-1", newline="") as csv_file:
+        csv.writer(csv_file, delimiter=";").writerows(preamble)
+        statement.to_csv(csv_file, sep=";", index=False)
+        csv.writer(csv_file, delimiter=";").writerow(footer + ["EUR"])
+
+
+def write_revolut_statement(path: pathlib.Path, transactions: pd.DataFrame) -> None:
+    """
+    Write the transactions as a revolut csv statement.
+
+    The amounts are signed, negative for debits, and the dates have a time.
+    """
+    amounts = (transactions["Credit"] - transactions["Debit"]).reset_index(drop=True)
+    seconds = pd.Series(
+        (np.arange(len(transactions)) * 7919) % 86400, dtype="timedelta64[s]"
+    )
+    completed_dates = transactions["Value date"].reset_index(drop=True) + seconds
+    statement = pd.DataFrame(
+        {
+            "Type": np.where(amounts > 0, "TOPUP", "CARD_PAYMENT"),
+            "Product": "Current",
+            "Started Date": completed_dates.dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "Completed Date": completed_dates.dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "Description": transactions["Payment Details"].to_numpy(),
+            "Amount": amounts,
+            "Fee": 0.0,
+            "Currency": "EUR",
+            "State": "COMPLETED",
+            "Balance": amounts.cumsum().round(2),
+        },
+        columns=_REVOLUT_COLUMNS,
+    )
+    statement.to_csv(path, index=False, encoding="utf-8")
+
+
+def write_statements(
+    directory: pathlib.Path,
+    transactions: pd.DataFrame,
+    bank: str = "Deutsche Bank",
+    number_of_files: int = 1,
+) -> List[pathlib.Path]:
+    """
+    Write the transactions into statements of the bank split by value date.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        The directory to write the statements into.
+    transactions : pd.DataFrame
+        The transactions made by make_transactions.
+    bank : str
+        "Deutsche Bank", "Deutsche Bank (German)" or "Revolut".
+    number_of_files : int
+        The number of statements the transactions are split into.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for position, rows in enumerate(
+        np.array_split(np.arange(len(transactions)), max(1, number_of_files))
+    ):
+        if not len(rows):
+            continue
+        path = directory / f"statement_{position:04d}.csv"
+        if bank == "Revolut":
+            write_revolut_statement(path, transactions.iloc[rows])
+        elif bank in ("Deutsche Bank", "Deutsche Bank (German)"):
+            write_deutsche_bank_statement(
+                path, transactions.iloc[rows], german=bank == "Deutsche Bank (German)"
+            )
+        else:
+            raise ValueError(f"There is no statement generator for the bank {bank}")
+        paths.append(path)
+    return paths
+
+
+def main(
+    directory: pathlib.Path, number_of_rows: int, bank: Optional[str] = None
+) -> None:
+    """Write the statements and the config into the directory."""
+    import omegaconf
+
+    paths = write_statements(
+        directory / "statements",
+        make_transactions(number_of_rows),
+        bank=bank or "Deutsche Bank",
+        number_of_files=12,
+    )
+    omegaconf.OmegaConf.save(
+        omegaconf.OmegaConf.create(make_config()), directory / "config.yaml"
+    )
+    print(f"Wrote {len(paths)} statements and the config into {directory}")
+
+
+if __name__ == "__main__":
+    main(
+        pathlib.Path(sys.argv[1]),
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100_000,
+        sys.argv[3] if len(sys.argv) > 3 else None,
+    )
@@ -0,0 +1,158 @@
+"""
+Time the loading, categorization and reporting of generated statements.
+
+Every stage is timed for every number of rows and its throughput and peak memory
+are reported. The peak memory is measured with tracemalloc in a separate run of
+the stage so that the tracing does not slow down the timed run.
+
+Usage:
+    python benchmarks/run_benchmarks.py --rows 1000 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --bank Revolut --categories 50 --output out.csv
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+import warnings
+
+import omegaconf
+import pandas as pd
+
+import expense_viewer.data_loader as loader
+import expense_viewer.expense.overall_expense as overall_expense
+import generators
+
+
+def _measure(
+    function: Callable[[], Any], repeat: int, memory: bool
+) -> Tuple[Any, float, float]:
+    """Get the result, the best time and the peak memory in MiB of the function."""
+    best_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best_time = min(best_time, time.perf_counter() - start)
+
+    peak_memory = float("nan")
+    if memory:
+        tracemalloc.start()
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, best_time, peak_memory
+
+
+def run(
+    number_of_rows: int,
+    bank: str,
+    config: omegaconf.DictConfig,
+    number_of_files: int,
+    single_pass: bool,
+    repeat: int,
+    memory: bool,
+    compact: bool,
+    minor_units: bool,
+) -> List[Dict[str, Any]]:
+    """Run all the stages for the number of rows."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        statements = generators.write_statements(
+            pathlib.Path(directory),
+            generators.make_transactions(number_of_rows),
+            bank=bank,
+            number_of_files=number_of_files,
+        )
+
+        def load() -> pd.DataFrame:
+            return loader.load_data_from_all_expense_stmts(
+                statements,
+                loader.BANK_NAME_TO_CALLABLE[bank],
+                compact=compact,
+                minor_units=minor_units,
+            )
+
+        expenses, seconds, peak_memory = _measure(load, repeat, memory)
+        results.append(("load", seconds, peak_memory))
+
+    def categorize() -> overall_expense.OverallExpense:
+        expense = overall_expense.OverallExpense(
+            expense=expenses,
+            config=config,
+            single_pass=single_pass,
+            minor_units=minor_units,
+        )
+        expense.add_child_expenses()
+        return expense
+
+    expense, seconds, peak_memory = _measure(categorize, repeat, memory)
+    results.append(("categorize", seconds, peak_memory))
+
+    _, seconds, peak_memory = _measure(expense.get_expenses_report, repeat, memory)
+    results.append(("report", seconds, peak_memory))
+
+    return [
+        {
+            "rows": number_of_rows,
+            "stage": stage,
+            "seconds": seconds,
+            "rows per second": number_of_rows / seconds if seconds else float("inf"),
+            "peak MiB": peak_memory,
+        }
+        for stage, seconds, peak_memory in results
+    ]
+
+
+def main(arguments: List[str]) -> None:
+    """Parse the arguments, run the benchmarks and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--bank", default="Deutsche Bank", choices=list(loader.BANK_NAME_TO_CALLABLE)
+    )
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--identifiers", type=int, default=10)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--single-pass", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--minor-units", action="store_true")
+    parser.add_argument("--output", type=pathlib.Path, help="Write the results as csv")
+    options = parser.parse_args(arguments)
+
+    warnings.simplefilter("ignore")
+    config = omegaconf.OmegaConf.create(
+        generators.make_config(
+            number_of_categories=options.categories,
+            identifiers_per_category=options.identifiers,
+        )
+    )
+    results = []
+    for number_of_rows in options.rows:
+        results.extend(
+            run(
+                number_of_rows,
+                bank=options.bank,
+                config=config,
+                number_of_files=options.files,
+                single_pass=options.single_pass,
+                repeat=options.repeat,
+                memory=not options.no_memory,
+                compact=options.compact,
+                minor_units=options.minor_units,
+            )
+        )
+        print(f"Done with {number_of_rows} rows", file=sys.stderr)
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.3f"))
+    if options.output is not None:
+        pd.DataFrame(results).to_csv(options.output, index=False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -13,3 +13,15 @@ def lint(session):
     session.install("types-python-dateutil")
     session.run("flake8", "--extend-ignore=E203", "src", "tests")
     session.run("mypy", "src", "tests")
+
+
+@nox.session
+def benchmarks(session):
+    session.install(".")
+    session.run("python", "benchmarks/run_benchmarks.py", *session.posargs)
+
+
+@nox.session
+def import_time(session):
+    session.install(".")
+    session.run("python", "benchmarks/bench_import.py", *session.posargs)
@@ -1,4 +1,58 @@
-"""Starting file for the project"""
-from .main import get_expense_report
+"""
+Starting file for the project
 
-__all__ = ["get_expense_report"]
+The functions of the package and its modules are only imported when they are
+first used, so that importing the package does not import pandas and the other
+heavy dependencies, e.g. for a script which only checks for new statements.
+"""
+import importlib
+
+# The typing module alone takes longer to import than the package, type checkers
+# take the name as True like typing.TYPE_CHECKING
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover
+    from .main import get_combined_expense_report, get_expense_report
+
+__all__ = ["get_combined_expense_report", "get_expense_report"]
+
+# The module of every function exported by the package
+_EXPORTS = {
+    "get_combined_expense_report": "main",
+    "get_expense_report": "main",
+}
+_SUBMODULES = (
+    "categorize",
+    "config_cache",
+    "data_loader",
+    "database",
+    "exceptions",
+    "expense",
+    "fingerprint",
+    "main",
+    "matcher",
+    "normalize",
+    "profiler",
+    "rules",
+    "search",
+    "server",
+    "stats",
+    "store",
+    "utils",
+)
+
+
+def __getattr__(name: str) -> object:
+    """Import the function or the module of the package when it is first used."""
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Later lookups find the attribute without calling __getattr__ again
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -0,0 +1,150 @@
+"""Evaluate the expense categories once over the whole transaction table."""
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from expense_viewer import rules
+import expense_viewer.profiler as profiler_lib
+
+CATEGORY_COLUMN = "Category"
+SUB_CATEGORY_COLUMN = "Sub Category"
+MISCELLANEOUS_CATEGORY = "Miscellaneous"
+
+
+def get_category_matches(
+    data: pd.DataFrame,
+    categories: Iterable[Any],
+    profiler: Optional[profiler_lib.RuleProfiler] = None,
+) -> pd.DataFrame:
+    """
+    Evaluate every category rule once over the data.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The transactions to be categorized.
+    categories : Iterable
+        The expense categories from the config.
+    profiler : profiler_lib.RuleProfiler, optional
+        Record the time and the matches of every rule in it.
+
+    Returns
+    -------
+    pd.DataFrame
+        A boolean frame aligned with the data having one column per category,
+        the columns being the position of the category in the config.
+    """
+    parsed_categories = rules.parse_conditions(categories)
+    category_masks = (
+        profiler.condition_masks(parsed_categories, data)
+        if profiler is not None
+        else rules.compile_conditions(parsed_categories)(data)
+    )
+    return pd.DataFrame(
+        {
+            position: mask.to_numpy(dtype=bool)
+            for position, mask in enumerate(category_masks)
+        },
+        index=data.index,
+        columns=pd.RangeIndex(len(parsed_categories)),
+        dtype=bool,
+    )
+
+
+def get_sub_category_matches(
+    data: pd.DataFrame,
+    category: Any,
+    profiler: Optional[profiler_lib.RuleProfiler] = None,
+) -> pd.DataFrame:
+    """
+    Evaluate every labelled identifier of a category once over the data.
+
+    The columns of the returned boolean frame are the positions of the
+    identifiers inside the category. The time and the matches of every
+    identifier are recorded in the profiler when there is one.
+    """
+    condition = rules.parse_condition(category)
+    labelled_identifiers = [
+        (position, identifier)
+        for position, identifier in enumerate(condition.identifiers)
+        if identifier.label is not None
+    ]
+    identifier_masks = (
+        profiler.identifier_masks(condition, data, sub_categories=True)
+        if profiler is not None
+        else rules.compile_identifiers(
+            identifier for _, identifier in labelled_identifiers
+        )(data)
+    )
+    return pd.DataFrame(
+        {
+            position: mask.to_numpy(dtype=bool)
+            for (position, _), mask in zip(labelled_identifiers, identifier_masks)
+        },
+        index=data.index,
+        dtype=bool,
+    )
+
+
+def label_transactions(
+    data: pd.DataFrame,
+    categories: Iterable[Any],
+    category_matches: Optional[pd.DataFrame] = None,
+    sub_category_matches: Optional[Dict[int, pd.DataFrame]] = None,
+) -> pd.DataFrame:
+    """
+    Label every transaction with its category and sub category.
+
+    Transactions which match no category are labelled as Miscellaneous and the
+    ones without a matching labelled identifier get no sub category. When a
+    transaction matches more than one category or label the first one in the
+    config wins, the number of matched categories is kept in the "Matches"
+    column so that such overlaps can be found. Already evaluated matches can be
+    passed in so that the rules are not evaluated again.
+    """
+    parsed_categories = rules.parse_conditions(categories)
+    if category_matches is None:
+        category_matches = get_category_matches(data, parsed_categories)
+    if sub_category_matches is None:
+        sub_category_matches = dict()
+    match_counts = category_matches.sum(axis=1)
+
+    names = np.array(
+        [category.name for category in parsed_categories] + [MISCELLANEOUS_CATEGORY],
+        dtype=object,
+    )
+    # argmax gives the first matching column, rows without a match point to the
+    # extra Miscellaneous entry at the end
+    first_match = np.full(len(data), len(parsed_categories))
+    if parsed_categories:
+        first_match = np.where(
+            match_counts.to_numpy() > 0,
+            category_matches.to_numpy().argmax(axis=1),
+            first_match,
+        )
+    category_labels = names[first_match]
+
+    sub_category_labels = np.full(len(data), None, dtype=object)
+    for position, category in enumerate(parsed_categories):
+        in_category = first_match == position
+        if not in_category.any():
+            continue
+        identifier_matches = sub_category_matches.get(position)
+        if identifier_matches is None:
+            identifier_matches = get_sub_category_matches(data, category)
+        # Go through the labels in reverse so that the first matching one wins
+        for identifier_position in reversed(identifier_matches.columns):
+            matched = in_category & identifier_matches[identifier_position].to_numpy()
+            sub_category_labels[matched] = category.identifiers[
+                identifier_position
+            ].label
+
+    return pd.DataFrame(
+        {
+            CATEGORY_COLUMN: category_labels,
+            SUB_CATEGORY_COLUMN: sub_category_labels,
+            "Matches": match_counts.to_numpy(),
+        },
+        index=data.index,
+    )
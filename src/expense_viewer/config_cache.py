@@ -0,0 +1,117 @@
+"""Load the rules of a config file once and cache them by the content of the file."""
+import collections
+import hashlib
+import io
+import json
+import logging
+import os
+import pathlib
+import threading
+from typing import Optional, OrderedDict, Union
+
+import omegaconf
+
+import expense_viewer.rules as rules
+
+# Changing the rule objects or how they are stored makes the cached configs stale
+CONFIG_CACHE_VERSION = 1
+
+# The subdirectory of a shared cache directory which the configs are cached in,
+# apart from the cached statements
+CONFIG_CACHE_SUBDIRECTORY = "config"
+
+logger = logging.getLogger(__name__)
+
+# The number of configs whose rules are kept in memory, the least recently loaded
+# ones are dropped first
+MAX_LOADED_CONFIGS = 32
+
+# The rules of the configs loaded by this process, keyed by the digest of the file
+_loaded_rule_configs: OrderedDict[str, rules.RuleConfig] = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def load_config(
+    config_file_path: Union[str, pathlib.Path],
+    cache_dir: Optional[Union[str, pathlib.Path]] = None,
+) -> rules.RuleConfig:
+    """
+    Load the validated rules of a config file.
+
+    The yaml of a config is only parsed and validated the first time its content
+    is seen. The rules of the last MAX_LOADED_CONFIGS configs are kept in memory
+    for the process and, with a cache directory, as json on disk for the next runs.
+    Both are keyed by the sha256 digest of the config file, so an edited config is
+    loaded again.
+
+    Parameters
+    ----------
+    config_file_path : str or pathlib.Path
+        The full path of the config yaml file containing the expense rules.
+    cache_dir : str or pathlib.Path, optional
+        The directory to keep the loaded rules in between runs.
+
+    Raises
+    ------
+    InvalidRuleError
+        When a rule of the config is not valid.
+    """
+    content = pathlib.Path(config_file_path).read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    with _lock:
+        rule_config = _loaded_rule_configs.get(digest)
+        if rule_config is not None:
+            _loaded_rule_configs.move_to_end(digest)
+    if rule_config is not None:
+        return rule_config
+
+    cache_path = (
+        pathlib.Path(cache_dir) / f"config-v{CONFIG_CACHE_VERSION}-{digest}.json"
+        if cache_dir is not None
+        else None
+    )
+    rule_config = _read_cached_rule_config(cache_path)
+    if rule_config is None:
+        config = omegaconf.OmegaConf.load(io.BytesIO(content))
+        rule_config = rules.parse_config(
+            omegaconf.OmegaConf.to_container(config, resolve=True)
+        )
+        if cache_path is not None:
+            _write_cached_rule_config(cache_path, rule_config)
+
+    with _lock:
+        _loaded_rule_configs[digest] = rule_config
+        _loaded_rule_configs.move_to_end(digest)
+        while len(_loaded_rule_configs) > MAX_LOADED_CONFIGS:
+            _loaded_rule_configs.popitem(last=False)
+    return rule_config
+
+
+def _read_cached_rule_config(
+    cache_path: Optional[pathlib.Path],
+) -> Optional[rules.RuleConfig]:
+    """Read the cached rules, None when they are not cached or can not be read."""
+    if cache_path is None or not cache_path.exists():
+        return None
+    try:
+        return rules.parse_config(json.loads(cache_path.read_text(encoding="utf-8")))
+    except Exception:
+        logger.warning(f"Could not read the cached config {cache_path}", exc_info=True)
+        return None
+
+
+def _write_cached_rule_config(
+    cache_path: pathlib.Path, rule_config: rules.RuleConfig
+) -> None:
+    """Write the rules to the cache, a config which can not be cached is skipped."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a temporary name first so that a run reading the cache at
+        # the same time never sees a partly written file
+        temporary_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(
+            json.dumps(rules.rule_config_to_container(rule_config)), encoding="utf-8"
+        )
+        os.replace(temporary_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        logger.warning(f"Could not cache the config {cache_path}", exc_info=True)
@@ -1,13 +1,67 @@
+import concurrent.futures
+import contextlib
+import functools
+import glob
+import hashlib
+import importlib.util
 import logging
+import os
 import pathlib
+import re
 import typing
+import uuid
 
+import numpy as np
 import pandas as pd
 
 import expense_viewer.exceptions as exceptions
+import expense_viewer.fingerprint as fingerprint
+import expense_viewer.normalize as normalize
+import expense_viewer.stats as stats_lib
 
 EXPECTED_FORMATS = (".csv",)
 
+# Bump this whenever the normalized output of the loaders changes so that the
+# statements cached by an older version are not used anymore
+LOADER_VERSION = 2
+
+# The columns used from the statements of every bank and their common names
+_REVOLUT_COLUMNS = {
+    "Type": "Transaction Type",
+    "Completed Date": "Value date",
+    "Description": "Payment Details",
+    "Amount": "Credit",
+}
+_REVOLUT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_DEUTSCHE_BANK_COLUMNS = {
+    "Transaction Type": "Transaction Type",
+    "Payment Details": "Payment Details",
+    "Debit": "Debit",
+    "Credit": "Credit",
+    "Value date": "Value date",
+    "Beneficiary / Originator": "Beneficiary / Originator",
+    "IBAN": "IBAN",
+}
+_DEUTSCHE_BANK_GERMAN_COLUMNS = {
+    "Umsatzart": "Transaction Type",
+    "Verwendungszweck": "Payment Details",
+    "Soll": "Debit",
+    "Haben": "Credit",
+    "Wert": "Value date",
+    "Begünstigter / Auftraggeber": "Beneficiary / Originator",
+    "IBAN": "IBAN",
+}
+
+_CACHE_FILE_SUFFIX = ".feather"
+_DEFAULT_CACHE_SIZE_BYTES = 512 * 1024 * 1024
+# The names of the cached statements and of the temporary files they are written
+# to, the other files in the cache directory are never touched
+_CACHE_FILE_NAME = re.compile(
+    r"(?P<loader>\w+)-v(?P<version>\d+)-[0-9a-f]{64}\.feather"
+)
+_TEMPORARY_FILE_NAME = re.compile(r"\.[0-9a-f]{32}\.tmp")
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,7 +96,83 @@ def check_format_of_salary_statement(
             raise exceptions.WrongFormatError(message=message)
 
 
-def _data_loader_revolut(expense_statement: pathlib.Path) -> pd.core.frame.DataFrame:
+class _ColumnarSink:
+    """
+    Collect normalized chunks of transactions column by column.
+
+    The chunks are only joined at the end, one column at a time, releasing the
+    chunks of a column as soon as it is joined. The peak memory is therefore close
+    to the size of the final frame plus a single chunk.
+    """
+
+    def __init__(self) -> None:
+        self._columns: typing.Dict[str, typing.List[np.ndarray]] = dict()
+        self._number_of_chunks = 0
+        self._number_of_rows = 0
+        self._first_chunk: typing.Optional[pd.DataFrame] = None
+
+    def append(self, chunk: pd.DataFrame) -> None:
+        """Add a normalized chunk of transactions."""
+        if self._number_of_chunks == 0:
+            # A single chunk is given back as it is without joining anything
+            self._first_chunk = chunk
+        else:
+            if self._number_of_chunks == 1:
+                self._add_columns(self._first_chunk)  # type: ignore
+                self._first_chunk = None
+            self._add_columns(chunk)
+        self._number_of_chunks += 1
+        self._number_of_rows += len(chunk.index)
+
+    def _add_columns(self, chunk: pd.DataFrame) -> None:
+        """Keep the arrays of all the columns of a chunk."""
+        for column in chunk.columns:
+            self._columns.setdefault(column, []).append(chunk[column].to_numpy())
+
+    def to_frame(self) -> pd.DataFrame:
+        """Join all the chunks into a single frame."""
+        if self._first_chunk is not None:
+            return self._first_chunk
+        if not self._columns:
+            return pd.DataFrame()
+
+        transactions = pd.DataFrame(index=pd.RangeIndex(self._number_of_rows))
+        for column in list(self._columns):
+            transactions[column] = np.concatenate(self._columns.pop(column))
+        return transactions
+
+
+def _read_csv_in_chunks(
+    expense_statement: pathlib.Path,
+    chunksize: typing.Optional[int],
+    **read_csv_kwargs: typing.Any,
+) -> typing.Iterator[pd.DataFrame]:
+    """Read a csv file at once or in chunks of rows when a chunk size is given."""
+    if chunksize is None:
+        yield pd.read_csv(expense_statement, **read_csv_kwargs)
+        return
+    with pd.read_csv(
+        expense_statement, chunksize=chunksize, **read_csv_kwargs
+    ) as reader:
+        yield from reader
+
+
+def _drop_last_row(
+    chunks: typing.Iterable[pd.DataFrame],
+) -> typing.Iterator[pd.DataFrame]:
+    """Drop the last row of the last chunk, e.g. the footer of a statement."""
+    previous_chunk = None
+    for chunk in chunks:
+        if previous_chunk is not None:
+            yield previous_chunk
+        previous_chunk = chunk
+    if previous_chunk is not None:
+        yield previous_chunk.drop(previous_chunk.tail(1).index)
+
+
+def _data_loader_revolut(
+    expense_statement: pathlib.Path, chunksize: typing.Optional[int] = None
+) -> pd.core.frame.DataFrame:
     """
     Load the expense details from revolut bank csv file.
 
@@ -50,34 +180,70 @@ def _data_loader_revolut(expense_statement: pathlib.Path) -> pd.core.frame.DataF
     ----------
     expense_statement : pathlib.Path
         The expense statement full path as a csv file
+    chunksize : int, optional
+        Read and normalize the file in chunks of this many rows to limit the memory
+        needed for very large files.
     """
-    columns_to_use = ["Type", "Completed Date", "Description", "Amount"]
+    try:
+        sink = _ColumnarSink()
+        for chunk in _read_csv_in_chunks(
+            expense_statement,
+            chunksize=chunksize,
+            usecols=list(_REVOLUT_COLUMNS),
+        ):
+            sink.append(
+                normalize.normalize_transactions(
+                    chunk.rename(columns=_REVOLUT_COLUMNS),
+                    date_format=_REVOLUT_DATE_FORMAT,
+                    signed_amounts=True,
+                    drop_time=True,
+                )
+            )
+        return sink.to_frame()
+    except Exception as exc:
+        message = f"Could not load the details from {expense_statement}"
+        logger.error(message, exc_info=True)
+        raise exceptions.CouldNotLoadSalaryStmtError(message=message) from exc
+
 
+def _load_deutsche_bank_statement(
+    expense_statement: pathlib.Path,
+    chunksize: typing.Optional[int],
+    columns: typing.Dict[str, str],
+    date_format: str,
+    thousands: str,
+    decimal: str,
+) -> pd.core.frame.DataFrame:
+    """Load a deutsche bank csv file having the given column names and formats."""
     try:
-        transactions = pd.read_csv(expense_statement, usecols=columns_to_use)
-        renamed_transactions = transactions.rename(
-            columns={
-                "Completed Date": "Value date",
-                "Description": "Payment Details",
-                "Type": "Transaction Type",
-                "Amount": "Credit",
-            }
-        )
-        renamed_transactions["Value date"] = renamed_transactions["Value date"].astype(
-            "datetime64"
-        )
-        renamed_transactions["Value date"] = pd.to_datetime(
-            renamed_transactions["Value date"].dt.strftime("%Y-%m-%d")
-        )
-        renamed_transactions["Credit"] = renamed_transactions["Credit"].astype(
-            "float64"
-        )
-        renamed_transactions["Debit"] = 0.0
-        renamed_transactions.loc[renamed_transactions["Credit"] < 0.0, "Debit"] = (
-            renamed_transactions["Credit"] * -1
+        chunks = _read_csv_in_chunks(
+            expense_statement,
+            chunksize=chunksize,
+            encoding="latin",
+            error_bad_lines=False,
+            skiprows=4,
+            delimiter=";",
+            usecols=list(columns),
+            # The dates are read as they are, else german dates like 18.05.2020 are
+            # taken for numbers having thousands separators
+            dtype={
+                column: str for column, name in columns.items() if name == "Value date"
+            },
+            thousands=thousands,
+            decimal=decimal,
         )
-        renamed_transactions.loc[renamed_transactions["Credit"] < 0.0, "Credit"] = 0.0
-        return renamed_transactions
+        sink = _ColumnarSink()
+        # The last row of the statement is the account balance and not a transaction
+        for chunk in _drop_last_row(chunks):
+            sink.append(
+                normalize.normalize_transactions(
+                    chunk.rename(columns=columns),
+                    date_format=date_format,
+                    thousands=thousands,
+                    decimal=decimal,
+                )
+            )
+        return sink.to_frame()
     except Exception as exc:
         message = f"Could not load the details from {expense_statement}"
         logger.error(message, exc_info=True)
@@ -85,7 +251,7 @@ def _data_loader_revolut(expense_statement: pathlib.Path) -> pd.core.frame.DataF
 
 
 def _data_loader_deutsche_bank(
-    expense_statement: pathlib.Path,
+    expense_statement: pathlib.Path, chunksize: typing.Optional[int] = None
 ) -> pd.core.frame.DataFrame:
     """
     Load the expense details from deutsche bank csv file.
@@ -94,38 +260,218 @@ def _data_loader_deutsche_bank(
     ----------
     expense_statement : pathlib.Path
         The expense statement full path as a csv file
+    chunksize : int, optional
+        Read and normalize the file in chunks of this many rows to limit the memory
+        needed for very large files.
     """
-    columns_to_use = [
-        "Transaction Type",
-        "Payment Details",
-        "Debit",
-        "Credit",
-        "Value date",
-        "Beneficiary / Originator",
-        "IBAN"
-    ]
+    return _load_deutsche_bank_statement(
+        expense_statement,
+        chunksize=chunksize,
+        columns=_DEUTSCHE_BANK_COLUMNS,
+        date_format="%m/%d/%Y",
+        thousands=",",
+        decimal=".",
+    )
 
-    try:
-        transactions = pd.read_csv(
-            expense_statement,
-            encoding="latin",
-            error_bad_lines=False,
-            skiprows=4,
-            delimiter=";",
-            usecols=columns_to_use,
-        )
-        transactions.drop(transactions.tail(1).index, inplace=True)
-        transactions["Credit"] = transactions["Credit"].apply(replace_comma_if_string)
-        transactions["Debit"] = transactions["Debit"].apply(replace_comma_if_string)
-        transactions["Credit"] = transactions["Credit"].astype("float64")
-        transactions["Debit"] = transactions["Debit"].astype("float64")
-        transactions["Value date"] = transactions["Value date"].astype("datetime64")
-        transactions["Credit"].fillna(0, inplace=True)
-        transactions["Debit"].fillna(0, inplace=True)
-        transactions["Debit"] = transactions["Debit"].apply(
-            lambda value: value if value >= 0 else value * -1
+
+def _data_loader_deutsche_bank_german(
+    expense_statement: pathlib.Path, chunksize: typing.Optional[int] = None
+) -> pd.core.frame.DataFrame:
+    """
+    Load the expense details from deutsche bank csv file exported in german.
+
+    The german export has german column names, amounts like 1.234,56 and dates
+    like 18.05.2020.
+
+    Parameters
+    ----------
+    expense_statement : pathlib.Path
+        The expense statement full path as a csv file
+    chunksize : int, optional
+        Read and normalize the file in chunks of this many rows to limit the memory
+        needed for very large files.
+    """
+    return _load_deutsche_bank_statement(
+        expense_statement,
+        chunksize=chunksize,
+        columns=_DEUTSCHE_BANK_GERMAN_COLUMNS,
+        date_format="%d.%m.%Y",
+        thousands=".",
+        decimal=",",
+    )
+
+
+class StatementCache:
+    """
+    On disk cache of the normalized expense statements in the feather format.
+
+    The cached statements are keyed by the content of the statement file, the
+    loader used for it and the LOADER_VERSION, so a statement is only parsed again
+    when one of them changes. When the cache grows above its maximum size the
+    statements which have not been used for the longest time are removed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: typing.Union[str, pathlib.Path],
+        max_size_bytes: int = _DEFAULT_CACHE_SIZE_BYTES,
+    ) -> None:
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        # Writing and reading feather files needs pyarrow which is optional
+        self.enabled = importlib.util.find_spec("pyarrow") is not None
+        if not self.enabled:
+            logger.warning(
+                "pyarrow is not installed, the expense statements will not be cached"
+            )
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_cache_path(
+        self, expense_statement: pathlib.Path, callable: typing.Callable
+    ) -> pathlib.Path:
+        """Get the path of the cached statement for the statement and loader."""
+        digest = hashlib.sha256(pathlib.Path(expense_statement).read_bytes())
+        return self.cache_dir / (
+            f"{callable.__name__}-v{LOADER_VERSION}-{digest.hexdigest()}"
+            f"{_CACHE_FILE_SUFFIX}"
         )
+
+    def load(
+        self,
+        expense_statement: pathlib.Path,
+        callable: typing.Callable,
+        **loader_kwargs: typing.Any,
+    ) -> pd.core.frame.DataFrame:
+        """
+        Load the expense statement from the cache, parse and cache it if missing.
+
+        Parameters
+        ----------
+        expense_statement : pathlib.Path
+            The expense statement full path as a csv file
+        callable: Callable
+            The callable to use for loading the expense statement.
+        loader_kwargs:
+            Further arguments for the callable which do not change its output.
+        """
+        if not self.enabled:
+            return callable(expense_statement=expense_statement, **loader_kwargs)
+
+        cache_path = self.get_cache_path(expense_statement, callable)
+        if cache_path.exists():
+            try:
+                transactions = pd.read_feather(cache_path)
+            except Exception:
+                logger.warning(
+                    f"Could not read the cached statement {cache_path}", exc_info=True
+                )
+                _remove_file(cache_path)
+            else:
+                # Mark the cached statement as recently used for the eviction
+                os.utime(cache_path)
+                return _restore_missing_values(transactions)
+
+        transactions = callable(expense_statement=expense_statement, **loader_kwargs)
+        # Write to a temporary file first so that a half written file is never read
+        temporary_path = cache_path.with_name(f".{uuid.uuid4().hex}.tmp")
+        try:
+            transactions.reset_index(drop=True).to_feather(temporary_path)
+            os.replace(temporary_path, cache_path)
+        except Exception:
+            logger.warning(
+                f"Could not cache the statement {expense_statement}", exc_info=True
+            )
+            _remove_file(temporary_path)
         return transactions
+
+    def cleanup(self) -> None:
+        """
+        Remove the stale cached statements and keep the cache below its size.
+
+        Only the files named like the cached statements and their temporary files
+        are removed, so the cache directory can be shared with other files.
+        """
+        if not self.enabled:
+            return
+
+        cached_statements = []
+        for path in self.cache_dir.iterdir():
+            if not path.is_file():
+                continue
+            cache_file_name = _CACHE_FILE_NAME.fullmatch(path.name)
+            if cache_file_name is None:
+                # Leftover temporary files are never used again
+                if _TEMPORARY_FILE_NAME.fullmatch(path.name):
+                    _remove_file(path)
+                continue
+            if int(cache_file_name["version"]) != LOADER_VERSION:
+                # Statements cached by another loader version are never used again
+                _remove_file(path)
+                continue
+            cached_statements.append((path, path.stat()))
+
+        # Remove the least recently used statements until the cache fits its size
+        cached_statements.sort(key=lambda item: item[1].st_mtime)
+        total_size = sum(stat.st_size for _, stat in cached_statements)
+        for path, stat in cached_statements:
+            if total_size <= self.max_size_bytes:
+                break
+            _remove_file(path)
+            total_size -= stat.st_size
+
+
+def _remove_file(path: pathlib.Path) -> None:
+    """Remove a file if it still exists."""
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+
+
+def _restore_missing_values(transactions: pd.DataFrame) -> pd.DataFrame:
+    """Use NaN again for the missing strings which come back as None from feather."""
+    for column in transactions.columns:
+        if transactions[column].dtype == object:
+            transactions[column] = transactions[column].where(
+                transactions[column].notna(), np.nan
+            )
+    return transactions
+
+
+def _load_expense_stmt(
+    expense_statement: pathlib.Path,
+    callable: typing.Callable,
+    cache: typing.Optional[StatementCache] = None,
+    stats: typing.Optional[stats_lib.PipelineStats] = None,
+    compact: bool = False,
+    minor_units: bool = False,
+    source: typing.Optional[str] = None,
+    **loader_kwargs: typing.Any,
+) -> pd.core.frame.DataFrame:
+    """Load a single expense statement, through the cache if there is one."""
+    try:
+        with stats_lib.measure(
+            stats, "statement", name=str(expense_statement), logger=logger
+        ) as measurement:
+            if cache is not None:
+                statement = cache.load(
+                    expense_statement=expense_statement,
+                    callable=callable,
+                    **loader_kwargs,
+                )
+            else:
+                statement = callable(
+                    expense_statement=expense_statement, **loader_kwargs
+                )
+            if source is not None:
+                statement[normalize.SOURCE_COLUMN] = source
+            if minor_units:
+                statement = normalize.to_minor_units(statement)
+            if compact:
+                statement = normalize.compact_transactions(statement)
+            measurement.rows = len(statement)
+        return statement
+    except exceptions.CouldNotLoadSalaryStmtError:
+        raise
     except Exception as exc:
         message = f"Could not load the details from {expense_statement}"
         logger.error(message, exc_info=True)
@@ -133,7 +479,16 @@ def _data_loader_deutsche_bank(
 
 
 def load_data_from_all_expense_stmts(
-    expense_statements: typing.Iterable[pathlib.Path], callable: typing.Callable
+    expense_statements: typing.Iterable[pathlib.Path],
+    callable: typing.Callable,
+    cache: typing.Optional[StatementCache] = None,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    chunksize: typing.Optional[int] = None,
+    stats: typing.Optional[stats_lib.PipelineStats] = None,
+    compact: bool = False,
+    minor_units: bool = False,
+    fingerprints: typing.Optional[fingerprint.FingerprintIndex] = None,
 ) -> pd.core.frame.DataFrame:
     """
     Load the salary details from an iterable of files.
@@ -144,21 +499,225 @@ def load_data_from_all_expense_stmts(
         An iterator having the full path of the salary statements.
     callable: Callable
         The callable to use for loading the expense statement.
+    cache: StatementCache, optional
+        The cache to load the already parsed statements from.
+    max_workers: int
+        The number of statements loaded at the same time, more than one loads the
+        statements in a pool of workers.
+    use_processes: bool
+        Use a pool of processes instead of threads for loading the statements, the
+        callable then has to be a module level function.
+    chunksize: int, optional
+        Read every statement in chunks of this many rows to limit the memory needed
+        for very large statements. The callable has to support a chunksize argument.
+    stats: PipelineStats, optional
+        The stats to record the loading of every statement and their concatenation
+        in. The statements loaded in a pool of processes are not recorded one by one.
+    compact: bool
+        Store the columns having repeated values like the transaction type as
+        categoricals and the payment details as arrow backed strings, which needs
+        a lot less memory for the statements of many years.
+    minor_units: bool
+        Store the debits and credits as integer minor units, e.g. cents, right
+        after parsing them so that all the sums of the amounts are exact.
+    fingerprints: FingerprintIndex, optional
+        The index of the transactions which are already loaded, the transactions
+        in it are dropped from the statements and the new ones are added to it.
+        The number of transactions dropped from every statement as duplicates is
+        kept in its dropped_duplicates.
     """
-    all_salary_statements_concatenated = pd.concat(
-        [
-            callable(expense_statement=statement_path)
-            for statement_path in expense_statements
-        ]
+    # The statements are always concatenated in the order of their paths so that
+    # the result does not depend on the order in which the workers finish
+    statement_paths = sorted(expense_statements)
+    load_statement = functools.partial(
+        _load_expense_stmt,
+        callable=callable,
+        cache=cache,
+        # The stats of another process can not be updated
+        stats=None if use_processes and max_workers > 1 else stats,
+        compact=compact,
+        minor_units=minor_units,
+        **({"chunksize": chunksize} if chunksize is not None else {}),
+    )
+    statements = _map_statements(
+        load_statement,
+        [(statement_path,) for statement_path in statement_paths],
+        max_workers=max_workers,
+        use_processes=use_processes,
     )
-    all_salary_statements_concatenated.sort_values(by=["Value date"], inplace=True)
-    all_salary_statements_concatenated.drop_duplicates(inplace=True)
-    all_salary_statements_concatenated.reset_index(inplace=True)
-    all_salary_statements_concatenated.drop(columns=["index"], inplace=True)
+    if cache is not None:
+        cache.cleanup()
+    return _merge_statements(
+        statements, statement_paths, fingerprints=fingerprints, stats=stats
+    )
+
+
+def get_statement_paths(
+    source: typing.Union[str, pathlib.Path],
+) -> typing.List[pathlib.Path]:
+    """
+    Get the statements of a source in the order of their paths.
+
+    Parameters
+    ----------
+    source : str or pathlib.Path
+        A directory having only statements or a glob pattern matching the
+        statements, e.g. "/home/user/revolut/*.csv".
+
+    Raises
+    ------
+    FileOrDirectoryNotFound
+        When the source does not have any statements.
+    """
+    source_path = pathlib.Path(source)
+    if source_path.is_dir():
+        statement_paths = sorted(source_path.glob("*"))
+    else:
+        statement_paths = sorted(
+            pathlib.Path(path)
+            for path in glob.glob(str(source))
+            if os.path.isfile(path)
+        )
+    if not statement_paths:
+        message = f"There are no statements in {source}"
+        logger.error(message)
+        raise exceptions.FileOrDirectoryNotFound(message=message)
+    return statement_paths
+
+
+def load_data_from_all_sources(
+    statement_sources: typing.Mapping[str, str],
+    cache: typing.Optional[StatementCache] = None,
+    max_workers: int = 1,
+    use_processes: bool = False,
+    chunksize: typing.Optional[int] = None,
+    stats: typing.Optional[stats_lib.PipelineStats] = None,
+    compact: bool = False,
+    minor_units: bool = False,
+    fingerprints: typing.Optional[fingerprint.FingerprintIndex] = None,
+) -> pd.core.frame.DataFrame:
+    """
+    Load the statements of several banks and accounts into a single frame.
+
+    The statements of all the sources are loaded together, in a pool of workers
+    when there is more than one, every one with the loader of its bank. Every
+    transaction is tagged with its source in the "Source" column, the columns which
+    a bank does not have are missing for its transactions. The transactions are
+    merged the same way as the statements of a single bank are.
+
+    Parameters
+    ----------
+    statement_sources: Mapping[str, str]
+        The bank of every source, a source is a directory or a glob pattern of
+        statements (see get_statement_paths), e.g.
+        {"/home/user/deutsche_bank": "Deutsche Bank", "/home/user/revolut/*.csv":
+        "Revolut"}.
+    cache, max_workers, use_processes, chunksize, stats, compact, minor_units,
+    fingerprints:
+        See load_data_from_all_expense_stmts.
+
+    Raises
+    ------
+    BankNotSupportedError
+        When the bank of a source is not in BANK_NAME_TO_CALLABLE.
+    FileOrDirectoryNotFound
+        When a source does not have any statements.
+    """
+    arguments = []
+    for source, bank in statement_sources.items():
+        if bank not in BANK_NAME_TO_CALLABLE:
+            raise exceptions.BankNotSupportedError(
+                message=f"The bank {bank} of {source} is not supported, the "
+                f"supported banks are {', '.join(BANK_NAME_TO_CALLABLE)}"
+            )
+        statement_paths = get_statement_paths(source)
+        check_format_of_salary_statement(statement_paths)
+        arguments.extend(
+            (statement_path, BANK_NAME_TO_CALLABLE[bank], str(source))
+            for statement_path in statement_paths
+        )
+
+    load_statement = functools.partial(
+        _load_statement_of_source,
+        cache=cache,
+        # The stats of another process can not be updated
+        stats=None if use_processes and max_workers > 1 else stats,
+        compact=compact,
+        minor_units=minor_units,
+        **({"chunksize": chunksize} if chunksize is not None else {}),
+    )
+    statements = _map_statements(
+        load_statement, arguments, max_workers=max_workers, use_processes=use_processes
+    )
+    if cache is not None:
+        cache.cleanup()
+    return _merge_statements(
+        statements,
+        [statement_path for statement_path, _, _ in arguments],
+        fingerprints=fingerprints,
+        stats=stats,
+    )
+
+
+def _load_statement_of_source(
+    expense_statement: pathlib.Path,
+    callable: typing.Callable,
+    source: str,
+    **kwargs: typing.Any,
+) -> pd.core.frame.DataFrame:
+    """Load a statement with the loader of its source, used by the worker pools."""
+    return _load_expense_stmt(
+        expense_statement, callable=callable, source=source, **kwargs
+    )
+
+
+def _map_statements(
+    load_statement: typing.Callable[..., pd.DataFrame],
+    arguments: typing.Sequence[typing.Tuple[typing.Any, ...]],
+    max_workers: int,
+    use_processes: bool,
+) -> typing.List[pd.DataFrame]:
+    """Load the statements in their order, in a pool of workers if asked for."""
+    if max_workers > 1 and len(arguments) > 1:
+        executor_class = (
+            concurrent.futures.ProcessPoolExecutor
+            if use_processes
+            else concurrent.futures.ThreadPoolExecutor
+        )
+        with executor_class(max_workers=max_workers) as executor:
+            return list(executor.map(load_statement, *zip(*arguments)))
+    return [load_statement(*argument) for argument in arguments]
+
+
+def _merge_statements(
+    statements: typing.Sequence[pd.DataFrame],
+    statement_paths: typing.Sequence[pathlib.Path],
+    fingerprints: typing.Optional[fingerprint.FingerprintIndex] = None,
+    stats: typing.Optional[stats_lib.PipelineStats] = None,
+) -> pd.core.frame.DataFrame:
+    """Sort the transactions of all the statements by date and drop duplicates."""
+    if fingerprints is None:
+        fingerprints = fingerprint.FingerprintIndex()
+    with stats_lib.measure(stats, "concatenate", logger=logger) as measurement:
+        # The duplicates are dropped from every statement in the order of the
+        # statements, the sort by date keeps the order of the same transactions so
+        # the first one is kept like drop_duplicates over all of them does
+        statements = [
+            fingerprints.drop_duplicates(statement, name=str(statement_path))[0]
+            for statement, statement_path in zip(statements, statement_paths)
+        ]
+        all_salary_statements_concatenated = normalize.concat_transactions(statements)
+        all_salary_statements_concatenated.sort_values(
+            by=["Value date"], kind="mergesort", inplace=True
+        )
+        all_salary_statements_concatenated.reset_index(inplace=True)
+        all_salary_statements_concatenated.drop(columns=["index"], inplace=True)
+        measurement.rows = len(all_salary_statements_concatenated)
     return all_salary_statements_concatenated
 
 
 BANK_NAME_TO_CALLABLE: typing.Dict[str, typing.Callable] = {
     "Revolut": _data_loader_revolut,
     "Deutsche Bank": _data_loader_deutsche_bank,
+    "Deutsche Bank (German)": _data_loader_deutsche_bank_german,
 }
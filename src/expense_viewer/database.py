@@ -0,0 +1,737 @@
+"""
+Keep the normalized transactions in a local SQLite database.
+
+The transactions are written once into the database, which has indexes on their
+value date and their beneficiary, and a full text index of their payment details
+and beneficiaries. The rules of the config are translated into SQL, so the
+salaries, the ignored transactions and the categories are found by the database,
+the months and the totals of the categories are summed by grouping queries, and
+only the rows which an expense needs are read from it.
+
+A TransactionDatabase is used in place of the expense dataframe:
+
+    database = TransactionDatabase("transactions.db")
+    database.write_transactions(load_data_from_all_expense_stmts(...))
+    expense = OverallExpense(expense=database, config=config)
+    expense.add_child_expenses()
+
+The positions of the transactions are their "Row" in the database, the month,
+category and sub category of every transaction are in the "labels" table once
+the child expenses are added.
+"""
+import functools
+import json
+import pathlib
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import expense_viewer.categorize as categorize
+import expense_viewer.exceptions as exceptions
+import expense_viewer.matcher as matcher
+import expense_viewer.rules as rules
+import expense_viewer.search as search
+import expense_viewer.utils as utils
+
+# The position of a transaction, which is its primary key
+ROW_COLUMN = "Row"
+
+# The columns having an index when the transactions have them
+INDEXED_COLUMNS = ("Value date", "Beneficiary / Originator")
+
+_VALUE_DATE_COLUMN = "Value date"
+_CREDIT_COLUMN = "Credit"
+_DEBIT_COLUMN = "Debit"
+
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SQL_OPERATORS = {
+    ">": ">",
+    ">=": ">=",
+    "<": "<",
+    "<=": "<=",
+    "==": "=",
+    "!=": "!=",
+}
+
+_LOGICAL_FUNCTIONS = {"OR": np.logical_or, "AND": np.logical_and}
+
+# The function which matches the keywords which are not plain strings, or are
+# not case sensitive, the same way as the keyword matcher does
+_CONTAINS_FUNCTION = "expense_contains"
+
+# The words are split like the words of the search index, "_" being a part of them
+_TEXT_TOKENIZER = "unicode61 remove_diacritics 0 tokenchars '_'"
+
+# A SQL expression and its parameters
+_Query = Tuple[str, List[Any]]
+
+
+def _quote(name: str) -> str:
+    """Quote the name of a table or a column."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+@functools.lru_cache(maxsize=None)
+def _get_keyword_matcher(
+    pattern: str, regex: bool, case_sensitive: bool
+) -> matcher.KeywordMatcher:
+    """Get the matcher of a single keyword."""
+    return matcher.KeywordMatcher(
+        {0: matcher.Keyword(pattern, regex=regex, case_sensitive=case_sensitive)}
+    )
+
+
+def _contains(text: Any, pattern: str, regex: int, case_sensitive: int) -> bool:
+    """Check if a value contains the keyword, the values which are not text do not."""
+    if not isinstance(text, str):
+        return False
+    return bool(
+        _get_keyword_matcher(pattern, bool(regex), bool(case_sensitive)).find(text)
+    )
+
+
+def identifier_to_sql(identifier: Any) -> _Query:
+    """
+    Translate an identifier into a SQL expression which is 1 for the matching rows.
+
+    The expression matches the same rows as rules.compile_identifier, the missing
+    values are only different from a value.
+
+    Parameters
+    ----------
+    identifier : Mapping or rules.Identifier
+        The identifier as it appears in the config.
+    """
+    identifier = rules.parse_identifier(identifier)
+    column = _quote(identifier.column)
+    if identifier.comparison_operator == rules.CONTAINS_OPERATOR:
+        literals = matcher.get_literals(
+            matcher.Keyword(
+                identifier.value,
+                regex=identifier.regex,
+                case_sensitive=identifier.case_sensitive,
+            )
+        )
+        if literals is not None and identifier.case_sensitive:
+            # The plain strings are found by SQLite itself
+            found = " OR ".join(f"instr({column}, ?) > 0" for _ in literals)
+            return f"(typeof({column}) = 'text' AND ({found}))", list(literals)
+        return (
+            f"{_CONTAINS_FUNCTION}({column}, ?, ?, ?)",
+            [identifier.value, identifier.regex, identifier.case_sensitive],
+        )
+    operator = _SQL_OPERATORS[identifier.comparison_operator]
+    missing = 1 if identifier.comparison_operator == "!=" else 0
+    return f"IFNULL({column} {operator} ?, {missing})", [identifier.value]
+
+
+def condition_to_sql(condition: Any) -> _Query:
+    """
+    Translate a condition into a SQL expression which is 1 for the matching rows.
+
+    Parameters
+    ----------
+    condition : Mapping or rules.Condition
+        The condition as it appears in the config.
+    """
+    condition = rules.parse_condition(condition)
+    expressions, parameters = [], []
+    for identifier in condition.identifiers:
+        expression, identifier_parameters = identifier_to_sql(identifier)
+        expressions.append(expression)
+        parameters.extend(identifier_parameters)
+    return (
+        "(" + f" {condition.logical_operator} ".join(expressions) + ")",
+        parameters,
+    )
+
+
+class TransactionDatabase:
+    """
+    The normalized transactions in a SQLite database, read as they are needed.
+
+    The transactions are numbered by their position, which is their "Row". Like
+    a dataframe the database has a length, an index of the positions and its
+    columns can be read one at a time, e.g. database["Debit"].
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The file of the database, ":memory:" for a database in memory.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path]) -> None:
+        self.path = path
+        # The queries of the threads sharing the database are made one at a time
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.create_function(
+            _CONTAINS_FUNCTION, 4, _contains, deterministic=True
+        )
+        self._read_columns()
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._connection.close()
+
+    def __enter__(self) -> "TransactionDatabase":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._number_of_rows
+
+    @property
+    def index(self) -> pd.RangeIndex:
+        """The positions of the transactions."""
+        return pd.RangeIndex(self._number_of_rows)
+
+    @property
+    def columns(self) -> pd.Index:
+        """The columns of the transactions."""
+        return pd.Index(list(self._column_types), dtype=object)
+
+    def __getitem__(self, column: str) -> pd.Series:
+        """Read a single column of all the transactions."""
+        if column not in self._column_types:
+            raise KeyError(column)
+        values = self._fetch(
+            f"SELECT {_quote(column)} FROM transactions ORDER BY {_quote(ROW_COLUMN)}"
+        )
+        return self._restore_column(
+            column, pd.Series([value for value, in values], dtype=object, name=column)
+        )
+
+    def write_transactions(self, transactions: pd.DataFrame) -> None:
+        """
+        Write the transactions into the database, replacing the ones in it.
+
+        The dates are kept to the second as text, e.g. "2023-05-01 10:00:00", the
+        categoricals and arrow backed strings come back with their types.
+
+        Parameters
+        ----------
+        transactions : pd.DataFrame
+            The normalized transactions, e.g. from load_data_from_all_expense_stmts.
+            Their positions are their rows in the database.
+
+        Raises
+        ------
+        UnsupportedColumnError
+            When a column of the transactions can not be written.
+        """
+        column_types = {
+            column: self._get_column_type(column, values)
+            for column, values in transactions.items()
+        }
+        columns = [_quote(column) for column in column_types]
+        # The categories of the categoricals are kept, also the unused ones
+        column_categories = {
+            column: json.dumps(values.cat.categories.tolist())
+            for column, values in transactions.items()
+            if column_types[column] == "category"
+        }
+        column_values = [
+            self._to_sql_values(values, column_types[column])
+            for column, values in transactions.items()
+        ]
+        searched_columns = [
+            column for column in search.SEARCH_COLUMNS if column in column_types
+        ]
+        text_columns = [
+            f"text_{position}"
+            for position, column in enumerate(column_types)
+            if column in searched_columns
+        ]
+
+        with self._lock, self._connection as connection:
+            for table in ["transactions", "labels", "columns", "transactions_text"]:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.execute(
+                "CREATE TABLE columns (Position INTEGER PRIMARY KEY, Name TEXT, "
+                "Type TEXT, Categories TEXT)"
+            )
+            connection.executemany(
+                "INSERT INTO columns VALUES (?, ?, ?, ?)",
+                zip(
+                    range(len(column_types)),
+                    column_types,
+                    column_types.values(),
+                    [column_categories.get(column) for column in column_types],
+                ),
+            )
+            connection.execute(
+                f"CREATE TABLE transactions ({_quote(ROW_COLUMN)} INTEGER PRIMARY KEY"
+                + "".join(
+                    f", {column} {self._get_sql_type(column_type)}"
+                    for column, column_type in zip(columns, column_types.values())
+                )
+                + ")"
+            )
+            connection.executemany(
+                f"INSERT INTO transactions VALUES (?{', ?' * len(columns)})",
+                zip(range(len(transactions)), *column_values),
+            )
+            # The indexes are made after the rows are in, which is faster than
+            # updating them for every row
+            for column in INDEXED_COLUMNS:
+                if column in column_types:
+                    connection.execute(
+                        f"CREATE INDEX {_quote(f'transactions {column}')} "
+                        f"ON transactions ({_quote(column)})"
+                    )
+            connection.execute(
+                f"CREATE TABLE labels ({_quote(ROW_COLUMN)} INTEGER PRIMARY KEY, "
+                f"Month TEXT, Category TEXT, {_quote(categorize.SUB_CATEGORY_COLUMN)} "
+                "TEXT)"
+            )
+            connection.execute("CREATE INDEX labels_month ON labels (Month)")
+            connection.execute("CREATE INDEX labels_category ON labels (Category)")
+            if searched_columns:
+                connection.execute(
+                    "CREATE VIRTUAL TABLE transactions_text USING fts5("
+                    + ", ".join(text_columns)
+                    + f", tokenize = {_quote(_TEXT_TOKENIZER)})"
+                )
+                connection.execute(
+                    f"INSERT INTO transactions_text (rowid, {', '.join(text_columns)}) "
+                    f"SELECT {_quote(ROW_COLUMN)}, "
+                    + ", ".join(_quote(column) for column in searched_columns)
+                    + " FROM transactions"
+                )
+        self._read_columns()
+
+    def write_labels(self, labels: pd.DataFrame) -> None:
+        """
+        Write the month, category and sub category of the transactions.
+
+        The labels can then be used in the queries, e.g. for the total of every
+        category in every month, which have an index on the month and category.
+
+        Parameters
+        ----------
+        labels : pd.DataFrame
+            The "Month", "Category" and "Sub Category" of the transactions indexed
+            by their positions, the transactions without a month are left out.
+        """
+        labels = labels[labels["Month"].notna()]
+        with self._lock, self._connection as connection:
+            connection.execute("DELETE FROM labels")
+            connection.executemany(
+                "INSERT INTO labels VALUES (?, ?, ?, ?)",
+                zip(
+                    labels.index.tolist(),
+                    *(
+                        labels[column].where(labels[column].notna(), None)
+                        for column in [
+                            "Month",
+                            categorize.CATEGORY_COLUMN,
+                            categorize.SUB_CATEGORY_COLUMN,
+                        ]
+                    ),
+                ),
+            )
+
+    def select_rows(
+        self, rows: Sequence[int], columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read the transactions at the sorted positions, indexed by their positions.
+
+        Parameters
+        ----------
+        rows : Sequence[int]
+            The sorted positions of the transactions.
+        columns : Sequence[str], optional
+            Only read these columns of the transactions, all of them by default.
+
+        Raises
+        ------
+        KeyError
+            When one of the columns is not in the database.
+        """
+        columns = list(self._column_types) if columns is None else list(columns)
+        for column in columns:
+            if column not in self._column_types:
+                raise KeyError(column)
+        rows_filter, parameters = self._rows_filter(rows)
+        selected = ", ".join(_quote(column) for column in [ROW_COLUMN, *columns])
+        frame = pd.DataFrame.from_records(
+            self._fetch(
+                f"SELECT {selected} FROM transactions WHERE {rows_filter} "
+                f"ORDER BY {_quote(ROW_COLUMN)}",
+                parameters,
+            ),
+            columns=[ROW_COLUMN, *columns],
+        )
+        index = pd.Index(frame.pop(ROW_COLUMN).to_numpy(dtype=np.int64))
+        for column in columns:
+            frame[column] = self._restore_column(column, frame[column])
+        frame.index = index
+        return frame
+
+    def get_debit_sum(self, rows: Sequence[int]) -> Any:
+        """Sum the debits of the transactions at the positions."""
+        rows_filter, parameters = self._rows_filter(rows)
+        ((debit_sum,),) = self._fetch(
+            f"SELECT IFNULL(SUM(Debit), 0) FROM transactions WHERE {rows_filter}",
+            parameters,
+        )
+        return debit_sum
+
+    def get_category_totals(
+        self,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        Get the total, number and average of the debits of every category per month.
+
+        The debits are grouped by their month and category written by write_labels
+        in a single query, the transactions which are in no category are left out.
+
+        Parameters
+        ----------
+        start : str or pd.Timestamp, optional
+            Only the transactions with this value date or a later one.
+        end : str or pd.Timestamp, optional
+            Only the transactions with this value date or an earlier one.
+
+        Returns
+        -------
+        pd.DataFrame
+            The "Month", "Category", "Total", "Count" and "Average" of every month
+            and category having transactions.
+        """
+        category = _quote(categorize.CATEGORY_COLUMN)
+        debit = _quote(_DEBIT_COLUMN)
+        filters, parameters = [f"{category} IS NOT NULL"], []
+        for bound, operator in [(start, ">="), (end, "<=")]:
+            if bound is not None:
+                filters.append(f"{_quote(_VALUE_DATE_COLUMN)} {operator} ?")
+                parameters.append(pd.Timestamp(bound).strftime(_DATE_FORMAT))
+        return self.query(
+            f"SELECT Month, {category}, SUM({debit}) AS Total, COUNT(*) AS Count, "
+            f"AVG({debit}) AS Average FROM labels JOIN transactions "
+            f"USING ({_quote(ROW_COLUMN)}) WHERE {' AND '.join(filters)} "
+            f"GROUP BY Month, {category}",
+            parameters,
+        )
+
+    def get_month_segments(
+        self,
+        salary_row_indexes: Sequence[int],
+        ignored: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        Divide the transactions into months at the salary rows and summarize them.
+
+        The months are divided and summarized by a single query grouping the
+        transactions between the salary rows, without reading the transactions.
+        The result is the same as the one of utils.get_month_segments.
+
+        Parameters
+        ----------
+        salary_row_indexes : Sequence[int]
+            The sorted positions of the rows in which the salary was credited.
+        ignored : np.ndarray, optional
+            A boolean array which is True for the rows not counted as extra credits.
+        """
+        row = _quote(ROW_COLUMN)
+        value_date = _quote(_VALUE_DATE_COLUMN)
+        credit = _quote(_CREDIT_COLUMN)
+        ignored_rows = (
+            np.flatnonzero(ignored) if ignored is not None else np.empty(0, dtype=int)
+        )
+        # The rows of every month are grouped once by the month of their value date,
+        # the most frequent month and year of every month are voted for from these
+        # groups and the first one seen wins a tie
+        votes = [
+            f"SELECT Month, Value FROM (SELECT Month, {value} AS Value, "
+            "ROW_NUMBER() OVER (PARTITION BY Month ORDER BY SUM(Size) DESC, "
+            "MIN(First)) AS Rank FROM periods WHERE Period IS NOT NULL "
+            "GROUP BY Month, Value) WHERE Rank = 1"
+            for value in [
+                "CAST(substr(Period, 6, 2) AS INTEGER)",
+                "CAST(substr(Period, 1, 4) AS INTEGER)",
+            ]
+        ]
+        segments = self.query(
+            "WITH salaries AS (SELECT CAST(key AS INTEGER) AS Month, "
+            "value AS Salary_row, LEAD(value, 1, ?) OVER (ORDER BY key) "
+            "AS Next_salary_row FROM json_each(?)), "
+            f"periods AS (SELECT Month, substr({value_date}, 1, 7) AS Period, "
+            f"COUNT(*) AS Size, MIN({row}) AS First, MAX({row}) AS Last, "
+            f"SUM(CASE WHEN {credit} > 0 AND {row} NOT IN "
+            f"(SELECT value FROM json_each(?)) THEN {credit} ELSE 0 END) AS Extra "
+            "FROM salaries JOIN transactions "
+            f"ON {row} > Salary_row AND {row} < Next_salary_row "
+            "GROUP BY Month, Period), "
+            f"months AS ({votes[0]}), years AS ({votes[1]}) "
+            "SELECT Month, MIN(First) AS Start, MAX(Last) + 1 AS Stop, "
+            'SUM(Extra) AS "Extra Credit", months.Value AS Number, '
+            f"years.Value AS Year, (SELECT {credit} FROM transactions "
+            f"WHERE {row} = Salary_row) AS Salary FROM periods JOIN salaries "
+            "USING (Month) LEFT JOIN months USING (Month) LEFT JOIN years "
+            "USING (Month) GROUP BY Month ORDER BY Month",
+            [
+                self._number_of_rows,
+                json.dumps(np.asarray(salary_row_indexes, dtype=np.int64).tolist()),
+                json.dumps(ignored_rows.tolist()),
+            ],
+        ).astype({"Month": np.int64, "Start": np.int64, "Stop": np.int64})
+        segments.set_index("Month", inplace=True)
+        segments["Label"] = utils.get_month_labels(
+            segments["Number"].dropna(), segments["Year"].dropna()
+        )
+        for column in ["Salary", "Extra Credit"]:
+            segments[column] = self._restore_column(
+                _CREDIT_COLUMN, segments[column].astype(object)
+            )
+        return segments[["Start", "Stop", "Label", "Salary", "Extra Credit"]]
+
+    def match_rows(self, condition: Any) -> np.ndarray:
+        """Get a boolean array which is True for the transactions matching a condition."""
+        expression, parameters = condition_to_sql(condition)
+        matched = np.zeros(self._number_of_rows, dtype=bool)
+        rows = self._fetch(
+            f"SELECT {_quote(ROW_COLUMN)} FROM transactions WHERE {expression}",
+            parameters,
+        )
+        matched[np.array([row for row, in rows], dtype=np.int64)] = True
+        return matched
+
+    def get_matches(
+        self, rows: Sequence[int], categories: Iterable[Any]
+    ) -> Tuple[pd.DataFrame, Dict[int, pd.DataFrame]]:
+        """
+        Evaluate the categories and their labelled identifiers over the transactions.
+
+        All the rules are evaluated by a single query over the transactions at the
+        positions, the matches are the same as the ones of get_category_matches and
+        get_sub_category_matches of the categorize module.
+
+        Parameters
+        ----------
+        rows : Sequence[int]
+            The sorted positions of the transactions.
+        categories : Iterable
+            The expense categories from the config.
+
+        Returns
+        -------
+        Tuple[pd.DataFrame, Dict[int, pd.DataFrame]]
+            The matches of every category by its position and the matches of the
+            labelled identifiers of every category by their positions.
+        """
+        parsed_categories = rules.parse_conditions(categories)
+        # Every identifier is evaluated once by the query, the categories are made
+        # of the matches of their identifiers
+        expressions, parameters = [], []
+        for category in parsed_categories:
+            for identifier in category.identifiers:
+                expression, identifier_parameters = identifier_to_sql(identifier)
+                expressions.append(expression)
+                parameters.extend(identifier_parameters)
+
+        rows_filter, rows_parameters = self._rows_filter(rows)
+        selected = ", ".join([_quote(ROW_COLUMN), *expressions])
+        values = np.array(
+            self._fetch(
+                f"SELECT {selected} FROM transactions WHERE {rows_filter} "
+                f"ORDER BY {_quote(ROW_COLUMN)}",
+                parameters + rows_parameters,
+            ),
+            dtype=np.int64,
+        ).reshape(-1, len(expressions) + 1)
+        index = pd.Index(values[:, 0])
+        identifier_matches = values[:, 1:].astype(bool)
+
+        category_matches = pd.DataFrame(
+            index=index, columns=pd.RangeIndex(len(parsed_categories)), dtype=bool
+        )
+        sub_category_matches = dict()
+        first_identifier = 0
+        for category_position, category in enumerate(parsed_categories):
+            matches = identifier_matches[
+                :, first_identifier : first_identifier + len(category.identifiers)
+            ]
+            first_identifier += len(category.identifiers)
+            combine = _LOGICAL_FUNCTIONS[category.logical_operator]
+            category_matches[category_position] = combine.reduce(matches, axis=1)
+            sub_category_matches[category_position] = pd.DataFrame(
+                {
+                    position: matches[:, position]
+                    for position, identifier in enumerate(category.identifiers)
+                    if identifier.label is not None
+                },
+                index=index,
+                dtype=bool,
+            )
+        return category_matches, sub_category_matches
+
+    def search(
+        self, any_of: Iterable[str], columns: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """
+        Get the sorted positions of the transactions containing any of the keywords.
+
+        A keyword is found like by search.TokenIndex, when all its words are next
+        to each other in one of the columns, through the full text index.
+
+        Parameters
+        ----------
+        any_of : Iterable[str]
+            The keywords, a transaction is found when it contains one of them.
+        columns : Iterable[str], optional
+            The columns to search in, the payment details and the beneficiary by
+            default.
+
+        Raises
+        ------
+        KeyError
+            When one of the columns is not in the full text index.
+        """
+        searched_columns = [
+            column for column in search.SEARCH_COLUMNS if column in self._column_types
+        ]
+        if columns is None:
+            columns = searched_columns
+        text_columns = []
+        for column in columns:
+            if column not in searched_columns:
+                raise KeyError(column)
+            text_columns.append(f"text_{list(self._column_types).index(column)}")
+        phrases = [
+            '"' + " ".join(search.tokenize(keyword)) + '"'
+            for keyword in any_of
+            if search.tokenize(keyword)
+        ]
+        if not phrases or not text_columns:
+            return np.empty(0, dtype=np.int64)
+        rows = self._fetch(
+            "SELECT rowid FROM transactions_text WHERE transactions_text MATCH ? "
+            "ORDER BY rowid",
+            ["{" + " ".join(text_columns) + "} : (" + " OR ".join(phrases) + ")"],
+        )
+        return np.array([row for row, in rows], dtype=np.int64)
+
+    def query(self, sql: str, parameters: Sequence[Any] = ()) -> pd.DataFrame:
+        """
+        Answer a query of the transactions and of their labels.
+
+        Parameters
+        ----------
+        sql : str
+            The query, e.g. 'SELECT Month, Category, SUM(Debit) FROM transactions
+            JOIN labels USING (Row) GROUP BY Month, Category'.
+        parameters : Sequence
+            The parameters of the query.
+        """
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection, params=list(parameters))
+
+    def _fetch(self, sql: str, parameters: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """Run a query and get all its rows."""
+        with self._lock:
+            return self._connection.execute(sql, list(parameters)).fetchall()
+
+    def _read_columns(self) -> None:
+        """Read the columns and the number of the transactions in the database."""
+        with self._lock:
+            has_transactions = self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                "AND name = 'transactions'"
+            ).fetchone()
+            self._column_types: Dict[str, str] = dict()
+            self._categories: Dict[str, List[Any]] = dict()
+            self._number_of_rows = 0
+            if not has_transactions:
+                return
+            for column, column_type, categories in self._connection.execute(
+                "SELECT Name, Type, Categories FROM columns ORDER BY Position"
+            ):
+                self._column_types[column] = column_type
+                if categories is not None:
+                    self._categories[column] = json.loads(categories)
+            ((self._number_of_rows,),) = self._connection.execute(
+                f"SELECT IFNULL(MAX({_quote(ROW_COLUMN)}) + 1, 0) FROM transactions"
+            ).fetchall()
+
+    @staticmethod
+    def _rows_filter(rows: Sequence[int]) -> _Query:
+        """Get the SQL condition selecting the transactions at the sorted positions."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return "0", []
+        if rows[-1] - rows[0] + 1 == len(rows):
+            # The rows of a month are mostly one range of positions
+            return f"{_quote(ROW_COLUMN)} BETWEEN ? AND ?", [
+                int(rows[0]),
+                int(rows[-1]),
+            ]
+        return (
+            f"{_quote(ROW_COLUMN)} IN (SELECT value FROM json_each(?))",
+            [json.dumps(rows.tolist())],
+        )
+
+    @staticmethod
+    def _get_column_type(column: Any, values: pd.Series) -> str:
+        """Get the type which a column is read back with."""
+        if not isinstance(column, str):
+            raise exceptions.UnsupportedColumnError(
+                message=f"The column {column!r} has to be named by a string"
+            )
+        dtype = values.dtype
+        if isinstance(dtype, pd.StringDtype):
+            return f"string[{dtype.storage}]"
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+            # Only the text is written, as the text columns of the statements
+            text = values.cat.categories if dtype == "category" else values
+            if pd.api.types.infer_dtype(text, skipna=True) not in ("string", "empty"):
+                raise exceptions.UnsupportedColumnError(
+                    message=f"The column {column!r} has values which are not strings"
+                )
+            return str(dtype)
+        if dtype == np.dtype("datetime64[ns]"):
+            return str(dtype)
+        if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+            return str(dtype)
+        raise exceptions.UnsupportedColumnError(
+            message=f"The column {column!r} of the type {dtype} can not be written"
+        )
+
+    @staticmethod
+    def _get_sql_type(column_type: str) -> str:
+        """Get the SQL type of a column."""
+        dtype = pd.api.types.pandas_dtype(column_type)
+        if isinstance(dtype, np.dtype) and dtype.kind in "biu":
+            return "INTEGER"
+        if isinstance(dtype, np.dtype) and dtype.kind == "f":
+            return "REAL"
+        return "TEXT"
+
+    @staticmethod
+    def _to_sql_values(values: pd.Series, column_type: str) -> List[Any]:
+        """Get the values of a column which are written into the database."""
+        if column_type == "datetime64[ns]":
+            values = values.dt.strftime(_DATE_FORMAT)
+        values = values.astype(object)
+        return values.where(values.notna(), None).tolist()
+
+    def _restore_column(self, column: str, values: pd.Series) -> pd.Series:
+        """Give the values read from the database the type of their column."""
+        column_type = self._column_types[column]
+        if column_type == "datetime64[ns]":
+            return pd.to_datetime(values, format=_DATE_FORMAT)
+        if column_type == "object":
+            return values.where(values.notna(), np.nan)
+        if column_type == "category":
+            return values.astype(pd.CategoricalDtype(self._categories[column]))
+        return values.astype(column_type)
@@ -1,5 +1,8 @@
 class Error(Exception):
     def __init__(self, message) -> None:
+        # Passing the message on keeps the errors picklable, e.g. when they are
+        # raised inside a worker process
+        super().__init__(message)
         self.message = message
 
     def __str__(self):
@@ -32,3 +35,23 @@ class StatementPathNotADirectory(Error):
 
 class BankNotSupportedError(Error):
     """When the bank is not supported."""
+
+
+class InvalidRuleError(Error):
+    """When a rule in the config is not valid."""
+
+
+class QueryNotFoundError(Error):
+    """When the month or category of a query is not in the expense report."""
+
+
+class InvalidQueryError(Error):
+    """When the parameters of a query are not valid."""
+
+
+class UnsupportedColumnError(Error):
+    """When a column of the transactions can not be written into a store."""
+
+
+class CouldNotLoadStoreError(Error):
+    """When a transaction store could not be opened."""
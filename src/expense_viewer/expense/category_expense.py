@@ -1,35 +1,96 @@
 """File for single category expense."""
+from typing import Iterable, Optional
+
+import numpy as np
+import omegaconf
 import pandas as pd
 
-from expense_viewer import utils as utils
+from expense_viewer import rules
 import expense_viewer.expense.expense as expense
+import expense_viewer.profiler as profiler_lib
 
 
 class CategoryExpense(expense.Expense):
     """A class for a single category of expense."""
 
-    def add_child_expenses(self):
-        """Add the child expenses for each subcategory."""
-        data = self.expense
-        for identifier in self.config["identifiers"]:
-            if "label" in identifier:
-                # This checks if there is a need to break down the category expense
-                # further. No label means that there are no subcategories to the category expense.
-                condition_str = utils.get_condition_str_for_single_identifier(
-                    identifier=identifier
-                )
+    def __init__(
+        self,
+        expense: pd.DataFrame,
+        config: omegaconf.dictconfig.DictConfig,
+        label: str,
+        rows: Optional[np.ndarray] = None,
+        condition: Optional[rules.Condition] = None,
+    ) -> None:
+        super().__init__(expense=expense, config=config, label=label, rows=rows)
+        # The category is only validated and converted when the month has not
+        # converted it already
+        self._condition = condition
+
+    def add_child_expenses(
+        self,
+        sub_category_matches: Optional[pd.DataFrame] = None,
+        profiler: Optional[profiler_lib.RuleProfiler] = None,
+        month: Optional[str] = None,
+    ):
+        """
+        Add the child expenses for each subcategory.
 
-                expense_data_for_identifier = data[pd.eval(condition_str)]
+        Parameters
+        ----------
+        sub_category_matches : pd.DataFrame, optional
+            The identifier matches already evaluated over a frame containing this
+            category's rows (see categorize.get_sub_category_matches).
+        profiler : profiler_lib.RuleProfiler, optional
+            Record the time and the matches of every labelled identifier in it.
+        month : str, optional
+            The month of the category, which the profiler records the identifiers
+            for.
+        """
+        rows = self.rows
+        condition = (
+            self._condition
+            if self._condition is not None
+            else rules.parse_condition(self.config)
+        )
+        # Only the identifiers having a label break down the category expense further.
+        # No label means that there are no subcategories to the category expense.
+        labelled_identifiers = [
+            (position, identifier)
+            for position, identifier in enumerate(condition.identifiers)
+            if identifier.label is not None
+        ]
+        if sub_category_matches is not None:
+            index = self._source.index[rows]
+            identifier_masks: Iterable[pd.Series] = (
+                sub_category_matches.loc[index, position]
+                for position, _ in labelled_identifiers
+            )
+        elif profiler is not None:
+            identifier_masks = profiler.identifier_masks(
+                condition, self._get_expense_data(), month=month, sub_categories=True
+            )
+        else:
+            # All the labelled identifiers are checked together so that every column
+            # is only scanned once
+            identifier_masks = rules.compile_identifiers(
+                identifier for _, identifier in labelled_identifiers
+            )(self._get_expense_data())
 
-                if not expense_data_for_identifier.empty:
-                    self.child_expenses[identifier["label"]] = expense.Expense(
-                        expense=expense_data_for_identifier,
-                        config=identifier,
-                        label=identifier["label"],
-                    )
-                # Since the child expense for this is the base class object which does not
-                # Have an add_child_expense method, further calls to that method are not done
+        for (position, identifier), mask in zip(labelled_identifiers, identifier_masks):
+            rows_for_identifier = rows[np.asarray(mask, dtype=bool)]
+
+            if len(rows_for_identifier):
+                self.child_expenses[identifier.label] = expense.Expense(
+                    expense=self._source,
+                    config=self.config["identifiers"][position],
+                    label=identifier.label,
+                    rows=rows_for_identifier,
+                )
+            # Since the child expense for this is the base class object which does not
+            # Have an add_child_expense method, further calls to that method are not done
 
     def get_total_expense_sum(self) -> float:
         """Sum all the expenses and give back a total sum."""
-        return self.expense["Debit"].sum()
+        if self._total_expense_sum is None:
+            self._total_expense_sum = self._get_debit_sum(self.rows)
+        return self._total_expense_sum
@@ -2,21 +2,100 @@
 
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 import omegaconf
 import pandas as pd
 
 
 class Expense:
-    """Expense base class."""
+    """
+    Expense base class.
+
+    The expenses in the tree do not keep a copy of their data. Every expense only
+    keeps the positions of its rows in the expense data shared with its parent,
+    the expense dataframe is created when it is first accessed.
+    """
 
     def __init__(
-        self, expense: pd.DataFrame, config: omegaconf.dictconfig.DictConfig, label: str
+        self,
+        expense: pd.DataFrame,
+        config: omegaconf.dictconfig.DictConfig,
+        label: str,
+        rows: Optional[np.ndarray] = None,
     ) -> None:
-        self.expense = expense
+        # When rows are given the expense is made of the rows at these positions
+        # of the expense data, else it is the whole expense data
+        self._source = expense
+        self._rows = rows
+        self._expense: Optional[pd.DataFrame] = expense if rows is None else None
+        self._total_expense_sum: Optional[float] = None
         self.label = label
         self.config = config
         self.child_expenses: Dict[str, Any] = {}
 
+    @property
+    def expense(self) -> pd.DataFrame:
+        """The expense data, created from the shared expense data if needed."""
+        if self._expense is None:
+            self._expense = self._select_rows(self._rows)
+        return self._expense
+
+    @expense.setter
+    def expense(self, expense: pd.DataFrame) -> None:
+        self._source = expense
+        self._rows = None
+        self._expense = expense
+        self._total_expense_sum = None
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The positions of the rows of the expense in the shared expense data."""
+        if self._rows is None:
+            return np.arange(len(self._source))
+        return self._rows
+
+    def release_expense(self) -> None:
+        """
+        Drop the expense dataframes of this expense and all its child expenses.
+
+        Only the dataframes which can be created again from the shared expense
+        data are dropped, they are created again when they are next accessed.
+        """
+        if self._rows is not None:
+            self._expense = None
+        for child_expense in self.child_expenses.values():
+            child_expense.release_expense()
+
+    def _replace_source(self, source: pd.DataFrame) -> None:
+        """Point this expense and its child expenses to new shared expense data."""
+        old_source = self._source
+        self._source = source
+        if self._rows is None:
+            self._rows = np.arange(len(old_source))
+            self._expense = None
+        for child_expense in self.child_expenses.values():
+            if child_expense._source is old_source:
+                child_expense._replace_source(source)
+
+    def _select_rows(self, rows: np.ndarray) -> pd.DataFrame:
+        """Get the data of the rows at the positions in the shared expense data."""
+        if not isinstance(self._source, pd.DataFrame):
+            # The transactions are read from the transaction database
+            return self._source.select_rows(rows)
+        return self._source.iloc[rows]
+
+    def _get_expense_data(self) -> pd.DataFrame:
+        """Get the expense data without keeping it when it was not created yet."""
+        if self._expense is not None:
+            return self._expense
+        return self._select_rows(self.rows)
+
+    def _get_debit_sum(self, rows: np.ndarray) -> float:
+        """Sum the debits of the rows at the positions in the shared expense data."""
+        if not isinstance(self._source, pd.DataFrame):
+            return self._source.get_debit_sum(rows)
+        return self._source["Debit"].iloc[rows].sum()
+
     def get_child_expense_labels(self) -> Optional[List[str]]:
         """Show the child expense labels associated with the expense object."""
         return list(self.child_expenses.keys()) if self.child_expenses else None
@@ -1,13 +1,18 @@
 """File for monthly expenses."""
-from typing import Dict, Set, List, Optional
+import logging
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import omegaconf
 import pandas as pd
 
-from expense_viewer import exceptions
-from expense_viewer import utils as utils
+from expense_viewer import exceptions, rules
 import expense_viewer.expense.category_expense as category_expense
 import expense_viewer.expense.expense as expense
+import expense_viewer.profiler as profiler_lib
+import expense_viewer.stats as stats_lib
+
+logger = logging.getLogger(__name__)
 
 
 class MonthlyExpense(expense.Expense):
@@ -19,73 +24,225 @@ class MonthlyExpense(expense.Expense):
         config: omegaconf.dictconfig.DictConfig,
         row_indices_to_ignore: Optional[List[int]] = None,
         label: str = "Overall",
+        rows: Optional[np.ndarray] = None,
+        stats: Optional[stats_lib.PipelineStats] = None,
+        profiler: Optional[profiler_lib.RuleProfiler] = None,
+        categories: Optional[Tuple[rules.Condition, ...]] = None,
     ) -> None:
-        super().__init__(expense=expense, config=config, label=label)
-        self._all_found_category_indices: Set[int] = set()
-        self._category_indices_map: Dict[str, Set[int]] = dict()
+        super().__init__(expense=expense, config=config, label=label, rows=rows)
+        # The categories are validated and converted once for the month, or not at
+        # all when they are already converted by the overall expense
+        self._categories = (
+            categories if categories is not None else rules.parse_conditions(config)
+        )
+        # Where the time spent on the keywords and on every category is recorded
+        self.stats = stats
+        # Where the time and the matches of every rule are recorded, the rules are
+        # evaluated one at a time when there is a profiler
+        self.profiler = profiler
+        # The positions of the rows found for every category
+        self._category_indices_map: Dict[str, np.ndarray] = dict()
         self._row_indices_to_ignore = (
             row_indices_to_ignore if row_indices_to_ignore is not None else []
         )
-        self._actual_expense_data = self.expense
+        # The positions of the rows which are not ignored in the shared expense data
+        self._actual_rows = self.rows
+
+    @property
+    def _actual_expense_data(self) -> pd.DataFrame:
+        """The expense data without the rows to ignore."""
+        if len(self._actual_rows) == len(self.rows):
+            return self.expense
+        return self._select_rows(self._actual_rows)
 
     def get_total_expense_sum(self) -> float:
         """Sum all the expenses and give back a total sum."""
-        return self._actual_expense_data["Debit"].sum()
+        if self._total_expense_sum is None:
+            self._total_expense_sum = self._get_debit_sum(self._actual_rows)
+        return self._total_expense_sum
 
-    def add_child_expenses(self):
-        """Add the child expenses for the month's items and then delegate."""
+    def add_child_expenses(
+        self,
+        category_matches: Optional[pd.DataFrame] = None,
+        sub_category_matches: Optional[Dict[int, pd.DataFrame]] = None,
+    ):
+        """
+        Add the child expenses for the month's items and then delegate.
+
+        Parameters
+        ----------
+        category_matches : pd.DataFrame, optional
+            The category matches already evaluated over a frame containing this
+            month's rows (see categorize.get_category_matches). When given the
+            categories are not evaluated again for the month.
+        sub_category_matches : Dict[int, pd.DataFrame], optional
+            The sub category matches for each category position which are handed
+            over to the category expenses.
+        """
 
         # Remove the row indices which are sent as indices to ignore
-        self._actual_expense_data = self.expense[
-            ~self.expense.index.isin(self._row_indices_to_ignore)
-        ]
-
-        data = self._actual_expense_data
-        for category in self.config:
-            condition_str = utils.get_full_condition_string(category)
-
-            expense_data_for_category = data[pd.eval(condition_str)]
-
-            if not expense_data_for_category.empty:
-                # Add the child expense only when the data is non empty
-                # First check if the indices of the child are already in the found
-                # indices for some other category
-                # If yes then don't continue further and raise an error as it is ambiguous
-                expense_data_indices = set(expense_data_for_category.index)
-                self._expense_data_indices_not_already_found(
-                    indices=expense_data_indices
+        rows = self.rows
+        self._actual_rows = rows
+        if len(self._row_indices_to_ignore):
+            self._actual_rows = rows[
+                ~self._source.index[rows].isin(self._row_indices_to_ignore)
+            ]
+        self._total_expense_sum = None
+        actual_index = self._source.index[self._actual_rows]
+
+        if (
+            category_matches is None
+            and self.profiler is None
+            and not isinstance(self._source, pd.DataFrame)
+        ):
+            # The categories of the transaction database are evaluated by a single
+            # query of the month's rows, a profiler times the rules one at a time
+            with stats_lib.measure(
+                self.stats,
+                "keywords",
+                name=self.label,
+                rows=len(self._actual_rows),
+                logger=logger,
+            ):
+                category_matches, sub_category_matches = self._source.get_matches(
+                    self._actual_rows, self._categories
                 )
-                self._category_indices_map[category["name"]] = expense_data_indices
-                self._all_found_category_indices.update(expense_data_indices)
-
-                self.child_expenses[
-                    category["name"]
-                ] = category_expense.CategoryExpense(
-                    expense=expense_data_for_category,
-                    config=category,
-                    label=category["name"],
+
+        if category_matches is not None:
+            self._add_child_expenses_from_matches(
+                category_matches=category_matches.loc[actual_index],
+                sub_category_matches=sub_category_matches or {},
+            )
+            return
+
+        # All the categories are checked together so that every column is only
+        # scanned once for the keywords of all the categories
+        with stats_lib.measure(
+            self.stats,
+            "keywords",
+            name=self.label,
+            rows=len(self._actual_rows),
+            logger=logger,
+        ):
+            if self.profiler is not None:
+                category_masks = self.profiler.condition_masks(
+                    self._categories,
+                    self._select_rows(self._actual_rows),
+                    month=self.label,
+                )
+            else:
+                category_masks = rules.compile_conditions(self._categories)(
+                    self._select_rows(self._actual_rows)
                 )
-                self.child_expenses[category["name"]].add_child_expenses()
+        found = np.zeros(len(self._actual_rows), dtype=bool)
+        for position, category in enumerate(self._categories):
+            with stats_lib.measure(
+                self.stats,
+                "rule",
+                name=f"{self.label}: {category.name}",
+                rows=len(self._actual_rows),
+                logger=logger,
+            ):
+                mask = np.asarray(next(category_masks), dtype=bool)
+                rows_for_category = self._actual_rows[mask]
+
+                if len(rows_for_category):
+                    # Add the child expense only when the data is non empty
+                    # First check if the indices of the child are already in the
+                    # found indices for some other category
+                    # If yes then don't continue further and raise an error as it
+                    # is ambiguous
+                    self._expense_data_indices_not_already_found(rows=rows_for_category)
+                    self._category_indices_map[category.name] = rows_for_category
+                    found |= mask
+
+                    self.child_expenses[
+                        category.name
+                    ] = category_expense.CategoryExpense(
+                        expense=self._source,
+                        config=self.config[position],
+                        label=category.name,
+                        rows=rows_for_category,
+                        condition=category,
+                    )
+                    self.child_expenses[category.name].add_child_expenses(
+                        profiler=self.profiler, month=self.label
+                    )
+
+        rows_without_category = self._actual_rows[~found]
 
-        remaining_expense_without_category = data[
-            ~self._actual_expense_data.index.isin(
-                list(self._all_found_category_indices)
+        if len(rows_without_category):
+            self.child_expenses["Miscellaneous"] = category_expense.CategoryExpense(
+                expense=self._source,
+                config=dict(),
+                label="Miscellaneous",
+                rows=rows_without_category,
+            )
+
+    def _add_child_expenses_from_matches(
+        self,
+        category_matches: pd.DataFrame,
+        sub_category_matches: Dict[int, pd.DataFrame],
+    ) -> None:
+        """Add the child expenses by grouping on already evaluated category matches."""
+        categories = self._categories
+
+        match_counts = category_matches.sum(axis=1).to_numpy()
+        if (match_counts > 1).any():
+            # Find the categories which overlap in the same order as they are
+            # checked when the categories are evaluated one after the other
+            is_overlapping = match_counts > 1
+            for position, category in enumerate(categories):
+                rows = self._actual_rows[
+                    is_overlapping & category_matches[position].to_numpy()
+                ]
+                if len(rows):
+                    self._expense_data_indices_not_already_found(rows=rows)
+                    self._category_indices_map[category.name] = rows
+
+        # The position of the matching category for every row, -1 if there is none
+        category_positions = np.full(len(self._actual_rows), -1)
+        if categories:
+            category_positions = np.where(
+                match_counts > 0,
+                category_matches.to_numpy().argmax(axis=1),
+                category_positions,
+            )
+        rows_per_category = (
+            pd.Series(category_positions)
+            .groupby(category_positions, sort=False)
+            .indices
+        )
+
+        for position, category in enumerate(categories):
+            if position not in rows_per_category:
+                continue
+            self.child_expenses[category.name] = category_expense.CategoryExpense(
+                expense=self._source,
+                config=self.config[position],
+                label=category.name,
+                rows=self._actual_rows[rows_per_category[position]],
+                condition=category,
+            )
+            self.child_expenses[category.name].add_child_expenses(
+                sub_category_matches=sub_category_matches.get(position)
             )
-        ]
 
-        if not remaining_expense_without_category.empty:
+        if -1 in rows_per_category:
             self.child_expenses["Miscellaneous"] = category_expense.CategoryExpense(
-                expense=remaining_expense_without_category,
+                expense=self._source,
                 config=dict(),
                 label="Miscellaneous",
+                rows=self._actual_rows[rows_per_category[-1]],
             )
 
-    def _expense_data_indices_not_already_found(self, indices: Set[int]) -> None:
-        """Check if the indices are already in the set of indices for some other category."""
+    def _expense_data_indices_not_already_found(self, rows: np.ndarray) -> None:
+        """Check if the rows are already in the rows found for some other category."""
         for category in self._category_indices_map:
-            indices_for_category = self._category_indices_map[category]
-            common_indices = indices.intersection(indices_for_category)
-            if common_indices:
+            rows_for_category = self._category_indices_map[category]
+            common_rows = np.intersect1d(rows, rows_for_category)
+            if len(common_rows):
+                common_indices = set(self._source.index[common_rows].tolist())
                 raise exceptions.ExpenseDataAlreadyInOtherExpenseError(
                     f"There are {common_indices} common indices with "
                     f"category {category}... for the month {self.label}."
@@ -1,17 +1,31 @@
 """Contains the code for displaying the expenses of a single month."""
 import collections
-import itertools
-from typing import Any, Dict
-import warnings
+import logging
+import pathlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 import omegaconf
 import pandas as pd
 
+from expense_viewer import rules
+import expense_viewer.categorize as categorize
+import expense_viewer.data_loader as loader
+import expense_viewer.database as database_lib
 import expense_viewer.expense.expense as expense
+import expense_viewer.fingerprint as fingerprint
 import expense_viewer.expense.monthly_expense as monthly_expense
+import expense_viewer.normalize as normalize
+import expense_viewer.search as search
+import expense_viewer.profiler as profiler_lib
+import expense_viewer.stats as stats_lib
+import expense_viewer.store as store
 import expense_viewer.utils as utils
 
+logger = logging.getLogger(__name__)
+
 _CREDIT_COLUMN_NAME = "Credit"
+_SOURCE_POSITION_COLUMN = "_source_position"
 
 
 class OverallExpense(expense.Expense):
@@ -20,136 +34,747 @@ class OverallExpense(expense.Expense):
     def __init__(
         self,
         expense: pd.DataFrame,
-        config: omegaconf.dictconfig.DictConfig,
+        config: Union[omegaconf.dictconfig.DictConfig, rules.RuleConfig],
         label: str = "Overall",
+        single_pass: bool = False,
+        stats: Optional[stats_lib.PipelineStats] = None,
+        minor_units: bool = False,
+        profiler: Optional[profiler_lib.RuleProfiler] = None,
+        fingerprints: Optional[fingerprint.FingerprintIndex] = None,
     ) -> None:
+        # The amounts in minor units are compared with the amounts of the rules in
+        # minor units too
+        if minor_units:
+            config = rules.scale_values(
+                config, normalize.AMOUNT_COLUMNS, normalize.MINOR_UNITS
+            )
         super().__init__(expense=expense, config=config, label=label)
+        # When the amounts of the expense data are in minor units, e.g. cents, all
+        # the sums are exact and the report converts them back into units of money
+        self.minor_units = minor_units
+        # Where the time spent on every stage of building the child expenses is
+        # recorded, nothing is recorded when there are no stats
+        self.stats = stats
+        # Where the time and the matches of every categorization rule are recorded
+        self.profiler = profiler
         self.salary_savings_credit_data_per_month: Dict[
-            str, Dict[str, int]
+            str, Dict[str, float]
         ] = collections.defaultdict(dict)
         self.ignored_expenses: Dict[str, pd.DataFrame] = dict()
+        # The positions of the ignored rows of every month
+        self._ignored_rows: Dict[str, np.ndarray] = dict()
+        # In single pass mode every category is evaluated once over the whole
+        # expense data instead of once for every month
+        self.single_pass = single_pass
+        # The category and sub category of every row in single pass mode, the rows
+        # which are in no month have none
+        self.category_labels: Optional[pd.DataFrame] = None
+        # The salary rows which the months were divided by and the label of every
+        # month, used for only building the changed months again
+        self._salary_row_indexes: Optional[List[int]] = None
+        self._month_labels: Dict[int, str] = dict()
+        # The fingerprints of the transactions of the expense data, so that only
+        # the new transactions are hashed for finding the duplicates among them.
+        # The index filled by the loader for the expense data is taken over as it is
+        self._fingerprints = fingerprints
+        self._fingerprinted_expense: Optional[pd.DataFrame] = (
+            expense if fingerprints is not None else None
+        )
+        # The inverted index of the words of the text columns and the month and
+        # category of every row, built for the first search
+        self._search_index: Optional[search.TokenIndex] = None
+        self._search_columns: Iterable[str] = search.SEARCH_COLUMNS
+        self._row_labels: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_store(
+        cls,
+        store_path: Union[str, pathlib.Path],
+        config: Union[omegaconf.dictconfig.DictConfig, rules.RuleConfig],
+        **kwargs: Any,
+    ) -> "OverallExpense":
+        """
+        Create the overall expense of the transactions in a store.
+
+        The transactions are mapped from the store without reading or copying
+        them, see store.open_store. The amounts are in minor units when the
+        transactions were stored in minor units, minor_units has to be passed on
+        for them.
+
+        Parameters
+        ----------
+        store_path : str or pathlib.Path
+            The file of the store written by store.write_store.
+        config : omegaconf.dictconfig.DictConfig or rules.RuleConfig
+            The config having the salary and the expense categories.
+        kwargs : Any
+            Passed on to OverallExpense, e.g. single_pass or minor_units.
+        """
+        return cls(expense=store.open_store(store_path), config=config, **kwargs)
+
+    @classmethod
+    def from_database(
+        cls,
+        database_path: Union[str, pathlib.Path],
+        config: Union[omegaconf.dictconfig.DictConfig, rules.RuleConfig],
+        **kwargs: Any,
+    ) -> "OverallExpense":
+        """
+        Create the overall expense of the transactions in a transaction database.
+
+        The rules are evaluated by the database, the months are divided and the
+        spending matrix is summed by its queries, and the expenses only read the
+        transactions they need from it, see database.TransactionDatabase. The month,
+        category and sub category of every transaction are written into the
+        database when the child expenses are added. New transactions can not be
+        added to the expense, they are written into the database instead.
+
+        Parameters
+        ----------
+        database_path : str or pathlib.Path
+            The file of the database having the transactions.
+        config : omegaconf.dictconfig.DictConfig or rules.RuleConfig
+            The config having the salary and the expense categories.
+        kwargs : Any
+            Passed on to OverallExpense, e.g. minor_units.
+        """
+        return cls(
+            expense=database_lib.TransactionDatabase(database_path),
+            config=config,
+            **kwargs,
+        )
+
+    @property
+    def _in_database(self) -> bool:
+        """Whether the transactions are read from a transaction database."""
+        return isinstance(self.expense, database_lib.TransactionDatabase)
+
+    @property
+    def config(self) -> omegaconf.dictconfig.DictConfig:
+        """The config which the child expenses are built with."""
+        return self._config
+
+    @config.setter
+    def config(
+        self, config: Union[omegaconf.dictconfig.DictConfig, rules.RuleConfig]
+    ) -> None:
+        # The rules are validated and converted once, building the child expenses
+        # only uses the converted rules. The rules loaded by config_cache.load_config
+        # are already converted, the config keeps them as plain dicts and lists.
+        if isinstance(config, rules.RuleConfig):
+            self._rule_config = config
+            config = rules.rule_config_to_container(config)
+        else:
+            self._rule_config = rules.parse_config(config)
+        self._config = config
+        # The report is made again from the child expenses built with the config
+        self._month_reports: Dict[str, Dict[str, Any]] = dict()
+        self._expenses_report: Optional[pd.DataFrame] = None
 
     def get_expenses_report(self) -> pd.DataFrame:
-        """Get a summary of expenses/credits for each month."""
-        summary: Dict[str, Any] = collections.defaultdict(list)
+        """
+        Get a summary of expenses/credits for each month.
 
-        for month in self.child_expenses.keys():
-            summary["Month"].append(month)
-            summary["Salary"].append(
-                self.salary_savings_credit_data_per_month[month]["Salary"]
-            )
-            summary["Extra Credits"].append(
-                self.salary_savings_credit_data_per_month[month]["Extra Credit"]
-            )
-            summary["Expenses"].append(
-                self.child_expenses[month].get_total_expense_sum()
-            )
-            if "Vaulted Savings" in self.salary_savings_credit_data_per_month[month]:
-                summary["Vaulted Savings"].append(
-                    self.salary_savings_credit_data_per_month[month]["Vaulted Savings"]
-                )
-                summary["Savings"].append(
-                    self.salary_savings_credit_data_per_month[month]["Salary"]
-                    + self.salary_savings_credit_data_per_month[month]["Extra Credit"]
-                    - self.child_expenses[month].get_total_expense_sum()
-                )
+        The row of every month is made once when the month is added and the report
+        is kept until the months change, so getting the report again is cheap.
+        The amounts of the report are in units of money, also when the amounts of
+        the expense data are in minor units.
+        """
+        month_year_labels = list(self.child_expenses.keys())
+        if self._expenses_report is None or (
+            list(self._expenses_report["Month"]) != month_year_labels
+        ):
+            summary: Dict[str, Any] = collections.defaultdict(list)
+            for month in month_year_labels:
+                for column, value in self._get_month_report(month).items():
+                    summary[column].append(value)
+
+            report = pd.DataFrame.from_dict(summary)
+            if self.minor_units:
+                amount_columns = report.columns.drop("Month")
+                report[amount_columns] = report[amount_columns] / normalize.MINOR_UNITS
+            if not month_year_labels:
+                # There is no month column to compare the months with
+                return report
+            self._expenses_report = report
+        return self._expenses_report.copy()
+
+    def get_spending_matrix(
+        self,
+        sub_categories: bool = False,
+        year: Optional[Union[int, str]] = None,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        Get the total, number and average of the debits of every category per month.
+
+        All the values are aggregated together by a single groupby over the month
+        and category of every transaction, so that a category can be followed over
+        the months by slicing the matrix, e.g. matrix["Total"]["Shopping"], and a
+        month can be broken down with matrix.loc["January-2023", "Total"].
+
+        Parameters
+        ----------
+        sub_categories : bool
+            Break down the categories into their sub categories. The transactions
+            of a category which are in no sub category are left out then, like in
+            the child expenses of the category.
+        year : int or str, optional
+            Only the months of the year, e.g. 2023.
+        start : str or pd.Timestamp, optional
+            Only the transactions with this value date or a later one.
+        end : str or pd.Timestamp, optional
+            Only the transactions with this value date or an earlier one.
+
+        Returns
+        -------
+        pd.DataFrame
+            A row for every month in order and the columns "Total", "Count" and
+            "Average" for every category, or for every category and sub category.
+            The amounts are in units of money, also when the amounts of the expense
+            data are in minor units.
+        """
+        group_columns = ["Month", categorize.CATEGORY_COLUMN]
+        months = list(self.child_expenses)
+        if year is not None:
+            months = [month for month in months if month.endswith(f"-{year}")]
+
+        if self._in_database and not sub_categories:
+            # The debits are summed by the database over the labels of the rows
+            totals = self.expense.get_category_totals(start=start, end=end)
+            totals = totals[totals["Month"].isin(months)]
+            if totals.empty:
+                return self._get_empty_spending_matrix(group_columns)
+            totals = totals.astype({"Total": float, "Count": int, "Average": float})
+            if self.minor_units:
+                totals[["Total", "Average"]] /= normalize.MINOR_UNITS
+            matrix = totals.set_index(group_columns).unstack(group_columns[1:])
+        else:
+            if sub_categories:
+                group_columns.append(categorize.SUB_CATEGORY_COLUMN)
+                rows, row_labels = self._get_sub_category_rows()
             else:
-                summary["Savings"].append(
-                    self.salary_savings_credit_data_per_month[month]["Salary"]
-                    + self.salary_savings_credit_data_per_month[month]["Extra Credit"]
-                    - self.child_expenses[month].get_total_expense_sum()
+                row_labels = self._get_row_labels()[group_columns]
+                in_category = row_labels[categorize.CATEGORY_COLUMN].notna().to_numpy()
+                rows = np.flatnonzero(in_category)
+                row_labels = row_labels[in_category]
+            expense_data = self.expense
+            if self._in_database:
+                # Only the debits and the value dates of the rows in a sub category
+                # are read from the database
+                unique_rows, rows = np.unique(rows, return_inverse=True)
+                expense_data = self.expense.select_rows(
+                    unique_rows, columns=["Value date", "Debit"]
                 )
 
-        return pd.DataFrame.from_dict(summary)
+            keep = row_labels["Month"].isin(months).to_numpy()
+            if start is not None or end is not None:
+                value_dates = pd.to_datetime(expense_data["Value date"].iloc[rows])
+                if start is not None:
+                    keep &= (value_dates >= pd.Timestamp(start)).to_numpy()
+                if end is not None:
+                    keep &= (value_dates <= pd.Timestamp(end)).to_numpy()
+
+            if not keep.any():
+                return self._get_empty_spending_matrix(group_columns)
+
+            debits = pd.Series(
+                expense_data["Debit"].to_numpy()[rows[keep]], name="Debit"
+            ).astype(float)
+            if self.minor_units:
+                debits = debits / normalize.MINOR_UNITS
+            matrix = (
+                debits.groupby(
+                    [row_labels[column].to_numpy()[keep] for column in group_columns]
+                )
+                .agg(["sum", "size", "mean"])
+                .rename(columns={"sum": "Total", "size": "Count", "mean": "Average"})
+                .rename_axis(group_columns)
+                .unstack(group_columns[1:])
+            )
+        months = [month for month in months if month in matrix.index]
+        matrix = matrix.reindex(months)
+        # A category without transactions in a month spent nothing in it but has
+        # no average
+        return pd.concat(
+            {
+                "Total": matrix["Total"].fillna(0),
+                "Count": matrix["Count"].fillna(0).astype(int),
+                "Average": matrix["Average"],
+            },
+            axis="columns",
+        )
+
+    @staticmethod
+    def _get_empty_spending_matrix(group_columns: List[str]) -> pd.DataFrame:
+        """Get the spending matrix of no transactions."""
+        return pd.DataFrame(
+            index=pd.Index([], name="Month"),
+            columns=pd.MultiIndex.from_tuples([], names=[None] + group_columns[1:]),
+        )
 
     def add_child_expenses(self):
         """Adds the child expenses for its expense category."""
-        expense_categories = self.config["expense_categories"]
-
         # Read index numbers of salary credited columns
+        with stats_lib.measure(
+            self.stats, "salaries", rows=len(self.expense), logger=logger
+        ):
+            if self._in_database:
+                salary_row_indexes = np.flatnonzero(
+                    self._match_rows(self._rule_config.salary)
+                ).tolist()
+            else:
+                salary_row_indexes = utils.get_row_index_for_matching_columns(
+                    self._rule_config.salary, self.expense
+                )
+        self._add_months(salary_row_indexes, first_month=0)
+
+    def add_expenses(self, new_expense: pd.DataFrame) -> List[str]:
+        """
+        Merge new transactions into the expense data and update the child expenses.
+
+        The new transactions are merged the same way as the statements are when
+        they are loaded, sorted by their value date with the already present
+        transactions coming first for the same date and duplicates being dropped.
+        Only the months from the first salary boundary which is affected by the
+        merge are built again, the months before it are left as they are.
+
+        Parameters
+        ----------
+        new_expense : pd.DataFrame
+            The new transactions having the same columns as the expense data and
+            their amounts in the same units.
+
+        Returns
+        -------
+        List[str]
+            The labels of the child expenses which were built again.
+
+        Raises
+        ------
+        NotImplementedError
+            When the transactions are read from a transaction database.
+        """
+        if self._in_database:
+            raise NotImplementedError(
+                "The transactions of a transaction database can not be merged, "
+                "write them into the database and add the child expenses again."
+            )
+        with stats_lib.measure(
+            self.stats, "merge", rows=len(new_expense), logger=logger
+        ):
+            if self._fingerprints is None or (
+                self._fingerprinted_expense is not self.expense
+            ):
+                self._fingerprints = fingerprint.FingerprintIndex.from_transactions(
+                    self.expense
+                )
+            new_expense, _ = self._fingerprints.drop_duplicates(new_expense)
+            self._fingerprinted_expense = self.expense
+            if not len(new_expense):
+                return []
+
+            merged_expense = normalize.concat_transactions(
+                [self.expense, new_expense], ignore_index=True
+            )
+            merged_expense[_SOURCE_POSITION_COLUMN] = np.concatenate(
+                [np.arange(len(self.expense)), np.full(len(new_expense), -1)]
+            )
+            merged_expense.sort_values(
+                by=["Value date"], kind="mergesort", inplace=True
+            )
+            merged_expense.reset_index(drop=True, inplace=True)
+            source_positions = merged_expense.pop(_SOURCE_POSITION_COLUMN).to_numpy()
+
+        # The rows before the first changed row are the same as before
+        changed_positions = np.flatnonzero(
+            source_positions != np.arange(len(source_positions))
+        )
+        if not len(changed_positions):
+            return []
+        first_changed_position = int(changed_positions[0])
+        # The rows of the months which are kept are at the same positions in the
+        # merged expense data
+        for child_expense in self.child_expenses.values():
+            child_expense._replace_source(merged_expense)
+        self.expense = merged_expense
+        self._fingerprinted_expense = merged_expense
+        self._search_index = None
+        self._row_labels = None
+
+        if self._salary_row_indexes is None:
+            # The child expenses have not been added yet
+            return []
+
         salary_row_indexes = utils.get_row_index_for_matching_columns(
-            self.config["salary"], self.expense
+            self._rule_config.salary, self.expense
+        )
+        # A month is only left alone when the salary row starting the next month is
+        # before the first changed row
+        first_month = int(
+            np.searchsorted(
+                np.asarray(salary_row_indexes[1:], dtype=int), first_changed_position
+            )
         )
+        for month in range(first_month, len(self._salary_row_indexes)):
+            month_year_label = self._month_labels.pop(month, None)
+            if month_year_label is None:
+                continue
+            del self.child_expenses[month_year_label]
+            self.salary_savings_credit_data_per_month.pop(month_year_label, None)
+            self._month_reports.pop(month_year_label, None)
+            self.ignored_expenses.pop(month_year_label, None)
+            self._ignored_rows.pop(month_year_label, None)
+
+        self._add_months(salary_row_indexes, first_month=first_month)
+        return [
+            month_year_label
+            for month, month_year_label in self._month_labels.items()
+            if month >= first_month
+        ]
+
+    def add_statements(
+        self,
+        expense_statements: Iterable[pathlib.Path],
+        callable: Callable,
+        **loader_kwargs: Any,
+    ) -> List[str]:
+        """
+        Load new expense statements and update the child expenses with them.
+
+        Parameters
+        ----------
+        expense_statements : Iterable[pathlib.Path]
+            The full paths of the new statements.
+        callable : Callable
+            The callable to use for loading the expense statements.
+        loader_kwargs : Any
+            Passed on to load_data_from_all_expense_stmts, e.g. the cache. The
+            amounts are loaded in minor units when the expense data has them.
+
+        Returns
+        -------
+        List[str]
+            The labels of the child expenses which were built again.
+        """
+        loader_kwargs.setdefault("minor_units", self.minor_units)
+        new_expense = loader.load_data_from_all_expense_stmts(
+            expense_statements=expense_statements, callable=callable, **loader_kwargs
+        )
+        return self.add_expenses(new_expense)
+
+    def build_search_index(
+        self, columns: Iterable[str] = search.SEARCH_COLUMNS
+    ) -> search.TokenIndex:
+        """
+        Build the inverted index of the words of the text columns used by search.
+
+        The index is built for the first search when it is not built before, and
+        built again for the next search after new transactions are added.
+
+        Parameters
+        ----------
+        columns : Iterable[str]
+            The text columns to index.
+        """
+        self._search_columns = tuple(columns)
+        self._search_index = search.TokenIndex(self.expense, columns=columns)
+        return self._search_index
+
+    def search(
+        self,
+        any_of: Iterable[str],
+        columns: Optional[Iterable[str]] = None,
+        months: Optional[Union[str, Iterable[str]]] = None,
+    ) -> pd.DataFrame:
+        """
+        Find the transactions of all the months containing any of the keywords.
+
+        A keyword is found when all its words are next to each other in one of
+        the columns, the case and the punctuation do not matter, see
+        search.TokenIndex. The transactions of a transaction database are found
+        by its full text index.
+
+        Parameters
+        ----------
+        any_of : Iterable[str]
+            The keywords, e.g. ["ADAC", "Volkswagen", "AXA"].
+        columns : Iterable[str], optional
+            The columns to search in, all the indexed columns by default.
+        months : str or Iterable[str], optional
+            The labels of the months to search in, e.g. ["January-2023"], or a
+            year like "2023" for all its months. All the transactions by default.
+
+        Returns
+        -------
+        pd.DataFrame
+            The transactions found sorted by their value date, with the "Month",
+            "Category" and "Sub Category" they are in. The transactions which are
+            not in any month, like the salaries, have no month.
+        """
+        if self._in_database:
+            rows = self.expense.search(any_of, columns=columns)
+        else:
+            if self._search_index is None:
+                self.build_search_index(self._search_columns)
+            rows = self._search_index.find(any_of, columns=columns)  # type: ignore
+        row_labels = self._get_row_labels().iloc[rows]
+
+        if months is not None:
+            if isinstance(months, str):
+                months = [
+                    month_year_label
+                    for month_year_label in self.child_expenses
+                    if month_year_label == months
+                    or month_year_label.endswith(f"-{months}")
+                ]
+            in_months = row_labels["Month"].isin(list(months)).to_numpy()
+            rows = rows[in_months]
+            row_labels = row_labels[in_months]
+
+        found_expenses = self._select_rows(rows).copy()
+        for column in row_labels.columns:
+            found_expenses[column] = row_labels[column].to_numpy()
+        return found_expenses
+
+    def _get_month_report(self, month_year_label: str) -> Dict[str, Any]:
+        """Get the row of the report of a month, made once for every month."""
+        if month_year_label not in self._month_reports:
+            credit_data = self.salary_savings_credit_data_per_month[month_year_label]
+            total_expense_sum = self.child_expenses[
+                month_year_label
+            ].get_total_expense_sum()
+            month_report = {
+                "Month": month_year_label,
+                "Salary": credit_data["Salary"],
+                "Extra Credits": credit_data["Extra Credit"],
+                "Expenses": total_expense_sum,
+            }
+            if "Vaulted Savings" in credit_data:
+                month_report["Vaulted Savings"] = credit_data["Vaulted Savings"]
+            month_report["Savings"] = (
+                credit_data["Salary"] + credit_data["Extra Credit"] - total_expense_sum
+            )
+            self._month_reports[month_year_label] = month_report
+        return self._month_reports[month_year_label]
+
+    def _get_row_labels(self) -> pd.DataFrame:
+        """Get the month, category and sub category of every row of the expenses."""
+        if self._row_labels is not None:
+            return self._row_labels
+
+        month_labels = np.full(len(self.expense), None, dtype=object)
+        category_labels = np.full(len(self.expense), None, dtype=object)
+        sub_category_labels = np.full(len(self.expense), None, dtype=object)
+        for month_year_label, month_expense in self.child_expenses.items():
+            month_labels[month_expense.rows] = month_year_label
+            for category_name, category in month_expense.child_expenses.items():
+                category_labels[category.rows] = category_name
+                # The first label of a row in several sub categories wins, like the
+                # first matching category does
+                for label, sub_category in reversed(category.child_expenses.items()):
+                    sub_category_labels[sub_category.rows] = label
+        # The ignored rows are not in the month expenses but they are in the month
+        for month_year_label, ignored_rows in self._ignored_rows.items():
+            month_labels[ignored_rows] = month_year_label
+
+        self._row_labels = pd.DataFrame(
+            {
+                "Month": month_labels,
+                categorize.CATEGORY_COLUMN: category_labels,
+                categorize.SUB_CATEGORY_COLUMN: sub_category_labels,
+            }
+        )
+        return self._row_labels
+
+    def _get_sub_category_rows(self) -> Tuple[np.ndarray, pd.DataFrame]:
+        """
+        Get the rows of all the sub categories with their month and category.
+
+        A row which is in several sub categories of its category is there once for
+        every sub category.
+        """
+        sub_category_rows = []
+        labels: Dict[str, List[str]] = collections.defaultdict(list)
+        for month_year_label, month_expense in self.child_expenses.items():
+            for category_name, category in month_expense.child_expenses.items():
+                for label, sub_category in category.child_expenses.items():
+                    sub_category_rows.append(sub_category.rows)
+                    number_of_rows = len(sub_category.rows)
+                    labels["Month"].extend([month_year_label] * number_of_rows)
+                    labels[categorize.CATEGORY_COLUMN].extend(
+                        [category_name] * number_of_rows
+                    )
+                    labels[categorize.SUB_CATEGORY_COLUMN].extend(
+                        [label] * number_of_rows
+                    )
+        rows = (
+            np.concatenate(sub_category_rows)
+            if sub_category_rows
+            else np.empty(0, dtype=np.int64)
+        )
+        return rows, pd.DataFrame(
+            labels,
+            columns=[
+                "Month",
+                categorize.CATEGORY_COLUMN,
+                categorize.SUB_CATEGORY_COLUMN,
+            ],
+        )
+
+    def _add_months(self, salary_row_indexes: List[int], first_month: int) -> None:
+        """Add the child expenses of the months starting with the given month."""
+        expense_categories = self._rule_config.expense_categories
+        self._expenses_report = None
+        self._row_labels = None
+
+        # Only the transactions of the months which are added are categorized
+        first_row = salary_row_indexes[first_month] if first_month else 0
+        category_matches: Optional[pd.DataFrame] = None
+        sub_category_matches: Dict[int, pd.DataFrame] = dict()
+        # The database evaluates all the categories of a month in a single query
+        if self.single_pass and not self._in_database:
+            expense_to_categorize = self.expense.iloc[first_row:]
+            with stats_lib.measure(
+                self.stats,
+                "categorize",
+                rows=len(expense_to_categorize),
+                logger=logger,
+            ):
+                category_matches = categorize.get_category_matches(
+                    expense_to_categorize, expense_categories, profiler=self.profiler
+                )
+                sub_category_matches = {
+                    position: categorize.get_sub_category_matches(
+                        expense_to_categorize, category, profiler=self.profiler
+                    )
+                    for position, category in enumerate(expense_categories)
+                }
+
+        self._salary_row_indexes = salary_row_indexes
+        # The ignored and savings rules only look at a single row at a time, so they
+        # are evaluated once over the data of all the months
+        ignored_rows = np.zeros(len(self.expense), dtype=bool)
+        if self._rule_config.ignored is not None:
+            ignored_rows = self._match_rows(self._rule_config.ignored, first_row)
+        savings_rows = np.zeros(len(self.expense), dtype=bool)
+        if self._rule_config.savings is not None:
+            savings_rows = self._match_rows(self._rule_config.savings, first_row)
 
         # Divide the expense data into months as per the indexes and assign labels
         # The data before the first salary row is not taken into account
         # Also add the monthly expense objects into the list of child expenses
-        for index, data in enumerate(
-            itertools.islice(
-                utils.break_up_dataframe_in_chunks(self.expense, salary_row_indexes),
-                1,
-                None,
-            )
+        with stats_lib.measure(
+            self.stats, "months", rows=len(self.expense) - first_row, logger=logger
         ):
-            if data.empty:
-                continue
-            month_year_label = utils.get_expense_month_year(data)
-            # Add the logic for excluding rows which have to be ignored.
-            if "ignored" in self.config:
-                ignored = self.config["ignored"]
-                ignored_data_row_indexes = utils.get_row_index_for_matching_columns(
-                    ignored, data
+            if self._in_database:
+                # The months are divided and summarized by the database
+                month_segments = self.expense.get_month_segments(
+                    salary_row_indexes, ignored=ignored_rows
                 )
-                ignored_expenses = data.index.isin(ignored_data_row_indexes)
-                monthly_data_without_ignored_rows = data[~ignored_expenses]
-                self.ignored_expenses[month_year_label] = data[ignored_expenses]
             else:
-                monthly_data_without_ignored_rows = data
-
-            # Check if there are any credits which happened in this month apart from salary
-            # if yes then we save them for later summary report
-            credit_data_for_month = monthly_data_without_ignored_rows[
-                monthly_data_without_ignored_rows[_CREDIT_COLUMN_NAME] > 0
-            ]
-            salary_data_for_month = int(
-                self.expense.iloc[[salary_row_indexes[index]]]["Credit"]
-            )
-
-            if month_year_label in self.child_expenses.keys():
-                # Check if the month is already added then select the next month
-                warnings.warn(
-                    f"{month_year_label} has already been added to the child expenses..."
-                    "adding next month's label to the data"
+                month_segments = utils.get_month_segments(
+                    self.expense, salary_row_indexes, ignored=ignored_rows
                 )
-                month_year_label = utils.get_next_month_label(month_year_label)
-                warnings.warn(
-                    f"The next month {month_year_label} has been chosen for the data"
+            month_segments = month_segments[month_segments.index >= first_month]
+            month_segments["Label"] = utils.resolve_month_label_collisions(
+                month_segments["Label"], existing_labels=self.child_expenses.keys()
+            )
+        for month, start, stop, month_year_label, salary, extra_credit in zip(
+            month_segments.index,
+            month_segments["Start"],
+            month_segments["Stop"],
+            month_segments["Label"],
+            month_segments["Salary"],
+            month_segments["Extra Credit"],
+        ):
+            month_rows = np.arange(start, stop)
+            # Add the logic for excluding rows which have to be ignored.
+            if self._rule_config.ignored is not None:
+                ignored_expenses = ignored_rows[start:stop]
+                self._ignored_rows[month_year_label] = month_rows[ignored_expenses]
+                self.ignored_expenses[month_year_label] = self._select_rows(
+                    self._ignored_rows[month_year_label]
                 )
+                month_rows = month_rows[~ignored_expenses]
 
             # Save the salary, extra credit and savings(if any) data for month
+            # The extra credits are the credits which happened in this month apart
+            # from salary
             self.salary_savings_credit_data_per_month[month_year_label][
                 "Extra Credit"
-            ] = sum(credit_data_for_month[_CREDIT_COLUMN_NAME])
+            ] = extra_credit
+            # The salary keeps its cents and the type of the other amounts
             self.salary_savings_credit_data_per_month[month_year_label][
                 "Salary"
-            ] = salary_data_for_month
+            ] = salary
             # Let's say the amount of money that you save in a month is transferred to a vault
             # or some other account and you want to consider that transfer as savings
             # and do not want to consider that as an expense
-            if "savings" in self.config:
-                savings_data_row_indices = utils.get_row_index_for_matching_columns(
-                    condition=self.config["savings"],
-                    data=monthly_data_without_ignored_rows,
+            if self._rule_config.savings is not None:
+                monthly_savings_rows = month_rows[savings_rows[month_rows]]
+                savings_data_row_indices = list(
+                    self.expense.index[monthly_savings_rows].values
+                )
+                expense_considered_as_savings = self._get_debit_sum(
+                    monthly_savings_rows
                 )
-                expense_considered_as_savings = monthly_data_without_ignored_rows[
-                    monthly_data_without_ignored_rows.index.isin(
-                        savings_data_row_indices
-                    )
-                ]["Debit"].sum()
                 self.salary_savings_credit_data_per_month[month_year_label][
                     "Vaulted Savings"
                 ] = expense_considered_as_savings
                 self.child_expenses[month_year_label] = monthly_expense.MonthlyExpense(
-                    expense=monthly_data_without_ignored_rows,
-                    config=expense_categories,
+                    expense=self.expense,
+                    config=self.config["expense_categories"],
+                    categories=expense_categories,
                     label=month_year_label,
                     row_indices_to_ignore=savings_data_row_indices,
+                    rows=month_rows,
+                    stats=self.stats,
+                    profiler=self.profiler,
                 )
             else:
                 self.child_expenses[month_year_label] = monthly_expense.MonthlyExpense(
-                    expense=monthly_data_without_ignored_rows,
-                    config=expense_categories,
+                    expense=self.expense,
+                    config=self.config["expense_categories"],
+                    categories=expense_categories,
                     label=month_year_label,
+                    rows=month_rows,
+                    stats=self.stats,
+                    profiler=self.profiler,
                 )
+            self._month_labels[month] = month_year_label
             # Delegate to the child object to add its own expenses
-            self.child_expenses[month_year_label].add_child_expenses()
+            with stats_lib.measure(
+                self.stats,
+                "month",
+                name=month_year_label,
+                rows=len(month_rows),
+                logger=logger,
+            ):
+                self.child_expenses[month_year_label].add_child_expenses(
+                    category_matches=category_matches,
+                    sub_category_matches=sub_category_matches,
+                )
+            self._get_month_report(month_year_label)
+
+        if self.single_pass:
+            # The labels are the ones of the built months, the rows which are in no
+            # month, like the salaries and the ignored rows, have no category
+            self.category_labels = self._get_row_labels()[
+                [categorize.CATEGORY_COLUMN, categorize.SUB_CATEGORY_COLUMN]
+            ].set_index(self.expense.index)
+        if self._in_database:
+            # The labels can be queried together with the transactions
+            self.expense.write_labels(self._get_row_labels())
+
+    def _match_rows(self, condition: rules.Condition, first_row: int = 0) -> np.ndarray:
+        """Get a boolean array which is True for the rows from the first row matching."""
+        matched = np.zeros(len(self.expense), dtype=bool)
+        if self._in_database:
+            matched[first_row:] = self.expense.match_rows(condition)[first_row:]
+        else:
+            matched[first_row:] = rules.compile_condition(condition)(
+                self.expense.iloc[first_row:]
+            ).to_numpy(dtype=bool)
+        return matched
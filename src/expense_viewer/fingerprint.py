@@ -0,0 +1,169 @@
+"""Find the transactions loaded more than once by a fingerprint of every row."""
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import expense_viewer.normalize as normalize
+
+# The columns of the normalized transactions, together they tell the transactions
+# apart. The columns which a statement does not have count as missing values.
+FINGERPRINT_COLUMNS = (
+    "Value date",
+    "Debit",
+    "Credit",
+    "Beneficiary / Originator",
+    "IBAN",
+    "Payment Details",
+    "Transaction Type",
+    "Source",
+)
+
+# The hash which pandas gives to missing strings, used for all the missing values so
+# that a missing value has the same hash whatever the dtype of its column is
+_MISSING_HASH = np.uint64(np.iinfo(np.uint64).max)
+_MULTIPLIER = np.uint64(1_000_003)
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_transactions(
+    transactions: pd.DataFrame, columns: Optional[Iterable[str]] = None
+) -> np.ndarray:
+    """
+    Get a 64 bit fingerprint for every transaction.
+
+    The fingerprint only depends on the values of the transactions and not on the
+    position or the dtype of their columns, e.g. a categorical column gives the
+    same fingerprints as the same strings in an object column. The transactions
+    having the same fingerprint are the same transactions.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        The normalized transactions.
+    columns : Iterable[str], optional
+        The columns which the fingerprint is made of, by default the
+        FINGERPRINT_COLUMNS followed by all the other columns of the transactions
+        in the order of their names.
+
+    Returns
+    -------
+    np.ndarray
+        The uint64 fingerprints in the order of the transactions.
+    """
+    if columns is None:
+        columns = FINGERPRINT_COLUMNS + tuple(
+            sorted(
+                str(column)
+                for column in transactions.columns
+                if column not in FINGERPRINT_COLUMNS
+            )
+        )
+    fingerprints = np.zeros(len(transactions), dtype=np.uint64)
+    # The fingerprint wraps around like the hashes of pandas
+    with np.errstate(over="ignore"):
+        for column in columns:
+            if column in transactions.columns:
+                values = transactions[column]
+                # The values of the free text columns are mostly different, they are
+                # hashed right away instead of hashing every distinct value once
+                categorize = column not in normalize.STRING_COLUMNS
+                hashes = pd.util.hash_pandas_object(
+                    values, index=False, categorize=categorize
+                ).to_numpy()
+                if not categorize or not (
+                    values.dtype == object
+                    or isinstance(values.dtype, pd.CategoricalDtype)
+                ):
+                    hashes[values.isna().to_numpy()] = _MISSING_HASH
+            else:
+                hashes = np.full(len(transactions), _MISSING_HASH)
+            fingerprints = fingerprints * _MULTIPLIER ^ hashes
+    return fingerprints
+
+
+class FingerprintIndex:
+    """
+    The fingerprints of the transactions which have been loaded.
+
+    New transactions are checked against the index by looking up their
+    fingerprints, the transactions already in the index are never hashed again.
+    The fingerprints are kept in a sorted array which takes 8 bytes for every
+    transaction.
+    """
+
+    def __init__(self, fingerprints: Optional[np.ndarray] = None) -> None:
+        self._fingerprints = (
+            np.unique(np.asarray(fingerprints, dtype=np.uint64))
+            if fingerprints is not None
+            else np.empty(0, dtype=np.uint64)
+        )
+        # The number of duplicates which were dropped from every statement
+        self.dropped_duplicates: Dict[str, int] = dict()
+
+    @classmethod
+    def from_transactions(cls, transactions: pd.DataFrame) -> "FingerprintIndex":
+        """Create the index of already loaded transactions."""
+        return cls(fingerprint_transactions(transactions))
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def contains(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Get a boolean array which is True for the fingerprints in the index."""
+        positions = np.searchsorted(self._fingerprints, fingerprints)
+        found = positions < len(self._fingerprints)
+        found[found] = self._fingerprints[positions[found]] == fingerprints[found]
+        return found
+
+    def add(self, fingerprints: np.ndarray) -> None:
+        """Add fingerprints which are not in the index yet."""
+        new_fingerprints = np.unique(np.asarray(fingerprints, dtype=np.uint64))
+        new_fingerprints = new_fingerprints[~self.contains(new_fingerprints)]
+        self._fingerprints = np.insert(
+            self._fingerprints,
+            np.searchsorted(self._fingerprints, new_fingerprints),
+            new_fingerprints,
+        )
+
+    def drop_duplicates(
+        self, transactions: pd.DataFrame, name: Optional[str] = None
+    ) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Drop the transactions which are already in the index and add the others.
+
+        A transaction which is more than once in the transactions is only kept the
+        first time, like pd.DataFrame.drop_duplicates does.
+
+        Parameters
+        ----------
+        transactions : pd.DataFrame
+            The new transactions, e.g. of a statement.
+        name : str, optional
+            The name which the number of dropped duplicates is kept and logged
+            for, e.g. the path of the statement.
+
+        Returns
+        -------
+        Tuple[pd.DataFrame, np.ndarray]
+            The transactions without the duplicates and their fingerprints.
+        """
+        fingerprints = fingerprint_transactions(transactions)
+        is_new = (
+            ~self.contains(fingerprints)
+            & ~pd.Series(fingerprints).duplicated(keep="first").to_numpy()
+        )
+        number_of_duplicates = int(len(is_new) - is_new.sum())
+        if name is not None:
+            self.dropped_duplicates[name] = number_of_duplicates
+            if number_of_duplicates:
+                logger.info(
+                    f"Dropped {number_of_duplicates} transactions of {name} which "
+                    "were already loaded"
+                )
+        self.add(fingerprints[is_new])
+        if not number_of_duplicates:
+            return transactions, fingerprints
+        return transactions[is_new], fingerprints[is_new]
@@ -1,19 +1,34 @@
 import logging
 import pathlib
-from typing import Optional
+from typing import Callable, Mapping, Optional
 
-import omegaconf
+import pandas as pd
 
+import expense_viewer.config_cache as config_cache
 import expense_viewer.data_loader as loader
 import expense_viewer.exceptions as exceptions
 import expense_viewer.expense.expense
 import expense_viewer.expense.overall_expense as expense
+import expense_viewer.fingerprint as fingerprint
+import expense_viewer.profiler as profiler_lib
+import expense_viewer.stats as stats_lib
 
 logger = logging.getLogger(__name__)
 
 
 def get_expense_report(
-    config_file_path: str, salary_statement_path: str, statement_bank: str
+    config_file_path: str,
+    salary_statement_path: str,
+    statement_bank: str,
+    single_pass: bool = False,
+    cache_dir: Optional[str] = None,
+    max_workers: int = 1,
+    chunksize: Optional[int] = None,
+    stats: Optional[stats_lib.PipelineStats] = None,
+    compact: bool = False,
+    minor_units: bool = False,
+    profiler: Optional[profiler_lib.RuleProfiler] = None,
+    fingerprints: Optional[fingerprint.FingerprintIndex] = None,
 ) -> Optional[expense_viewer.expense.expense.Expense]:
     """
     Get the expense report for the month in the salary statement.
@@ -26,33 +41,195 @@ def get_expense_report(
         The full path of the csv file containing the salary statement of the month.
     statement_bank: str
         The bank which the statements come from.
+    single_pass: bool
+        Evaluate every expense category once over all the statements instead of
+        once for every month.
+    cache_dir: str, optional
+        A directory to cache the parsed statements and the rules of the config in,
+        so that an unchanged statement or config is not parsed again on the next
+        run.
+    max_workers: int
+        The number of statements loaded in parallel.
+    chunksize: int, optional
+        Read the statements in chunks of this many rows to limit the memory needed
+        for very large statements.
+    stats: stats_lib.PipelineStats, optional
+        Record the time, rows and peak memory of every stage of building the
+        report in it: reading the config, loading every statement, dividing the
+        months and categorizing every month and category.
+    compact: bool
+        Store the repeated and the free text columns of the statements in less
+        memory, see load_data_from_all_expense_stmts.
+    minor_units: bool
+        Carry the amounts as integer minor units, e.g. cents, so that the sums of
+        the report are exact. The report is still in units of money.
+    profiler: profiler_lib.RuleProfiler, optional
+        Record the time, the rows scanned and the rows matched of every expense
+        category and identifier in it, see RuleProfiler.summary.
+    fingerprints: fingerprint.FingerprintIndex, optional
+        The index of the transactions which are already loaded, see
+        load_data_from_all_expense_stmts. The index of the loaded transactions is
+        kept by the expense report, so that adding new transactions to it does not
+        hash all the loaded ones again.
     """
-    config_file: pathlib.Path = pathlib.Path(config_file_path)
+    if fingerprints is None:
+        fingerprints = fingerprint.FingerprintIndex()
     salary_statement: pathlib.Path = pathlib.Path(salary_statement_path)
     if not salary_statement.is_dir():
         raise exceptions.StatementPathNotADirectory(
             message="The salary statement path has to be a directory."
         )
 
-    try:
-        config = omegaconf.OmegaConf.load(config_file)
-
+    def load_expenses() -> pd.DataFrame:
         loader.check_format_of_salary_statement(
             salary_statement_paths=salary_statement.glob("*")
         )
-        salary_details = loader.load_data_from_all_expense_stmts(
+        return loader.load_data_from_all_expense_stmts(
             expense_statements=salary_statement.glob("*"),
             callable=loader.BANK_NAME_TO_CALLABLE[statement_bank],
+            cache=loader.StatementCache(cache_dir) if cache_dir is not None else None,
+            max_workers=max_workers,
+            chunksize=chunksize,
+            stats=stats,
+            compact=compact,
+            minor_units=minor_units,
+            fingerprints=fingerprints,
         )
 
-        expense_obj = expense.OverallExpense(expense=salary_details, config=config)
-        expense_obj.add_child_expenses()
-        return expense_obj
-    except exceptions.Error as exc:
-        print(exc)
+    try:
+        return _build_expense_report(
+            config_file_path,
+            load_expenses,
+            single_pass=single_pass,
+            stats=stats,
+            minor_units=minor_units,
+            cache_dir=cache_dir,
+            profiler=profiler,
+            fingerprints=fingerprints,
+        )
     except KeyError:
         raise exceptions.BankNotSupportedError(
             "The statements for the banks that are supported are Revolut and Deutsche Bank"
         )
 
+
+def get_combined_expense_report(
+    config_file_path: str,
+    statement_sources: Mapping[str, str],
+    single_pass: bool = False,
+    cache_dir: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    stats: Optional[stats_lib.PipelineStats] = None,
+    compact: bool = False,
+    minor_units: bool = False,
+    profiler: Optional[profiler_lib.RuleProfiler] = None,
+    fingerprints: Optional[fingerprint.FingerprintIndex] = None,
+) -> Optional[expense_viewer.expense.expense.Expense]:
+    """
+    Get a single expense report for the statements of several banks and accounts.
+
+    The transactions of all the sources are merged by date before the months are
+    divided, so every month has the expenses of all the accounts. Every
+    transaction has the source it was loaded from in its "Source" column.
+
+    Parameters
+    ----------
+    config_file_path : str
+        The full path of the config yaml file containing the expense rules.
+    statement_sources : Mapping[str, str]
+        The bank of every directory or glob pattern of statements, e.g.
+        {"/home/user/deutsche_bank": "Deutsche Bank", "/home/user/revolut/*.csv":
+        "Revolut"}.
+    max_workers: int, optional
+        The number of statements loaded in parallel, one for every source by
+        default.
+    single_pass, cache_dir, chunksize, stats, compact, minor_units, profiler,
+    fingerprints:
+        See get_expense_report.
+
+    Raises
+    ------
+    BankNotSupportedError
+        When the bank of a source is not supported.
+    """
+    if fingerprints is None:
+        fingerprints = fingerprint.FingerprintIndex()
+
+    def load_expenses() -> pd.DataFrame:
+        return loader.load_data_from_all_sources(
+            statement_sources,
+            cache=loader.StatementCache(cache_dir) if cache_dir is not None else None,
+            max_workers=(
+                max_workers if max_workers is not None else len(statement_sources)
+            ),
+            chunksize=chunksize,
+            stats=stats,
+            compact=compact,
+            minor_units=minor_units,
+            fingerprints=fingerprints,
+        )
+
+    return _build_expense_report(
+        config_file_path,
+        load_expenses,
+        single_pass=single_pass,
+        stats=stats,
+        minor_units=minor_units,
+        cache_dir=cache_dir,
+        profiler=profiler,
+        fingerprints=fingerprints,
+    )
+
+
+def _build_expense_report(
+    config_file_path: str,
+    load_expenses: Callable[[], pd.DataFrame],
+    single_pass: bool,
+    stats: Optional[stats_lib.PipelineStats],
+    minor_units: bool,
+    cache_dir: Optional[str] = None,
+    profiler: Optional[profiler_lib.RuleProfiler] = None,
+    fingerprints: Optional[fingerprint.FingerprintIndex] = None,
+) -> Optional[expense_viewer.expense.expense.Expense]:
+    """Read the config, load the expenses and build the expense report of them."""
+    config_file: pathlib.Path = pathlib.Path(config_file_path)
+    try:
+        with stats_lib.measure(
+            stats, "config", name=str(config_file), logger=logger, level=logging.INFO
+        ):
+            config = config_cache.load_config(
+                config_file,
+                cache_dir=(
+                    pathlib.Path(cache_dir) / config_cache.CONFIG_CACHE_SUBDIRECTORY
+                    if cache_dir is not None
+                    else None
+                ),
+            )
+
+        with stats_lib.measure(
+            stats, "load", logger=logger, level=logging.INFO
+        ) as measurement:
+            salary_details = load_expenses()
+            measurement.rows = len(salary_details)
+
+        expense_obj = expense.OverallExpense(
+            expense=salary_details,
+            config=config,
+            single_pass=single_pass,
+            stats=stats,
+            minor_units=minor_units,
+            profiler=profiler,
+            fingerprints=fingerprints,
+        )
+        with stats_lib.measure(
+            stats, "build", rows=len(salary_details), logger=logger, level=logging.INFO
+        ):
+            expense_obj.add_child_expenses()
+        return expense_obj
+    except exceptions.BankNotSupportedError:
+        raise
+    except exceptions.Error as exc:
+        print(exc)
+
     return None
@@ -0,0 +1,264 @@
+"""Find all the keywords contained in a column of strings in a single pass."""
+import collections
+import re
+from typing import (
+    Dict,
+    FrozenSet,
+    Hashable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+# Maximum number of combined patterns for the remaining keywords kept per matcher
+_MAX_CACHED_PATTERNS = 256
+
+_BACK_REFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+# A regular expression without any of these characters matches plain strings
+_REGEX_SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]\\()")
+
+
+class Keyword(NamedTuple):
+    """A keyword to be searched for anywhere inside a string."""
+
+    pattern: str
+    regex: bool = True
+    case_sensitive: bool = True
+
+
+def get_literals(keyword: Keyword) -> Optional[List[str]]:
+    """Get the plain strings matching the keyword, None if it needs a regex."""
+    if not keyword.regex:
+        return [keyword.pattern]
+    if _REGEX_SPECIAL_CHARACTERS.intersection(keyword.pattern):
+        return None
+    return keyword.pattern.split("|")
+
+
+class KeywordMatches:
+    """The keywords found for every value of a column."""
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        hits: Dict[Hashable, np.ndarray],
+        number_of_values: int,
+        index: pd.Index,
+    ) -> None:
+        # codes point every row to its unique value, -1 for missing values
+        self._codes = codes
+        # hits has a boolean array over the unique values for every keyword with
+        # an extra False at the end which the missing values point to
+        self._hits = hits
+        self._number_of_values = number_of_values
+        self._index = index
+
+    def mask(self, keyword_id: Hashable) -> np.ndarray:
+        """Get a boolean array which is True for the rows containing the keyword."""
+        return self._hits[keyword_id][self._codes]
+
+    def keyword_ids(self) -> pd.Series:
+        """Get the ids of the keywords found in every row as frozensets."""
+        ids_per_value: List[set] = [set() for _ in range(self._number_of_values + 1)]
+        for keyword_id, hits in self._hits.items():
+            for position in np.flatnonzero(hits):
+                ids_per_value[position].add(keyword_id)
+        frozen_ids = np.empty(len(ids_per_value), dtype=object)
+        frozen_ids[:] = [frozenset(ids) for ids in ids_per_value]
+        return pd.Series(frozen_ids[self._codes], index=self._index)
+
+
+class _AhoCorasick:
+    """An Aho-Corasick automaton which finds many literal strings in one pass."""
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [dict()]
+        self._fail: List[int] = [0]
+        self._output: List[Set[Hashable]] = [set()]
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1 or bool(self._output[0])
+
+    def add(self, literal: str, keyword_id: Hashable) -> None:
+        """Add a literal which is reported as the keyword id when it is found."""
+        state = 0
+        for char in literal:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append(dict())
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(keyword_id)
+
+    def build(self) -> None:
+        """Compute the failure links once all the literals have been added."""
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[Hashable]:
+        """Find the keyword ids of all the literals contained in the text."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set(output[0])
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class KeywordMatcher:
+    """
+    Match many keywords against strings in a single pass over every string.
+
+    Keywords which are plain strings, including regular expressions which are
+    only an alternation of plain strings like "ADAC|AXA", are found with an
+    Aho-Corasick automaton. All the other regular expressions are joined in a
+    single alternation. An alternation only reports one of the keywords which
+    match at the same position, so the string is scanned again with the keywords
+    which were not found yet until a scan finds nothing new. Most strings match at
+    most one keyword which makes that one or two scans. Every distinct value of a
+    column is only matched once.
+    """
+
+    def __init__(self, keywords: Mapping[Hashable, Keyword]) -> None:
+        self.keywords = dict(keywords)
+        self._literals = _AhoCorasick()
+        # The case insensitive literals are searched for in the lower cased text
+        self._lower_case_literals = _AhoCorasick()
+        self._group_names: Dict[str, Hashable] = dict()
+        self._alternatives: Dict[Hashable, str] = dict()
+        # Keywords which can not be a part of the combined expression, e.g. the
+        # ones having back references, are searched for on their own
+        self._separate: Dict[Hashable, "re.Pattern[str]"] = dict()
+
+        for position, (keyword_id, keyword) in enumerate(self.keywords.items()):
+            literals = get_literals(keyword)
+            if literals is not None:
+                automaton = (
+                    self._literals
+                    if keyword.case_sensitive
+                    else self._lower_case_literals
+                )
+                for literal in literals:
+                    automaton.add(
+                        literal if keyword.case_sensitive else literal.lower(),
+                        keyword_id,
+                    )
+                continue
+
+            body = keyword.pattern
+            if not keyword.case_sensitive:
+                body = f"(?i:{body})"
+            group_name = f"_k{position}"
+            alternative = f"(?P<{group_name}>{body})"
+            try:
+                re.compile(alternative)
+            except re.error:
+                self._separate[keyword_id] = self._compile_separately(keyword)
+                continue
+            if _BACK_REFERENCE.search(body):
+                self._separate[keyword_id] = self._compile_separately(keyword)
+                continue
+            self._group_names[group_name] = keyword_id
+            self._alternatives[keyword_id] = alternative
+
+        self._literals.build()
+        self._lower_case_literals.build()
+        self._patterns: Dict[Tuple[Hashable, ...], "re.Pattern[str]"] = dict()
+
+    @staticmethod
+    def _compile_separately(keyword: Keyword) -> "re.Pattern[str]":
+        """Compile a keyword which can not be a part of the combined expression."""
+        pattern = keyword.pattern if keyword.regex else re.escape(keyword.pattern)
+        return re.compile(pattern, 0 if keyword.case_sensitive else re.IGNORECASE)
+
+    def _get_pattern(self, keyword_ids: Tuple[Hashable, ...]) -> "re.Pattern[str]":
+        """Get the combined expression for the given keywords."""
+        pattern = self._patterns.get(keyword_ids)
+        if pattern is None:
+            if len(self._patterns) >= _MAX_CACHED_PATTERNS:
+                self._patterns.clear()
+            pattern = re.compile(
+                "|".join(self._alternatives[keyword_id] for keyword_id in keyword_ids)
+            )
+            self._patterns[keyword_ids] = pattern
+        return pattern
+
+    def find(self, text: str) -> FrozenSet[Hashable]:
+        """Find the ids of all the keywords contained in the text."""
+        found = set()
+        if self._literals:
+            found.update(self._literals.find(text))
+        if self._lower_case_literals:
+            found.update(self._lower_case_literals.find(text.lower()))
+
+        remaining: Tuple[Hashable, ...] = tuple(self._alternatives)
+        while remaining:
+            new = {
+                self._group_names[match.lastgroup]  # type: ignore
+                for match in self._get_pattern(remaining).finditer(text)
+            }
+            if not new:
+                break
+            found.update(new)
+            remaining = tuple(
+                keyword_id for keyword_id in remaining if keyword_id not in found
+            )
+
+        for keyword_id, pattern in self._separate.items():
+            if pattern.search(text):
+                found.add(keyword_id)
+        return frozenset(found)
+
+    def match(self, values: pd.Series) -> KeywordMatches:
+        """
+        Find the keywords in every value of a column.
+
+        Missing values and values which are not strings match no keyword.
+
+        Parameters
+        ----------
+        values : pd.Series
+            The column to be searched.
+        """
+        codes, uniques = pd.factorize(values)
+        unique_values: List[Optional[str]] = list(np.asarray(uniques, dtype=object))
+
+        # One extra entry at the end for the missing values having the code -1
+        hits = {
+            keyword_id: np.zeros(len(unique_values) + 1, dtype=bool)
+            for keyword_id in self.keywords
+        }
+        for position, value in enumerate(unique_values):
+            if not isinstance(value, str):
+                continue
+            for keyword_id in self.find(value):
+                hits[keyword_id][position] = True
+
+        return KeywordMatches(
+            codes=codes,
+            hits=hits,
+            number_of_values=len(unique_values),
+            index=values.index,
+        )
@@ -0,0 +1,223 @@
+"""Vectorized normalization of the transactions read from all the bank statements."""
+import importlib.util
+import logging
+from typing import Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# The column telling which bank or account a transaction was loaded from
+SOURCE_COLUMN = "Source"
+
+# The columns having few distinct values which are repeated over the statements and
+# the free text columns, used for storing the transactions in less memory
+CATEGORICAL_COLUMNS = (
+    "Transaction Type",
+    "Beneficiary / Originator",
+    "IBAN",
+    SOURCE_COLUMN,
+)
+STRING_COLUMNS = ("Payment Details",)
+
+# The amount columns and the number of minor units, e.g. cents, in a unit of money
+AMOUNT_COLUMNS = ("Debit", "Credit")
+MINOR_UNITS = 100
+
+logger = logging.getLogger(__name__)
+
+
+def parse_amounts(
+    values: pd.Series, thousands: Optional[str] = ",", decimal: str = "."
+) -> pd.Series:
+    """
+    Convert amounts written with thousands and decimal separators into floats.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The amounts as read from the statement, e.g. "1,234.56" or "1.234,56".
+    thousands : str, optional
+        The thousands separator, "," for english and "." for german statements.
+    decimal : str
+        The decimal separator, "." for english and "," for german statements.
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.astype("float64")
+
+    amounts = values
+    if thousands:
+        amounts = amounts.str.replace(thousands, "", regex=False)
+    if decimal != ".":
+        amounts = amounts.str.replace(decimal, ".", regex=False)
+    return pd.to_numeric(amounts.str.strip(), errors="raise").astype("float64")
+
+
+def parse_dates(values: pd.Series, date_format: str) -> pd.Series:
+    """
+    Convert dates written in the given format into datetimes.
+
+    Every distinct date string is only parsed once. When a value does not have
+    the expected format the format is inferred instead.
+    """
+    try:
+        return pd.to_datetime(values, format=date_format, cache=True)
+    except (ValueError, TypeError):
+        logger.warning(
+            f"The dates are not in the format {date_format}, inferring the format"
+        )
+        return pd.to_datetime(values, cache=True)
+
+
+def normalize_transactions(
+    transactions: pd.DataFrame,
+    date_format: str,
+    thousands: Optional[str] = ",",
+    decimal: str = ".",
+    signed_amounts: bool = False,
+    drop_time: bool = False,
+) -> pd.DataFrame:
+    """
+    Convert the dates and amounts of the transactions into the common format.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        The transactions with the "Value date", "Credit" and, unless the amounts
+        are signed, the "Debit" column as read from the statement.
+    date_format : str
+        The format of the "Value date" column.
+    thousands : str, optional
+        The thousands separator of the amounts.
+    decimal : str
+        The decimal separator of the amounts.
+    signed_amounts : bool
+        When True the "Credit" column has all the amounts, negative for debits,
+        and is split into the "Debit" and "Credit" columns.
+    drop_time : bool
+        Only keep the day of the "Value date".
+    """
+    value_dates = parse_dates(transactions["Value date"], date_format=date_format)
+    transactions["Value date"] = (
+        value_dates.dt.normalize() if drop_time else value_dates
+    )
+
+    credit = parse_amounts(transactions["Credit"], thousands=thousands, decimal=decimal)
+    if signed_amounts:
+        amounts = credit.to_numpy()
+        is_debit = amounts < 0.0
+        transactions["Credit"] = np.where(is_debit, 0.0, amounts)
+        transactions["Debit"] = np.where(is_debit, -amounts, 0.0)
+    else:
+        debit = parse_amounts(
+            transactions["Debit"], thousands=thousands, decimal=decimal
+        )
+        transactions["Credit"] = credit.fillna(0.0)
+        # The debits are written with a negative sign in some statements
+        transactions["Debit"] = debit.fillna(0.0).abs()
+    return transactions
+
+
+def to_minor_units(
+    transactions: pd.DataFrame, columns: Iterable[str] = AMOUNT_COLUMNS
+) -> pd.DataFrame:
+    """
+    Convert the amounts of the transactions into integer minor units, e.g. cents.
+
+    The amounts of the statements have at most two decimals, so every parsed amount
+    is rounded to the exact number of cents it was written with. Sums of the
+    amounts are then exact.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        The normalized transactions.
+    columns : Iterable[str]
+        The amount columns to convert.
+    """
+    for column in columns:
+        transactions[column] = np.round(
+            transactions[column].to_numpy(dtype="float64") * MINOR_UNITS
+        ).astype("int64")
+    return transactions
+
+
+def compact_transactions(
+    transactions: pd.DataFrame,
+    categorical_columns: Iterable[str] = CATEGORICAL_COLUMNS,
+    string_columns: Iterable[str] = STRING_COLUMNS,
+) -> pd.DataFrame:
+    """
+    Store the string columns of the transactions in less memory.
+
+    The columns having repeated values are converted into categoricals which keep
+    every distinct value once. The free text columns are converted into arrow
+    backed strings when pyarrow is installed and kept as they are otherwise. The
+    columns which the transactions do not have are skipped.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        The normalized transactions.
+    categorical_columns : Iterable[str]
+        The columns to convert into categoricals.
+    string_columns : Iterable[str]
+        The columns to convert into arrow backed strings.
+    """
+    for column in categorical_columns:
+        if column in transactions.columns:
+            transactions[column] = transactions[column].astype("category")
+    if importlib.util.find_spec("pyarrow") is not None:
+        for column in string_columns:
+            if column in transactions.columns:
+                transactions[column] = transactions[column].astype("string[pyarrow]")
+    return transactions
+
+
+def concat_transactions(
+    transactions: Sequence[pd.DataFrame], **concat_kwargs: Any
+) -> pd.DataFrame:
+    """
+    Concatenate transactions keeping the compact dtypes of their columns.
+
+    pandas only keeps a categorical column categorical when it has the same
+    categories in all the frames, so the categories of every categorical column
+    are joined first. A column which is compact in one of the frames is made
+    compact in all of them.
+
+    Parameters
+    ----------
+    transactions : Sequence[pd.DataFrame]
+        The transactions to concatenate.
+    concat_kwargs : Any
+        Passed on to pd.concat.
+    """
+    frames: List[pd.DataFrame] = list(transactions)
+    columns = {column for frame in frames for column in frame.columns}
+    for column in columns:
+        values = [frame[column] for frame in frames if column in frame.columns]
+        if any(isinstance(value.dtype, pd.CategoricalDtype) for value in values):
+            categories = union_categoricals(
+                [pd.Categorical(value) for value in values]
+            ).categories
+            dtype = pd.CategoricalDtype(categories)
+        else:
+            dtype = next(
+                (
+                    value.dtype
+                    for value in values
+                    if isinstance(value.dtype, pd.StringDtype)
+                ),
+                None,
+            )
+        if dtype is None:
+            continue
+        frames = [
+            (
+                frame.astype({column: dtype})
+                if column in frame.columns and frame[column].dtype != dtype
+                else frame
+            )
+            for frame in frames
+        ]
+    return pd.concat(frames, **concat_kwargs)
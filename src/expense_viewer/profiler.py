@@ -0,0 +1,187 @@
+"""Profile the time and the matches of every rule of the expense categories."""
+import threading
+import time
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from expense_viewer import rules
+
+CATEGORY_STAGE = "category"
+SUB_CATEGORY_STAGE = "sub category"
+
+
+class RuleRecord(NamedTuple):
+    """The measurements of a single evaluation of a rule over some rows."""
+
+    stage: str
+    month: Optional[str]
+    category: Optional[str]
+    # The position of the identifier in its category, None for the category as a
+    # whole which is made of all its identifiers
+    identifier: Optional[int]
+    label: Optional[str]
+    column: Optional[str]
+    comparison_operator: Optional[str]
+    value: Any
+    seconds: float
+    rows_scanned: int
+    rows_matched: int
+
+
+class RuleProfiler:
+    """
+    Record the evaluation time, the rows scanned and the rows matched of every rule.
+
+    With a profiler the rules are evaluated one identifier after the other, so that
+    every identifier can be timed on its own, instead of matching all the keywords
+    on a column together. Building the expenses is slower with a profiler but the
+    categories are the same.
+
+    The records are kept for every category and identifier in every month, the
+    summary adds them up over all the months.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[RuleRecord] = []
+        self._lock = threading.Lock()
+
+    def condition_masks(
+        self,
+        conditions: Iterable[Any],
+        data: pd.DataFrame,
+        month: Optional[str] = None,
+    ) -> Iterator[pd.Series]:
+        """
+        Get the masks of the conditions, e.g. the categories, one after the other.
+
+        The masks are the same as the ones of rules.compile_conditions.
+
+        Parameters
+        ----------
+        conditions : Iterable
+            The expense categories.
+        data : pd.DataFrame
+            The transactions to evaluate the conditions over.
+        month : str, optional
+            The month which the transactions are in, None for all the months.
+        """
+        for condition in rules.parse_conditions(conditions):
+            start = time.perf_counter()
+            masks = list(self.identifier_masks(condition, data, month=month))
+            mask = rules.combine_masks(condition, masks)
+            self._record(
+                CATEGORY_STAGE,
+                month,
+                condition,
+                None,
+                None,
+                time.perf_counter() - start,
+                len(data),
+                mask,
+            )
+            yield mask
+
+    def identifier_masks(
+        self,
+        condition: rules.Condition,
+        data: pd.DataFrame,
+        month: Optional[str] = None,
+        sub_categories: bool = False,
+    ) -> Iterator[pd.Series]:
+        """
+        Get the masks of the identifiers of a condition one after the other.
+
+        Parameters
+        ----------
+        condition : rules.Condition
+            The category having the identifiers.
+        data : pd.DataFrame
+            The transactions to evaluate the identifiers over.
+        month : str, optional
+            The month which the transactions are in, None for all the months.
+        sub_categories : bool
+            Only evaluate the labelled identifiers which divide the category into
+            its sub categories, in the same order as they are in the category.
+        """
+        stage = SUB_CATEGORY_STAGE if sub_categories else CATEGORY_STAGE
+        for position, identifier in enumerate(condition.identifiers):
+            if sub_categories and identifier.label is None:
+                continue
+            start = time.perf_counter()
+            mask = rules.compile_identifier(identifier)(data)
+            self._record(
+                stage,
+                month,
+                condition,
+                position,
+                identifier,
+                time.perf_counter() - start,
+                len(data),
+                mask,
+            )
+            yield mask
+
+    def _record(
+        self,
+        stage: str,
+        month: Optional[str],
+        condition: rules.Condition,
+        position: Optional[int],
+        identifier: Optional[rules.Identifier],
+        seconds: float,
+        rows_scanned: int,
+        mask: pd.Series,
+    ) -> None:
+        record = RuleRecord(
+            stage=stage,
+            month=month,
+            category=condition.name,
+            identifier=position,
+            label=identifier.label if identifier is not None else None,
+            column=identifier.column if identifier is not None else None,
+            comparison_operator=(
+                identifier.comparison_operator if identifier is not None else None
+            ),
+            value=identifier.value if identifier is not None else None,
+            seconds=seconds,
+            rows_scanned=rows_scanned,
+            rows_matched=int(np.count_nonzero(mask.to_numpy(dtype=bool))),
+        )
+        with self._lock:
+            self.records.append(record)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get all the records as a dataframe in the order they were recorded."""
+        frame = pd.DataFrame(self.records, columns=RuleRecord._fields)
+        frame["identifier"] = frame["identifier"].astype("Int64")
+        return frame
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Get the total time, rows scanned and rows matched of every rule.
+
+        The rules are the categories as a whole, whose time includes the time of
+        their identifiers, and every one of their identifiers, for the categories
+        and for the sub categories. They are sorted by their time with the slowest
+        rule first, the identifier is missing for the rows of the categories as a whole.
+        The rules which never matched a row have 0 rows matched.
+        """
+        frame = self.to_frame()
+        return (
+            frame.groupby(["stage", "category", "identifier"], sort=False, dropna=False)
+            .agg(
+                label=("label", "first"),
+                column=("column", "first"),
+                comparison_operator=("comparison_operator", "first"),
+                value=("value", "first"),
+                runs=("seconds", "size"),
+                seconds=("seconds", "sum"),
+                rows_scanned=("rows_scanned", "sum"),
+                rows_matched=("rows_matched", "sum"),
+            )
+            .reset_index()
+            .sort_values("seconds", ascending=False, kind="mergesort")
+            .reset_index(drop=True)
+        )
@@ -0,0 +1,415 @@
+"""Compile the conditions in the config into reusable boolean mask functions."""
+import collections
+import functools
+import itertools
+import operator
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from expense_viewer import exceptions, matcher
+
+MaskFunction = Callable[[pd.DataFrame], pd.Series]
+MasksFunction = Callable[[pd.DataFrame], Iterator[pd.Series]]
+
+CONTAINS_OPERATOR = "contains"
+
+_COMPARISON_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_LOGICAL_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "OR": operator.or_,
+    "AND": operator.and_,
+}
+
+
+class Identifier(NamedTuple):
+    """A single check of one column against a value."""
+
+    column: str
+    comparison_operator: str
+    value: Any
+    label: Optional[str] = None
+    # Only used by the 'contains' comparison
+    regex: bool = True
+    case_sensitive: bool = True
+
+
+class Condition(NamedTuple):
+    """A group of identifiers joined by a logical operator."""
+
+    identifiers: Tuple[Identifier, ...]
+    logical_operator: str
+    name: Optional[str] = None
+
+
+class RuleConfig(NamedTuple):
+    """All the rules of a config, validated and made of immutable rule objects."""
+
+    salary: Condition
+    expense_categories: Tuple[Condition, ...]
+    ignored: Optional[Condition] = None
+    savings: Optional[Condition] = None
+
+
+def parse_identifier(identifier: Any) -> Identifier:
+    """
+    Validate a single identifier from the config and convert it into an Identifier.
+
+    Parameters
+    ----------
+    identifier : Mapping or Identifier
+        The identifier as it appears in the config.
+
+    Raises
+    ------
+    InvalidRuleError
+        When the identifier is missing a key or uses an unknown comparison operator.
+    """
+    if isinstance(identifier, Identifier):
+        return identifier
+
+    for key in ("column", "comparison_operator", "value"):
+        if key not in identifier:
+            raise exceptions.InvalidRuleError(
+                message=f"The identifier {identifier} does not have the key '{key}'"
+            )
+
+    comparison_operator = identifier["comparison_operator"]
+    if (
+        comparison_operator != CONTAINS_OPERATOR
+        and comparison_operator not in _COMPARISON_OPERATORS
+    ):
+        raise exceptions.InvalidRuleError(
+            message=f"The comparison operator '{comparison_operator}' is not supported"
+        )
+
+    value = identifier["value"]
+    if comparison_operator == CONTAINS_OPERATOR:
+        value = str(value)
+
+    return Identifier(
+        column=str(identifier["column"]),
+        comparison_operator=comparison_operator,
+        value=value,
+        label=identifier["label"] if "label" in identifier else None,
+        regex=bool(identifier["regex"]) if "regex" in identifier else True,
+        case_sensitive=(
+            bool(identifier["case_sensitive"])
+            if "case_sensitive" in identifier
+            else True
+        ),
+    )
+
+
+def parse_condition(condition: Any) -> Condition:
+    """
+    Validate a condition from the config and convert it into a Condition.
+
+    Parameters
+    ----------
+    condition : Mapping or Condition
+        The condition having the identifiers and the logical operator.
+
+    Raises
+    ------
+    InvalidRuleError
+        When the condition has no identifiers or an unknown logical operator.
+    """
+    if isinstance(condition, Condition):
+        return condition
+
+    if "identifiers" not in condition or not condition["identifiers"]:
+        raise exceptions.InvalidRuleError(
+            message=f"The condition {condition} does not have any identifiers"
+        )
+
+    logical_operator = (
+        condition["logical_operator"] if "logical_operator" in condition else None
+    )
+    if logical_operator not in _LOGICAL_OPERATORS:
+        raise exceptions.InvalidRuleError(
+            message=f"The logical operator '{logical_operator}' is not supported"
+        )
+
+    return Condition(
+        identifiers=tuple(
+            parse_identifier(identifier) for identifier in condition["identifiers"]
+        ),
+        logical_operator=logical_operator,
+        name=condition["name"] if "name" in condition else None,
+    )
+
+
+def parse_conditions(conditions: Iterable[Any]) -> Tuple[Condition, ...]:
+    """Validate and convert a list of conditions, e.g. the expense categories."""
+    return tuple(parse_condition(condition) for condition in conditions)
+
+
+def parse_config(config: Any) -> RuleConfig:
+    """
+    Validate all the rules of a config and convert them into a RuleConfig.
+
+    The rules are converted once, so that building the expenses never reads the
+    nodes of the loaded config again.
+
+    Parameters
+    ----------
+    config : Mapping or RuleConfig
+        The config having the salary, the expense categories and optionally the
+        ignored and the savings conditions.
+
+    Raises
+    ------
+    InvalidRuleError
+        When the config is missing the salary or the expense categories or one of
+        its rules is not valid.
+    """
+    if isinstance(config, RuleConfig):
+        return config
+
+    for key in ("salary", "expense_categories"):
+        if key not in config:
+            raise exceptions.InvalidRuleError(
+                message=f"The config does not have the key '{key}'"
+            )
+    return RuleConfig(
+        salary=parse_condition(config["salary"]),
+        expense_categories=parse_conditions(config["expense_categories"]),
+        ignored=(parse_condition(config["ignored"]) if "ignored" in config else None),
+        savings=(parse_condition(config["savings"]) if "savings" in config else None),
+    )
+
+
+def rule_config_to_container(rule_config: RuleConfig) -> Dict[str, Any]:
+    """Convert a RuleConfig into plain dicts and lists which parse_config reads."""
+
+    def to_container(value: Any) -> Any:
+        if isinstance(value, (RuleConfig, Condition, Identifier)):
+            return {
+                key: to_container(field)
+                for key, field in value._asdict().items()
+                if field is not None
+            }
+        if isinstance(value, tuple):
+            return [to_container(field) for field in value]
+        return value
+
+    return to_container(rule_config)
+
+
+def _compare_missing(compare: Callable[[Any, Any], Any], value: Any) -> bool:
+    """Compare a missing value the same way as it is compared in an object column."""
+    return bool(
+        np.asarray(compare(pd.Series([np.nan], dtype=object), value), dtype=bool)[0]
+    )
+
+
+def _compare(
+    values: pd.Series, compare: Callable[[Any, Any], Any], value: Any
+) -> np.ndarray:
+    """Compare every value of a column, which may be categorical or arrow backed."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Every category is only compared once, the missing values have the code -1
+        # which points to the extra entry at the end
+        hits = np.append(
+            np.asarray(compare(pd.Series(values.cat.categories), value), dtype=bool),
+            _compare_missing(compare, value),
+        )
+        return hits[values.cat.codes.to_numpy()]
+
+    mask = compare(values, value)
+    if isinstance(mask.dtype, pd.BooleanDtype):
+        # Extension arrays give a missing result for the missing values
+        mask = mask.fillna(_compare_missing(compare, value))
+    return np.asarray(mask, dtype=bool)
+
+
+def scale_values(config: Any, columns: Iterable[str], factor: int) -> Any:
+    """
+    Multiply the values compared with the given columns in all the rules of a config.
+
+    Used for comparing the amounts in the rules with amounts stored in minor units,
+    e.g. a salary rule 'Credit > 2500' becomes 'Credit > 250000' for cents. The
+    'contains' identifiers are left as they are.
+
+    Parameters
+    ----------
+    config : Any
+        The config or a part of it, e.g. a single condition.
+    columns : Iterable[str]
+        The columns whose compared values are multiplied.
+    factor : int
+        The number of minor units in a unit.
+
+    Returns
+    -------
+    Any
+        A copy of the config made of plain dicts and lists, or of rule objects
+        when the config is made of them.
+    """
+    columns = frozenset(columns)
+    if isinstance(config, Identifier):
+        if (
+            config.column in columns
+            and config.comparison_operator in _COMPARISON_OPERATORS
+            and isinstance(config.value, (int, float))
+        ):
+            return config._replace(value=round(config.value * factor))
+        return config
+    if isinstance(config, (RuleConfig, Condition)):
+        return type(config)(*(scale_values(field, columns, factor) for field in config))
+    if isinstance(config, Mapping):
+        scaled = {
+            key: scale_values(value, columns, factor) for key, value in config.items()
+        }
+        if (
+            scaled.get("column") in columns
+            and scaled.get("comparison_operator") in _COMPARISON_OPERATORS
+            and isinstance(scaled.get("value"), (int, float))
+        ):
+            scaled["value"] = round(scaled["value"] * factor)
+        return scaled
+    if isinstance(config, Sequence) and not isinstance(config, str):
+        scaled_values = [scale_values(value, columns, factor) for value in config]
+        return tuple(scaled_values) if isinstance(config, tuple) else scaled_values
+    return config
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_identifiers(identifiers: Tuple[Identifier, ...]) -> MasksFunction:
+    """Create the masks function for already validated identifiers."""
+    # All the 'contains' identifiers on the same column share one keyword matcher
+    # so that the column is scanned once instead of once per identifier
+    keywords_per_column: Dict[str, Dict[int, matcher.Keyword]] = (
+        collections.defaultdict(dict)
+    )
+    for position, identifier in enumerate(identifiers):
+        if identifier.comparison_operator == CONTAINS_OPERATOR:
+            keywords_per_column[identifier.column][position] = matcher.Keyword(
+                pattern=identifier.value,
+                regex=identifier.regex,
+                case_sensitive=identifier.case_sensitive,
+            )
+    keyword_matchers = {
+        column: matcher.KeywordMatcher(keywords)
+        for column, keywords in keywords_per_column.items()
+    }
+
+    def identifier_masks(data: pd.DataFrame) -> Iterator[pd.Series]:
+        # The keywords are matched right away, the masks are made one at a time
+        matches = {
+            column: keyword_matcher.match(data[column])
+            for column, keyword_matcher in keyword_matchers.items()
+        }
+        return _iter_identifier_masks(data, matches)
+
+    def _iter_identifier_masks(
+        data: pd.DataFrame, matches: Dict[str, matcher.KeywordMatches]
+    ) -> Iterator[pd.Series]:
+        for position, identifier in enumerate(identifiers):
+            if identifier.comparison_operator == CONTAINS_OPERATOR:
+                mask = matches[identifier.column].mask(position)
+            else:
+                mask = _compare(
+                    data[identifier.column],
+                    _COMPARISON_OPERATORS[identifier.comparison_operator],
+                    identifier.value,
+                )
+            yield pd.Series(mask, index=data.index)
+
+    return identifier_masks
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_conditions(conditions: Tuple[Condition, ...]) -> MasksFunction:
+    """Create the masks function for already validated conditions."""
+    identifier_masks = _compile_identifiers(
+        tuple(
+            identifier
+            for condition in conditions
+            for identifier in condition.identifiers
+        )
+    )
+
+    def condition_masks(data: pd.DataFrame) -> Iterator[pd.Series]:
+        return _iter_condition_masks(identifier_masks(data))
+
+    def _iter_condition_masks(masks: Iterator[pd.Series]) -> Iterator[pd.Series]:
+        for condition in conditions:
+            yield combine_masks(
+                condition, itertools.islice(masks, len(condition.identifiers))
+            )
+
+    return condition_masks
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_identifier(identifier: Identifier) -> MaskFunction:
+    """Create the mask function for an already validated identifier."""
+    identifier_masks = _compile_identifiers((identifier,))
+    return lambda data: next(identifier_masks(data))
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_condition(condition: Condition) -> MaskFunction:
+    """Create the mask function for an already validated condition."""
+    condition_masks = _compile_conditions((condition,))
+    return lambda data: next(condition_masks(data))
+
+
+def combine_masks(condition: Condition, masks: Iterable[pd.Series]) -> pd.Series:
+    """Join the masks of the identifiers of a condition by its logical operator."""
+    return functools.reduce(_LOGICAL_OPERATORS[condition.logical_operator], masks)
+
+
+def compile_identifier(identifier: Any) -> MaskFunction:
+    """Get the cached mask function which checks a single identifier."""
+    return _compile_identifier(parse_identifier(identifier))
+
+
+def compile_condition(condition: Any) -> MaskFunction:
+    """Get the cached mask function which checks a full condition."""
+    return _compile_condition(parse_condition(condition))
+
+
+def compile_identifiers(identifiers: Iterable[Any]) -> MasksFunction:
+    """
+    Get the cached function which checks many identifiers together.
+
+    The returned function gives back the masks for the identifiers one after the
+    other. The 'contains' identifiers on a column are all matched in one pass when
+    the function is called.
+    """
+    return _compile_identifiers(
+        tuple(parse_identifier(identifier) for identifier in identifiers)
+    )
+
+
+def compile_conditions(conditions: Iterable[Any]) -> MasksFunction:
+    """
+    Get the cached function which checks many conditions together.
+
+    The returned function gives back the masks for the conditions one after the
+    other. The 'contains' identifiers on a column of all the conditions are
+    matched in one pass when the function is called.
+    """
+    return _compile_conditions(parse_conditions(conditions))
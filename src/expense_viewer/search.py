@@ -0,0 +1,150 @@
+"""Find the transactions containing keywords with an inverted index of their words."""
+import collections
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# The columns which are searched by default
+SEARCH_COLUMNS = ("Payment Details", "Beneficiary / Originator")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into its lower case words, dropping all the punctuation."""
+    return _TOKEN.findall(text.casefold())
+
+
+def _contains_phrase(tokens: Sequence[str], phrase: Sequence[str]) -> bool:
+    """Check if the phrase is in the tokens as consecutive tokens."""
+    return any(
+        tuple(tokens[start : start + len(phrase)]) == tuple(phrase)
+        for start in range(len(tokens) - len(phrase) + 1)
+    )
+
+
+class _ColumnIndex:
+    """The rows of every word of a single column."""
+
+    def __init__(self, values: pd.Series) -> None:
+        # Every distinct value is only split into words once
+        codes, uniques = pd.factorize(values)
+        self._value_tokens: List[Tuple[str, ...]] = [
+            tuple(tokenize(value)) if isinstance(value, str) else ()
+            for value in np.asarray(uniques, dtype=object)
+        ]
+        values_per_token: Dict[str, List[int]] = collections.defaultdict(list)
+        for code, tokens in enumerate(self._value_tokens):
+            for token in set(tokens):
+                values_per_token[token].append(code)
+        self._values_per_token = {
+            token: np.array(value_codes, dtype=np.int64)
+            for token, value_codes in values_per_token.items()
+        }
+
+        # The rows sorted by their value, the rows of the value with the code c are
+        # self._rows[self._offsets[c]:self._offsets[c + 1]]
+        self._rows = np.argsort(codes, kind="stable")
+        number_of_missing_values = int(np.count_nonzero(codes < 0))
+        self._offsets = number_of_missing_values + np.concatenate(
+            [[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))]
+        )
+
+    def find(self, phrase: Sequence[str]) -> np.ndarray:
+        """Get the positions of the rows containing the words of the phrase."""
+        value_codes: Optional[np.ndarray] = None
+        for token in set(phrase):
+            token_value_codes = self._values_per_token.get(token)
+            if token_value_codes is None:
+                return np.empty(0, dtype=np.int64)
+            value_codes = (
+                token_value_codes
+                if value_codes is None
+                else np.intersect1d(value_codes, token_value_codes)
+            )
+        if value_codes is None:
+            return np.empty(0, dtype=np.int64)
+        if len(phrase) > 1:
+            value_codes = np.array(
+                [
+                    code
+                    for code in value_codes
+                    if _contains_phrase(self._value_tokens[code], phrase)
+                ],
+                dtype=np.int64,
+            )
+
+        # Gather the rows of all the values without a loop over the values
+        starts = self._offsets[value_codes]
+        lengths = self._offsets[value_codes + 1] - starts
+        positions = np.arange(lengths.sum()) + np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        )
+        return self._rows[positions]
+
+
+class TokenIndex:
+    """
+    An inverted index from the words of text columns to the rows containing them.
+
+    The words are the lower cased runs of letters and digits of the values, a
+    keyword matches the rows having all its words next to each other in the same
+    order in one of the columns. So "DWS Grundbesitz" matches "DWS Grundbesitz
+    GmbH" but "Grundbesitz DWS" or "DWS Grund" do not.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The transactions to index.
+    columns : Iterable[str]
+        The text columns to index, the columns which the data does not have are
+        left out.
+    """
+
+    def __init__(
+        self, data: pd.DataFrame, columns: Iterable[str] = SEARCH_COLUMNS
+    ) -> None:
+        self.number_of_rows = len(data)
+        self._columns = {
+            column: _ColumnIndex(data[column])
+            for column in columns
+            if column in data.columns
+        }
+
+    @property
+    def columns(self) -> List[str]:
+        """The indexed columns."""
+        return list(self._columns)
+
+    def find(
+        self, any_of: Iterable[str], columns: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """
+        Get the sorted positions of the rows containing any of the keywords.
+
+        Parameters
+        ----------
+        any_of : Iterable[str]
+            The keywords, a row is found when it contains one of them.
+        columns : Iterable[str], optional
+            The columns to search in, all the indexed columns by default.
+
+        Raises
+        ------
+        KeyError
+            When one of the columns is not indexed.
+        """
+        column_indexes = [
+            self._columns[column]
+            for column in (columns if columns is not None else self._columns)
+        ]
+        found = np.zeros(self.number_of_rows, dtype=bool)
+        for keyword in any_of:
+            phrase = tokenize(keyword)
+            if not phrase:
+                continue
+            for column_index in column_indexes:
+                found[column_index.find(phrase)] = True
+        return np.flatnonzero(found)
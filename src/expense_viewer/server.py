@@ -0,0 +1,361 @@
+"""
+Serve the expense report from memory to local clients over HTTP.
+
+The statements are loaded and the expense report is built once, every query is
+answered from the report kept in memory. The report is built again when the
+config file or the statements change.
+
+Usage:
+    python -m expense_viewer.server config.yaml /home/user/statements "Deutsche Bank"
+    python -m expense_viewer.server config.yaml statements Revolut --socket /tmp/ev.sock
+
+The queries are
+    GET /report
+    GET /months/<month>
+    GET /months/<month>/categories
+    GET /months/<month>/categories/<category>[/<sub category>]
+    GET /search?keyword=ADAC&keyword=AXA[&column=<column>][&months=2023]
+and they answer with the rows of a dataframe as a json list of records.
+"""
+import argparse
+import http.server
+import json
+import logging
+import os
+import pathlib
+import socketserver
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import expense_viewer.exceptions as exceptions
+import expense_viewer.expense.expense as expense
+import expense_viewer.expense.overall_expense as overall_expense
+import expense_viewer.main as main
+
+logger = logging.getLogger(__name__)
+
+# The path, the modification time and the size of the config and every statement
+_FileStates = Tuple[Tuple[str, int, int], ...]
+
+
+class ReportState:
+    """
+    The expense report of the statements kept in memory.
+
+    The report is only built again when the config file or the statements have
+    changed, which is checked at most once every check interval when the report
+    is asked for. While the new report is built the queries are answered from the
+    old one, and a report which can not be built does not replace the old one.
+
+    Parameters
+    ----------
+    config_file_path : str
+        The full path of the config yaml file containing the expense rules.
+    salary_statement_path : str
+        The directory of the statements.
+    statement_bank : str
+        The bank which the statements come from.
+    check_interval : float
+        The seconds between two checks of the files for changes.
+    report_kwargs : Any
+        Passed on to get_expense_report, e.g. the cache directory.
+
+    Raises
+    ------
+    RuntimeError
+        When the first report can not be built.
+    """
+
+    def __init__(
+        self,
+        config_file_path: str,
+        salary_statement_path: str,
+        statement_bank: str,
+        check_interval: float = 2.0,
+        **report_kwargs: Any,
+    ) -> None:
+        self.config_file_path = config_file_path
+        self.salary_statement_path = salary_statement_path
+        self.statement_bank = statement_bank
+        self.check_interval = check_interval
+        self.report_kwargs = report_kwargs
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._file_states: _FileStates = ()
+        self._report: Optional[overall_expense.OverallExpense] = None
+        if not self.reload():
+            raise RuntimeError(
+                f"The expense report of {salary_statement_path} could not be built"
+            )
+
+    @property
+    def report(self) -> overall_expense.OverallExpense:
+        """The report, built again first when its files have changed."""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            # Only one thread checks the files, the others go on with the report
+            # they have while it is built again
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._checked_at = time.monotonic()
+                    file_states = self._get_file_states()
+                    if file_states != self._file_states:
+                        logger.info("The statements or the config have changed")
+                        self.reload()
+                        # A report which could not be built is not built again
+                        # until the files change again
+                        self._file_states = file_states
+                finally:
+                    self._lock.release()
+        return self._report  # type: ignore
+
+    def reload(self) -> bool:
+        """
+        Build the report again and replace the report in memory with it.
+
+        Returns
+        -------
+        bool
+            If the report could be built.
+        """
+        file_states = self._get_file_states()
+        start = time.perf_counter()
+        try:
+            report = main.get_expense_report(
+                self.config_file_path,
+                self.salary_statement_path,
+                self.statement_bank,
+                **self.report_kwargs,
+            )
+        except exceptions.Error as error:
+            logger.error(error.message)
+            report = None
+        if not isinstance(report, overall_expense.OverallExpense):
+            logger.error("The expense report could not be built, keeping the old one")
+            return False
+        # Everything the queries need is made before the report is served, so that
+        # the concurrent queries only read it
+        report.build_search_index()
+        report.get_expenses_report()
+        report.get_spending_matrix()
+        self._report = report
+        self._file_states = file_states
+        logger.info(
+            f"Built the expense report of {len(report.expense)} transactions in "
+            f"{time.perf_counter() - start:.3f}s"
+        )
+        return True
+
+    def _get_file_states(self) -> _FileStates:
+        """Get the state of the config file and of every statement."""
+        paths = [pathlib.Path(self.config_file_path)] + sorted(
+            pathlib.Path(self.salary_statement_path).glob("*")
+        )
+        file_states = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            file_states.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(file_states)
+
+
+def query(
+    report: overall_expense.OverallExpense,
+    path: str,
+    parameters: Dict[str, List[str]],
+) -> pd.DataFrame:
+    """
+    Answer a query from the report.
+
+    The months and categories are the child expenses of the report, their
+    dataframes are the ones kept by the report and are not copied.
+
+    Parameters
+    ----------
+    report : overall_expense.OverallExpense
+        The report to answer from.
+    path : str
+        The path of the query, e.g. "/months/January-2023/categories/Shopping".
+    parameters : Dict[str, List[str]]
+        The parameters of the query, as given by urllib.parse.parse_qs.
+
+    Raises
+    ------
+    QueryNotFoundError
+        When the path or its month or category is not in the report.
+    InvalidQueryError
+        When the parameters of the query are wrong.
+    """
+    parts = [urllib.parse.unquote(part) for part in path.strip("/").split("/")]
+    if parts == ["report"]:
+        return report.get_expenses_report()
+    if parts == ["search"]:
+        if not parameters.get("keyword"):
+            raise exceptions.InvalidQueryError(
+                message="A search needs at least one keyword"
+            )
+        months: Any = parameters.get("months")
+        try:
+            return report.search(
+                any_of=parameters["keyword"],
+                columns=parameters.get("column"),
+                months=months[0] if months and len(months) == 1 else months,
+            )
+        except KeyError as error:
+            raise exceptions.InvalidQueryError(
+                message=f"The column {error} is not searched"
+            )
+    if parts[0] != "months" or len(parts) < 2:
+        raise exceptions.QueryNotFoundError(message=f"There is no query {path}")
+
+    month = _get_child_expense(report, parts[1])
+    if len(parts) == 2:
+        return month.expense
+    if parts[2] != "categories" or len(parts) > 5:
+        raise exceptions.QueryNotFoundError(message=f"There is no query {path}")
+    if len(parts) == 3:
+        return pd.DataFrame(
+            {
+                "Category": list(month.child_expenses),
+                "Total": [
+                    category.get_total_expense_sum()
+                    for category in month.child_expenses.values()
+                ],
+            }
+        )
+    category = _get_child_expense(month, parts[3])
+    if len(parts) == 4:
+        return category.expense
+    return _get_child_expense(category, parts[4]).expense
+
+
+def _get_child_expense(parent: expense.Expense, label: str) -> expense.Expense:
+    """Get the child expense of the label or raise a QueryNotFoundError."""
+    if label not in parent.child_expenses:
+        raise exceptions.QueryNotFoundError(message=f"{label} is not in {parent.label}")
+    return parent.child_expenses[label]
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    """Answer the queries from the report of the server."""
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        try:
+            answer = query(
+                self.server.state.report,  # type: ignore
+                url.path,
+                urllib.parse.parse_qs(url.query),
+            )
+            body = answer.to_json(orient="records", date_format="iso")
+        except exceptions.QueryNotFoundError as error:
+            self._send(404, json.dumps({"error": error.message}))
+        except exceptions.InvalidQueryError as error:
+            self._send(400, json.dumps({"error": error.message}))
+        except Exception:
+            # The client still gets an answer when the query fails unexpectedly
+            logger.exception(f"Could not answer the query {self.path}")
+            self._send(500, json.dumps({"error": "The query could not be answered"}))
+        else:
+            self._send(200, body)
+
+    def _send(self, status: int, body: str) -> None:
+        encoded_body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded_body)))
+        self.end_headers()
+        self.wfile.write(encoded_body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """An http server listening on a unix socket, a thread for every client."""
+
+    daemon_threads = True
+
+    def get_request(self) -> Tuple[Any, Tuple[str, int]]:
+        # The clients of a unix socket have no address, the request handler
+        # expects a host and a port
+        request, _ = super().get_request()
+        return request, ("localhost", 0)
+
+
+def make_server(
+    state: ReportState,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    socket_path: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """
+    Make a server answering the queries from the report in memory.
+
+    Every client is served in its own thread, all the threads share the report.
+
+    Parameters
+    ----------
+    state : ReportState
+        The report to answer the queries from.
+    host : str
+        The address to listen on, only the local host by default.
+    port : int
+        The port to listen on, 0 for any free port.
+    socket_path : str, optional
+        Listen on a unix socket at this path instead of a port.
+    """
+    server: socketserver.BaseServer
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _ThreadingUnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = http.server.ThreadingHTTPServer((host, port), _RequestHandler)
+    server.state = state  # type: ignore
+    return server
+
+
+def run(arguments: List[str]) -> None:
+    """Parse the arguments, build the report and serve it until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("config_file_path")
+    parser.add_argument("salary_statement_path")
+    parser.add_argument("statement_bank")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", help="Listen on a unix socket at this path")
+    parser.add_argument("--check-interval", type=float, default=2.0)
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--single-pass", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--minor-units", action="store_true")
+    options = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO)
+    state = ReportState(
+        options.config_file_path,
+        options.salary_statement_path,
+        options.statement_bank,
+        check_interval=options.check_interval,
+        cache_dir=options.cache_dir,
+        single_pass=options.single_pass,
+        compact=options.compact,
+        minor_units=options.minor_units,
+    )
+    with make_server(state, options.host, options.port, options.socket) as server:
+        logger.info(f"Serving the expense report on {server.server_address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
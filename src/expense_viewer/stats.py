@@ -0,0 +1,152 @@
+"""Record the time, rows and memory of every stage of building an expense report."""
+import contextlib
+import logging
+import sys
+import threading
+import time
+from typing import Any, ContextManager, Iterator, List, NamedTuple, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # pragma: no cover, not available on windows
+    resource = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class StageRecord(NamedTuple):
+    """The measurements of a single run of a stage."""
+
+    stage: str
+    name: Optional[str]
+    seconds: float
+    rows: Optional[int]
+    # The peak memory of the process at the end of the stage and how much the stage
+    # raised it, both in bytes and None when it can not be measured
+    peak_memory: Optional[int]
+    peak_memory_increase: Optional[int]
+
+
+class Measurement:
+    """The values of a stage which are only known inside of it, like its rows."""
+
+    def __init__(self, rows: Optional[int] = None) -> None:
+        self.rows = rows
+
+
+def _get_peak_memory() -> Optional[int]:
+    """Get the peak resident memory of the process in bytes."""
+    if resource is None:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macos and in kilobytes everywhere else
+    return peak_memory if sys.platform == "darwin" else peak_memory * 1024
+
+
+class PipelineStats:
+    """
+    Collect the measurements of the stages of building an expense report.
+
+    A stage is measured with a with statement around it. Measuring a stage only
+    needs a clock and a resource usage call so it is cheap enough to be always
+    turned on. Every measured stage is also logged with its values in the extra
+    fields of the log record, at the debug level unless stated otherwise.
+
+    The peak memory is the high water mark of the memory of the whole process, a
+    stage which raises it is the one needing the most memory so far.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[StageRecord] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(
+        self,
+        stage: str,
+        name: Optional[str] = None,
+        rows: Optional[int] = None,
+        logger: logging.Logger = logger,
+        level: int = logging.DEBUG,
+    ) -> Iterator[Measurement]:
+        """
+        Measure the code inside the with statement as a stage.
+
+        Parameters
+        ----------
+        stage : str
+            The kind of stage, e.g. "load" or "month".
+        name : str, optional
+            The name of what the stage is run for, e.g. the file or the month.
+        rows : int, optional
+            The number of rows the stage works on, it can also be set on the
+            measurement given by the with statement when it is only known later.
+        logger : logging.Logger
+            The logger of the module running the stage.
+        level : int
+            The level the stage is logged at.
+        """
+        measurement = Measurement(rows=rows)
+        peak_memory_before = _get_peak_memory()
+        start = time.perf_counter()
+        try:
+            yield measurement
+        finally:
+            seconds = time.perf_counter() - start
+            peak_memory = _get_peak_memory()
+            record = StageRecord(
+                stage=stage,
+                name=name,
+                seconds=seconds,
+                rows=measurement.rows,
+                peak_memory=peak_memory,
+                peak_memory_increase=(
+                    peak_memory - peak_memory_before
+                    if peak_memory is not None and peak_memory_before is not None
+                    else None
+                ),
+            )
+            with self._lock:
+                self.records.append(record)
+            if logger.isEnabledFor(level):
+                logger.log(
+                    level,
+                    f"{stage}{f' {name}' if name is not None else ''} took "
+                    f"{seconds:.3f}s for {record.rows} rows",
+                    extra={
+                        "stage": stage,
+                        "stage_name": name,
+                        "seconds": seconds,
+                        "rows": record.rows,
+                        "peak_memory": peak_memory,
+                        "peak_memory_increase": record.peak_memory_increase,
+                    },
+                )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get all the records as a dataframe in the order the stages ended."""
+        return pd.DataFrame(self.records, columns=StageRecord._fields)
+
+    def summary(self) -> pd.DataFrame:
+        """Get the number of runs, the total time and rows for every kind of stage."""
+        return (
+            self.to_frame()
+            .groupby("stage", sort=False)
+            .agg(
+                runs=("seconds", "size"),
+                seconds=("seconds", "sum"),
+                rows=("rows", "sum"),
+                peak_memory=("peak_memory", "max"),
+            )
+        )
+
+
+def measure(
+    stats: Optional[PipelineStats], stage: str, **kwargs: Any
+) -> ContextManager[Measurement]:
+    """Measure a stage when there are stats to record it in, else do nothing."""
+    if stats is None:
+        return contextlib.nullcontext(Measurement())
+    return stats.stage(stage, **kwargs)
@@ -0,0 +1,383 @@
+"""
+Store the normalized transactions in a binary file which is opened without parsing.
+
+The store is a single file having a json header followed by the buffers of every
+column, each aligned to 64 bytes:
+
+- the numbers and the booleans as fixed width arrays,
+- the dates as int64 nanoseconds,
+- the categoricals as the fixed width array of their codes and their categories as
+  strings,
+- the strings as the arrow layout of int32 offsets, utf-8 data and a validity
+  bitmap of the present values.
+
+Opening a store maps the file into memory and makes every column a view of the
+mapped buffers, nothing is read or copied until it is used. The operating system
+keeps the pages of the file in its page cache, so opening the store again is
+instant and the processes which open the same store share one copy of it.
+"""
+import importlib.util
+import json
+import logging
+import os
+import pathlib
+import struct
+import uuid
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import expense_viewer.exceptions as exceptions
+
+logger = logging.getLogger(__name__)
+
+# Changing the layout of the file makes the stores written before unreadable
+STORE_VERSION = 1
+
+_MAGIC = b"EXPSTORE"
+# The magic bytes followed by the length of the json header
+_PREAMBLE = struct.Struct("<8sQ")
+_ALIGNMENT = 64
+
+_NUMBER_KIND = "number"
+_DATETIME_KIND = "datetime"
+_CATEGORY_KIND = "category"
+_STRING_KIND = "string"
+
+# The buffers of a column by their name, e.g. "offsets" and "data" for strings
+_Buffers = Dict[str, np.ndarray]
+
+
+def write_store(transactions: pd.DataFrame, path: Union[str, pathlib.Path]) -> None:
+    """
+    Write the transactions into a store.
+
+    The store is written under a temporary name first and then replaces the file
+    at the path, so a store is never read half written. The processes which have
+    the old store open keep reading the old one.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        The normalized transactions, e.g. from load_data_from_all_expense_stmts.
+    path : str or pathlib.Path
+        The file to write the store to.
+
+    Raises
+    ------
+    UnsupportedColumnError
+        When a column or the index of the transactions can not be stored.
+    """
+    path = pathlib.Path(path)
+    columns = []
+    buffers: List[np.ndarray] = []
+    for name, values in transactions.items():
+        if not isinstance(name, str):
+            raise exceptions.UnsupportedColumnError(
+                message=f"The column {name!r} has to be named by a string"
+            )
+        kind, metadata, column_buffers = _encode_column(name, values)
+        buffer_positions = dict()
+        for buffer_name, buffer in column_buffers.items():
+            buffer_positions[buffer_name] = len(buffers)
+            buffers.append(np.ascontiguousarray(buffer))
+        columns.append(
+            {"name": name, "kind": kind, "buffers": buffer_positions, **metadata}
+        )
+
+    index: Dict[str, Any]
+    if isinstance(transactions.index, pd.RangeIndex):
+        index = {
+            "start": transactions.index.start,
+            "step": transactions.index.step,
+        }
+    elif pd.api.types.is_integer_dtype(transactions.index.dtype):
+        index = {"buffer": len(buffers)}
+        buffers.append(transactions.index.to_numpy(dtype="<i8"))
+    else:
+        raise exceptions.UnsupportedColumnError(
+            message="Only transactions having an integer index can be stored"
+        )
+
+    # The buffers are placed relative to the end of the header, which is only
+    # known once their places are in it
+    buffer_places = []
+    offset = 0
+    for buffer in buffers:
+        buffer_places.append([offset, buffer.nbytes, buffer.dtype.str])
+        offset += _padded(buffer.nbytes)
+    header = json.dumps(
+        {
+            "version": STORE_VERSION,
+            "rows": len(transactions),
+            "index": index,
+            "columns": columns,
+            "buffers": buffer_places,
+        }
+    ).encode("utf-8")
+
+    temporary_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temporary_path, "wb") as store_file:
+            preamble = _PREAMBLE.pack(_MAGIC, len(header))
+            store_file.write(preamble)
+            store_file.write(header)
+            store_file.write(bytes(_padding(len(preamble) + len(header))))
+            for buffer in buffers:
+                store_file.write(buffer.data)
+                store_file.write(bytes(_padding(buffer.nbytes)))
+        os.replace(temporary_path, path)
+    finally:
+        if temporary_path.exists():
+            temporary_path.unlink()
+
+
+def open_store(path: Union[str, pathlib.Path]) -> pd.DataFrame:
+    """
+    Open the transactions of a store without copying them.
+
+    The columns of the transactions are views of the store mapped into memory,
+    which is mapped copy on write so that changing the transactions never changes
+    the store. The columns which were strings are arrow backed strings when
+    pyarrow is installed, like the compact transactions, and are decoded into
+    objects otherwise.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The file of the store, see write_store.
+
+    Raises
+    ------
+    CouldNotLoadStoreError
+        When the file is not a store or was written by another version.
+    """
+    header, data = _read_store(pathlib.Path(path))
+    buffers = [
+        data[offset : offset + nbytes].view(np.dtype(dtype))
+        for offset, nbytes, dtype in header["buffers"]
+    ]
+    rows = header["rows"]
+    if "buffer" in header["index"]:
+        index = pd.Index(buffers[header["index"]["buffer"]], copy=False)
+    else:
+        start, step = header["index"]["start"], header["index"]["step"]
+        index = pd.RangeIndex(start, start + rows * step, step)
+
+    columns = [
+        _decode_column(
+            column,
+            {name: buffers[position] for name, position in column["buffers"].items()},
+            rows,
+        )
+        for column in header["columns"]
+    ]
+    return _make_frame(columns, [column["name"] for column in header["columns"]], index)
+
+
+def _read_store(path: pathlib.Path) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Map the store and read its header, the data are the bytes after the header."""
+    try:
+        mapped = np.memmap(path, dtype=np.uint8, mode="c")
+    except (OSError, ValueError) as error:
+        raise exceptions.CouldNotLoadStoreError(
+            message=f"Could not open the store {path}: {error}"
+        )
+    if len(mapped) < _PREAMBLE.size:
+        raise exceptions.CouldNotLoadStoreError(message=f"{path} is not a store")
+    magic, header_length = _PREAMBLE.unpack(bytes(mapped[: _PREAMBLE.size]))
+    if magic != _MAGIC:
+        raise exceptions.CouldNotLoadStoreError(message=f"{path} is not a store")
+    header_end = _PREAMBLE.size + header_length
+    try:
+        header = json.loads(bytes(mapped[_PREAMBLE.size : header_end]))
+    except ValueError:
+        raise exceptions.CouldNotLoadStoreError(
+            message=f"The header of the store {path} is broken"
+        )
+    if header.get("version") != STORE_VERSION:
+        raise exceptions.CouldNotLoadStoreError(
+            message=(
+                f"The store {path} has the version {header.get('version')}, "
+                f"only the version {STORE_VERSION} can be opened"
+            )
+        )
+    # The columns are plain arrays, the results of the operations on them would be
+    # memmaps too otherwise, which keep the mapping open through their base
+    data = mapped[_padded(header_end) :].view(np.ndarray)
+    if any(offset + nbytes > len(data) for offset, nbytes, _ in header["buffers"]):
+        raise exceptions.CouldNotLoadStoreError(
+            message=f"The store {path} is truncated"
+        )
+    return header, data
+
+
+def _encode_column(
+    name: str, values: pd.Series
+) -> Tuple[str, Dict[str, Any], _Buffers]:
+    """Get the kind, the metadata and the buffers of a column to store."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories
+        if not (categories.empty or pd.api.types.is_string_dtype(categories.dtype)):
+            raise exceptions.UnsupportedColumnError(
+                message=f"The categories of the column {name!r} have to be strings"
+            )
+        category_offsets, category_data, _ = _encode_strings(
+            name, categories.to_numpy(dtype=object)
+        )
+        return (
+            _CATEGORY_KIND,
+            {"ordered": bool(dtype.ordered)},
+            {
+                "codes": values.cat.codes.to_numpy(),
+                "category_offsets": category_offsets,
+                "category_data": category_data,
+            },
+        )
+    if isinstance(dtype, pd.StringDtype) or dtype == object:
+        values_to_encode = values.to_numpy(dtype=object, na_value=None)
+        offsets, data, validity = _encode_strings(name, values_to_encode)
+        return (
+            _STRING_KIND,
+            dict(),
+            {"offsets": offsets, "data": data, "validity": validity},
+        )
+    if dtype == np.dtype("datetime64[ns]"):
+        return _DATETIME_KIND, dict(), {"values": values.to_numpy().view("<i8")}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return _NUMBER_KIND, dict(), {"values": values.to_numpy()}
+    raise exceptions.UnsupportedColumnError(
+        message=f"The column {name!r} of the type {dtype} can not be stored"
+    )
+
+
+def _encode_strings(
+    name: str, values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the offsets, the utf-8 data and the validity bitmap of strings."""
+    present = np.fromiter(
+        (isinstance(value, str) for value in values), dtype=bool, count=len(values)
+    )
+    if not pd.isna(values[~present]).all():
+        raise exceptions.UnsupportedColumnError(
+            message=f"The column {name!r} has values which are not strings"
+        )
+    encoded = [
+        value.encode("utf-8") if is_present else b""
+        for value, is_present in zip(values, present)
+    ]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    if offsets[-1] > np.iinfo(np.int32).max:
+        # The arrow strings have int32 offsets, a column having more text than
+        # that is kept with int64 offsets and decoded when it is opened
+        offsets = offsets.astype("<i8")
+    else:
+        offsets = offsets.astype("<i4")
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    # The bits of the values are in order from the least significant bit, like
+    # the validity bitmaps of arrow
+    validity = np.packbits(present, bitorder="little")
+    return offsets, data, validity
+
+
+def _decode_column(column: Dict[str, Any], buffers: _Buffers, rows: int) -> Any:
+    """Make the values of a stored column from the views of its buffers."""
+    kind = column["kind"]
+    if kind == _NUMBER_KIND:
+        return buffers["values"]
+    if kind == _DATETIME_KIND:
+        return buffers["values"].view("datetime64[ns]")
+    if kind == _CATEGORY_KIND:
+        categories = _decode_strings(
+            buffers["category_offsets"], buffers["category_data"], None
+        )
+        return pd.Categorical.from_codes(
+            buffers["codes"],
+            dtype=pd.CategoricalDtype(categories, ordered=column["ordered"]),
+        )
+    offsets, data, validity = buffers["offsets"], buffers["data"], buffers["validity"]
+    if offsets.dtype.itemsize == 4 and importlib.util.find_spec("pyarrow") is not None:
+        import pyarrow as pa
+
+        strings = pa.StringArray.from_buffers(
+            rows, pa.py_buffer(offsets), pa.py_buffer(data), pa.py_buffer(validity)
+        )
+        return pd.arrays.ArrowStringArray(strings)
+    return _decode_strings(offsets, data, validity)
+
+
+def _decode_strings(
+    offsets: np.ndarray, data: np.ndarray, validity: Optional[np.ndarray]
+) -> np.ndarray:
+    """Decode strings into an object array, the missing strings becoming NaN."""
+    text = data.tobytes()
+    strings = np.array(
+        [
+            text[start:end].decode("utf-8")
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ],
+        dtype=object,
+    )
+    if validity is not None:
+        present = np.unpackbits(validity, count=len(strings), bitorder="little")
+        strings[present == 0] = np.nan
+    return strings
+
+
+def _make_frame(columns: List[Any], names: List[str], index: pd.Index) -> pd.DataFrame:
+    """
+    Make a frame of the columns without copying them when the pandas version allows.
+
+    The constructors of a frame put the columns of the same type together into a
+    single copied array, so the frame is made with a block for every column the
+    same way as pyarrow makes its frames without copying. The blocks are internals
+    of pandas, when they can not be made the frame is made by its constructor.
+    """
+    try:
+        return _make_frame_of_blocks(columns, names, index)
+    except Exception:
+        logger.debug(
+            "Could not make the frame of the store without copying", exc_info=True
+        )
+        return _make_frame_of_columns(columns, names, index)
+
+
+def _make_frame_of_blocks(
+    columns: List[Any], names: List[str], index: pd.Index
+) -> pd.DataFrame:
+    """Make a frame with a block for every column, through the pandas internals."""
+    from pandas.core.internals import BlockManager
+    from pandas.core.internals.api import make_block
+
+    blocks = [
+        make_block(
+            values.reshape(1, -1) if isinstance(values, np.ndarray) else values,
+            placement=[position],
+            ndim=2,
+        )
+        for position, values in enumerate(columns)
+    ]
+    return pd.DataFrame(BlockManager(blocks, [pd.Index(names, dtype=object), index]))
+
+
+def _make_frame_of_columns(
+    columns: List[Any], names: List[str], index: pd.Index
+) -> pd.DataFrame:
+    """Make a frame of the columns by its constructor, which may copy them."""
+    # The columns are keyed by their position so that no column name is lost
+    frame = pd.DataFrame(dict(enumerate(columns)), index=index, copy=False)
+    frame.columns = pd.Index(names, dtype=object)
+    return frame
+
+
+def _padding(nbytes: int) -> int:
+    """The number of zero bytes aligning the end of a buffer."""
+    return -nbytes % _ALIGNMENT
+
+
+def _padded(nbytes: int) -> int:
+    """The size of a buffer together with its padding."""
+    return nbytes + _padding(nbytes)
@@ -1,10 +1,14 @@
 """File which has the common utility functions inside the project."""
 import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
+import warnings
 
 from dateutil.relativedelta import relativedelta
+import numpy as np
 import pandas as pd
 
+from expense_viewer import rules
+
 
 def get_full_condition_string(condition: Dict[str, Any]) -> str:
     """Construct a condition string using the condition dict."""
@@ -47,46 +51,13 @@ def get_condition_str_for_single_identifier(
         )
 
 
-def break_up_dataframe_in_chunks(data: pd.DataFrame, indices: List[int]):
-    """Divide a dataframe into chunks as per supplied indexes."""
-    start_index = 0
-    for index in indices:
-        yield data[start_index:index]
-        start_index = index + 1
-    yield data[start_index:]
-
-
 def get_row_index_for_matching_columns(
     condition: Dict[str, Any], data: pd.DataFrame
 ) -> List[int]:
-    """Get the row index for columns matching the condition."""
-    condition_str = get_full_condition_string(condition)
-
-    result_dataframe = data[pd.eval(condition_str)]
+    """Get the positions of the rows matching the condition, whatever the index is."""
+    mask = rules.compile_condition(condition)(data)
 
-    return list(result_dataframe.index.values)
-
-
-def get_expense_month_year(expense: pd.DataFrame) -> str:
-    """Get the expense month from the data."""
-    expense_copy = expense.copy()
-
-    months = expense_copy["Value date"].dt.month
-    year = expense_copy["Value date"].dt.year
-    try:
-        most_frequent_month_int = months.value_counts().idxmax()
-        most_frequent_month_year = year.value_counts().idxmax()
-
-        most_frequent_month_str = datetime.date(1900, most_frequent_month_int, 1).strftime(
-            "%B"
-        )
-    except Exception as error:
-        print("The expense causing the issue...")
-        print(expense_copy)
-        raise error
-
-    # Convert the month number(1/2) into a month string(January/February etc)
-    return f"{most_frequent_month_str}-{most_frequent_month_year}"
+    return np.flatnonzero(np.asarray(mask, dtype=bool)).tolist()
 
 
 def get_next_month_label(month_year_label: str) -> str:
@@ -94,3 +65,128 @@ def get_next_month_label(month_year_label: str) -> str:
     datetime_object = datetime.datetime.strptime(month_year_label, "%B-%Y")
     next_month = datetime_object + relativedelta(months=1)
     return next_month.strftime("%B-%Y")
+
+
+def get_month_labels(months: pd.Series, years: pd.Series) -> pd.Series:
+    """Label every month by the name of its month and its year, e.g. "May-2020"."""
+    # Convert the month number(1/2) into a month string(January/February etc)
+    month_names = months.map(
+        lambda month: datetime.date(1900, int(month), 1).strftime("%B")
+    )
+    return month_names + "-" + years.astype(int).astype(str)
+
+
+def _get_most_frequent_value_per_month(
+    months: np.ndarray, values: pd.Series
+) -> pd.Series:
+    """Get the most frequent value for every month, the first one seen wins ties."""
+    counts = (
+        pd.DataFrame(
+            {"Month": months, "Value": values, "Position": np.arange(len(months))}
+        )
+        .groupby(["Month", "Value"])["Position"]
+        .agg(["size", "min"])
+        .reset_index()
+    )
+    counts.sort_values(
+        by=["Month", "size", "min"],
+        ascending=[True, False, True],
+        kind="mergesort",
+        inplace=True,
+    )
+    return counts.drop_duplicates(subset="Month").set_index("Month")["Value"]
+
+
+def get_month_segments(
+    data: pd.DataFrame,
+    salary_row_indexes: List[int],
+    ignored: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """
+    Divide the data into months at the salary rows and summarize all the months.
+
+    Every month starts after its salary row and ends before the next one, the data
+    before the first salary row does not belong to any month. The month is labelled
+    with its most frequent month and year, the month seen first wins a tie.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The expense data, with any index.
+    salary_row_indexes : List[int]
+        The positions of the rows in which the salary was credited.
+    ignored : np.ndarray, optional
+        A boolean array which is True for the rows not counted as extra credits.
+
+    Returns
+    -------
+    pd.DataFrame
+        A frame indexed by the number of the month, i.e. the position of its salary
+        row, having the "Start" and "Stop" row positions of the transactions of the
+        month, its "Label", its "Salary" and its "Extra Credit". Months without any
+        transactions are left out.
+    """
+    is_salary = np.zeros(len(data), dtype=bool)
+    is_salary[np.asarray(salary_row_indexes, dtype=int)] = True
+    # The rows before the first salary row get -1
+    month_numbers = np.cumsum(is_salary) - 1
+    in_month = (month_numbers >= 0) & ~is_salary
+
+    credit = data["Credit"].to_numpy()
+    is_extra_credit = credit > 0
+    if ignored is not None:
+        is_extra_credit &= ~ignored
+    value_dates = data["Value date"][in_month]
+    rows = pd.DataFrame(
+        {
+            "Month": month_numbers[in_month],
+            "Position": np.flatnonzero(in_month),
+            "Extra Credit": np.where(is_extra_credit, credit, 0)[in_month],
+        }
+    )
+    segments = rows.groupby("Month").agg(
+        **{
+            "Start": ("Position", "min"),
+            "Stop": ("Position", "max"),
+            "Extra Credit": ("Extra Credit", "sum"),
+        }
+    )
+    segments["Stop"] += 1
+
+    segments["Label"] = get_month_labels(
+        _get_most_frequent_value_per_month(
+            rows["Month"].to_numpy(), value_dates.dt.month.to_numpy()
+        ),
+        _get_most_frequent_value_per_month(
+            rows["Month"].to_numpy(), value_dates.dt.year.to_numpy()
+        ),
+    )
+    segments["Salary"] = credit[
+        np.asarray(salary_row_indexes, dtype=int)[segments.index]
+    ]
+    return segments[["Start", "Stop", "Label", "Salary", "Extra Credit"]]
+
+
+def resolve_month_label_collisions(
+    labels: Iterable[str], existing_labels: Iterable[str] = ()
+) -> List[str]:
+    """
+    Give every month a label which has not been used before.
+
+    A month whose label has already been used, either by an earlier month or by
+    one of the existing labels, is labelled with the month after it instead.
+    """
+    used_labels = set(existing_labels)
+    resolved_labels = []
+    for label in labels:
+        if label in used_labels:
+            # Check if the month is already added then select the next month
+            warnings.warn(
+                f"{label} has already been added to the child expenses..."
+                "adding next month's label to the data"
+            )
+            label = get_next_month_label(label)
+            warnings.warn(f"The next month {label} has been chosen for the data")
+        used_labels.add(label)
+        resolved_labels.append(label)
+    return resolved_labels
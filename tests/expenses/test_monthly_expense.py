@@ -4,6 +4,8 @@ from datetime import datetime
 import pandas as pd
 import pytest
 
+import expense_viewer.categorize as categorize
+import expense_viewer.exceptions as exceptions
 import expense_viewer.expense.monthly_expense as monthly_expense
 
 
@@ -133,3 +135,30 @@ class TestMonthlyExpense:
         assert self.obj.child_expenses["Category2"].expense.equals(
             self.child_data_category_2
         )
+
+    def test_add_child_expenses_method_with_category_matches(self):
+        """Test that precomputed category matches give the same child expenses."""
+        obj = monthly_expense.MonthlyExpense(
+            expense=self.expenses, config=self.config, label="May"
+        )
+        obj.add_child_expenses(
+            category_matches=categorize.get_category_matches(self.expenses, self.config)
+        )
+        assert list(obj.child_expenses.keys()) == ["Category1", "Category2"]
+        assert obj.child_expenses["Category1"].expense.equals(
+            self.child_data_category_1
+        )
+        assert obj.child_expenses["Category2"].expense.equals(
+            self.child_data_category_2
+        )
+
+    def test_add_child_expenses_method_with_overlapping_category_matches(self):
+        """Test that a row matching two categories is still reported as an error."""
+        config = self.config + [dict(self.config[1], name="Category3")]
+        obj = monthly_expense.MonthlyExpense(
+            expense=self.expenses, config=config, label="May"
+        )
+        with pytest.raises(exceptions.ExpenseDataAlreadyInOtherExpenseError):
+            obj.add_child_expenses(
+                category_matches=categorize.get_category_matches(self.expenses, config)
+            )
@@ -1,10 +1,15 @@
 """Test suite for the overall_expense.py module."""
+
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import pytest
 
 import expense_viewer.expense.overall_expense as overall_expense
+import expense_viewer.fingerprint as fingerprint
+import expense_viewer.normalize as normalize
+import expense_viewer.stats as stats_lib
 
 
 @pytest.fixture(scope="module")
@@ -129,3 +134,365 @@ class TestOverallExpense:
         """Test the function get_total_expense_sum."""
         with pytest.raises(NotImplementedError):
             self.obj.get_total_expense_sum()
+
+    def test_add_child_expenses_method_in_single_pass_mode(self):
+        """Test that the single pass mode builds the same child expenses."""
+        obj = overall_expense.OverallExpense(
+            expense=self.expenses, config=self.config, single_pass=True
+        )
+        obj.add_child_expenses()
+        assert obj.get_child_expense_labels() == ["May-2020", "June-2020"]
+        assert obj.child_expenses["May-2020"].expense.equals(self.child_data_may)
+        assert obj.child_expenses["June-2020"].expense.equals(self.child_data_june)
+        # The rows before the first salary and the salaries are in no month
+        assert obj.category_labels["Category"].tolist() == [
+            None,
+            None,
+            "Miscellaneous",
+            "Miscellaneous",
+            None,
+            "Miscellaneous",
+        ]
+        assert obj.category_labels.index.equals(self.expenses.index)
+
+
+def _get_expenses_for_months(number_of_months):
+    """Produce a salary followed by three expenses for every month of 2020."""
+    columns = ["Transaction Type", "Payment Details", "Debit", "Credit", "Value date"]
+    data = []
+    for month in range(1, number_of_months + 1):
+        data.append(["Transfer", "salary", 0.0, 3000.0, datetime(2020, month, 1)])
+        for day in (5, 10, 15):
+            data.append(["Payment", "shop", 10.0, 0.0, datetime(2020, month, day)])
+    return pd.DataFrame(data, columns=columns)
+
+
+def test_add_expenses_only_builds_the_changed_months_again(get_dummy_config_data):
+    """Test that adding new transactions gives the same result as a full build."""
+    all_expenses = _get_expenses_for_months(4)
+    full_obj = overall_expense.OverallExpense(
+        expense=all_expenses, config=get_dummy_config_data
+    )
+    full_obj.add_child_expenses()
+
+    obj = overall_expense.OverallExpense(
+        expense=all_expenses.iloc[:10], config=get_dummy_config_data
+    )
+    obj.add_child_expenses()
+    february = obj.child_expenses["February-2020"]
+    # The new transactions overlap with the ones already there
+    rebuilt_months = obj.add_expenses(all_expenses.iloc[8:])
+
+    assert rebuilt_months == ["March-2020", "April-2020"]
+    assert obj.child_expenses["February-2020"] is february
+    assert obj.expense.equals(full_obj.expense)
+    assert obj.get_expenses_report().equals(full_obj.get_expenses_report())
+    for month, month_expense in full_obj.child_expenses.items():
+        assert obj.child_expenses[month].expense.equals(month_expense.expense)
+
+
+def test_add_expenses_without_new_transactions(get_dummy_config_data):
+    """Test that no month is built again when all the transactions are known."""
+    all_expenses = _get_expenses_for_months(2)
+    obj = overall_expense.OverallExpense(
+        expense=all_expenses, config=get_dummy_config_data
+    )
+    obj.add_child_expenses()
+
+    assert obj.add_expenses(all_expenses.iloc[2:]) == []
+    assert obj.expense is all_expenses
+
+
+def test_child_expenses_are_created_when_accessed(get_dummy_config_data):
+    """Test that the child expenses only keep their rows until accessed."""
+    all_expenses = _get_expenses_for_months(2)
+    obj = overall_expense.OverallExpense(
+        expense=all_expenses, config=get_dummy_config_data
+    )
+    obj.add_child_expenses()
+    january = obj.child_expenses["January-2020"]
+
+    assert january._expense is None
+    assert list(january.rows) == [1, 2, 3]
+    assert january.get_total_expense_sum() == 30.0
+    assert january._expense is None
+    assert january.expense.equals(all_expenses.iloc[1:4])
+
+    obj.release_expense()
+
+    assert january._expense is None
+    assert obj.expense is all_expenses
+    assert january.expense.equals(all_expenses.iloc[1:4])
+
+
+def test_add_child_expenses_records_the_stages(get_dummy_config_data):
+    """Test that every month and category is recorded in the stats."""
+    config = dict(
+        get_dummy_config_data,
+        expense_categories=[
+            {
+                "name": "Shopping",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "shop",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                    }
+                ],
+            }
+        ],
+    )
+    stats = stats_lib.PipelineStats()
+    obj = overall_expense.OverallExpense(
+        expense=_get_expenses_for_months(2), config=config, stats=stats
+    )
+    obj.add_child_expenses()
+    records = stats.to_frame()
+
+    assert list(records.loc[records["stage"] == "month", "name"]) == [
+        "January-2020",
+        "February-2020",
+    ]
+    assert list(records.loc[records["stage"] == "month", "rows"]) == [3, 3]
+    assert list(records.loc[records["stage"] == "rule", "name"]) == [
+        "January-2020: Shopping",
+        "February-2020: Shopping",
+    ]
+    assert set(records["stage"]) == {"salaries", "months", "month", "keywords", "rule"}
+
+
+def test_get_expenses_report_in_minor_units(get_dummy_config_data):
+    """Test that the report of the amounts in cents has exact sums."""
+    columns = ["Transaction Type", "Payment Details", "Debit", "Credit", "Value date"]
+    expenses = pd.DataFrame(
+        [
+            ["Transfer", "salary", 0.0, 3000.55, datetime(2020, 1, 1)],
+            ["Payment", "shop", 0.1, 0.0, datetime(2020, 1, 5)],
+            ["Payment", "shop", 0.2, 0.0, datetime(2020, 1, 6)],
+        ],
+        columns=columns,
+    )
+    obj = overall_expense.OverallExpense(
+        expense=normalize.to_minor_units(expenses.copy()),
+        config=get_dummy_config_data,
+        minor_units=True,
+    )
+    obj.add_child_expenses()
+    report = obj.get_expenses_report()
+
+    assert obj.child_expenses["January-2020"].get_total_expense_sum() == 30
+    assert report["Salary"].tolist() == [3000.55]
+    assert report["Expenses"].tolist() == [0.3]
+    assert report["Savings"].tolist() == [3000.25]
+    # All the amounts of the report have the same type in both modes
+    amount_columns = report.columns.drop("Month")
+    assert set(report.dtypes[amount_columns]) == {np.dtype("float64")}
+    float_report = overall_expense.OverallExpense(
+        expense=expenses.copy(), config=get_dummy_config_data
+    )
+    float_report.add_child_expenses()
+    pd.testing.assert_frame_equal(
+        float_report.get_expenses_report(), report, check_exact=False
+    )
+
+
+def test_search_across_months(get_dummy_config_data):
+    """Test that the transactions of all the months are found with their labels."""
+    config = dict(
+        get_dummy_config_data,
+        expense_categories=[
+            {
+                "name": "Shopping",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "shop",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                    }
+                ],
+            }
+        ],
+    )
+    expenses = _get_expenses_for_months(3)
+    expenses.loc[[2, 6, 10], "Payment Details"] = "shop ADAC Membership"
+    obj = overall_expense.OverallExpense(expense=expenses, config=config)
+    obj.add_child_expenses()
+
+    found = obj.search(any_of=["adac", "salary"])
+
+    assert list(found.index) == [0, 2, 4, 6, 8, 10]
+    assert list(found["Month"]) == [
+        None,
+        "January-2020",
+        None,
+        "February-2020",
+        None,
+        "March-2020",
+    ]
+    assert list(found["Category"]) == [None, "Shopping"] * 3
+    assert list(obj.search(["ADAC"], months="February-2020").index) == [6]
+    assert list(obj.search(["ADAC"], months=["January-2020", "March-2020"]).index) == [
+        2,
+        10,
+    ]
+    assert len(obj.search(["ADAC"], months="2021")) == 0
+
+    obj.add_expenses(_get_expenses_for_months(4).iloc[12:])
+    assert list(obj.search(["ADAC"], months="2020").index) == [2, 6, 10]
+    assert list(obj.search(["shop"], months="April-2020").index) == [13, 14, 15]
+
+
+def test_get_spending_matrix(get_dummy_config_data):
+    """Test that the matrix has the same totals as the child expenses."""
+    config = dict(
+        get_dummy_config_data,
+        expense_categories=[
+            {
+                "name": "Shopping",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "shop",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Shop",
+                    },
+                    {
+                        "value": "market",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Market",
+                    },
+                ],
+            }
+        ],
+    )
+    expenses = _get_expenses_for_months(3)
+    expenses.loc[[3, 7], "Payment Details"] = "market"
+    expenses.loc[[6, 10], "Payment Details"] = "rent"
+    obj = overall_expense.OverallExpense(expense=expenses, config=config)
+    obj.add_child_expenses()
+
+    matrix = obj.get_spending_matrix()
+
+    assert list(matrix.index) == ["January-2020", "February-2020", "March-2020"]
+    for month, month_expense in obj.child_expenses.items():
+        for category, category_expense in month_expense.child_expenses.items():
+            assert matrix.loc[month, ("Total", category)] == (
+                category_expense.get_total_expense_sum()
+            )
+            assert matrix.loc[month, ("Count", category)] == len(category_expense.rows)
+    assert list(matrix["Count"]["Miscellaneous"]) == [0, 1, 1]
+    assert list(matrix["Total"]["Miscellaneous"]) == [0.0, 10.0, 10.0]
+    assert list(matrix["Average"]["Shopping"]) == [10.0, 10.0, 10.0]
+
+    sub_category_matrix = obj.get_spending_matrix(sub_categories=True)
+    assert list(sub_category_matrix["Count"]["Shopping"]["Market"]) == [1, 1, 0]
+    assert list(sub_category_matrix["Count"]["Shopping"]["Shop"]) == [2, 1, 2]
+
+    assert list(obj.get_spending_matrix(year=2020).index) == list(matrix.index)
+    assert obj.get_spending_matrix(year="2021").empty
+    in_range = obj.get_spending_matrix(start="2020-02-10", end="2020-03-05")
+    assert list(in_range.index) == ["February-2020", "March-2020"]
+    assert list(in_range["Count"]["Shopping"]) == [1, 1]
+
+
+def test_get_expenses_report_is_kept_until_the_months_change(get_dummy_config_data):
+    """Test that the report is made again only after new months are added."""
+    all_expenses = _get_expenses_for_months(3)
+    obj = overall_expense.OverallExpense(
+        expense=all_expenses.iloc[:8], config=get_dummy_config_data
+    )
+    obj.add_child_expenses()
+    report = obj.get_expenses_report()
+    report["Expenses"] = 0.0
+
+    assert obj.get_expenses_report()["Expenses"].tolist() == [30.0, 30.0]
+    assert obj._expenses_report is not None
+
+    obj.add_expenses(all_expenses.iloc[6:])
+    assert obj.get_expenses_report()["Expenses"].tolist() == [30.0, 30.0, 30.0]
+
+    obj.add_expenses(
+        all_expenses.iloc[11:].assign(**{"Value date": datetime(2020, 3, 20)})
+    )
+    assert obj.get_expenses_report()["Expenses"].tolist() == [30.0, 30.0, 40.0]
+
+    obj.config = get_dummy_config_data
+    assert obj._expenses_report is None
+    assert obj.get_expenses_report()["Savings"].tolist() == [2970.0, 2970.0, 2960.0]
+
+
+@pytest.mark.parametrize("single_pass", [False, True])
+def test_add_child_expenses_with_any_index(get_dummy_config_data, single_pass):
+    """Test that the months are the same when the index is not the row positions."""
+
+    def _identifier(value, column="Payment Details"):
+        return {"value": value, "comparison_operator": "contains", "column": column}
+
+    config = dict(
+        get_dummy_config_data,
+        ignored={"logical_operator": "OR", "identifiers": [_identifier("refund")]},
+        savings={"logical_operator": "OR", "identifiers": [_identifier("vault")]},
+        expense_categories=[
+            {
+                "name": "Shopping",
+                "logical_operator": "OR",
+                "identifiers": [_identifier("shop")],
+            }
+        ],
+    )
+    expenses = _get_expenses_for_months(3)
+    expenses.loc[[2, 6], "Payment Details"] = "refund"
+    expenses.loc[[7, 11], "Payment Details"] = "vault"
+    shifted_expenses = expenses.set_index(expenses.index + 1000)
+    obj = overall_expense.OverallExpense(
+        expense=expenses, config=config, single_pass=single_pass
+    )
+    obj.add_child_expenses()
+    shifted_obj = overall_expense.OverallExpense(
+        expense=shifted_expenses, config=config, single_pass=single_pass
+    )
+    shifted_obj.add_child_expenses()
+
+    assert shifted_obj.get_expenses_report().equals(obj.get_expenses_report())
+    for month, month_expense in obj.child_expenses.items():
+        shifted_month = shifted_obj.child_expenses[month]
+        assert list(shifted_month.child_expenses) == list(month_expense.child_expenses)
+        for name, category in month_expense.child_expenses.items():
+            pd.testing.assert_frame_equal(
+                shifted_month.child_expenses[name].expense.reset_index(drop=True),
+                category.expense.reset_index(drop=True),
+            )
+        assert (shifted_obj.ignored_expenses[month].index - 1000).equals(
+            obj.ignored_expenses[month].index
+        )
+    assert shifted_obj.get_spending_matrix().equals(obj.get_spending_matrix())
+    found = shifted_obj.search(["refund"])
+    assert list(found.index) == [1002, 1006]
+    assert list(found["Month"]) == ["January-2020", "February-2020"]
+
+
+def test_add_expenses_takes_over_the_fingerprints(get_dummy_config_data, monkeypatch):
+    """Test that the fingerprints of the loaded transactions are not made again."""
+    all_expenses = _get_expenses_for_months(3)
+    fingerprints = fingerprint.FingerprintIndex()
+    expenses, _ = fingerprints.drop_duplicates(all_expenses.iloc[:8])
+    obj = overall_expense.OverallExpense(
+        expense=expenses, config=get_dummy_config_data, fingerprints=fingerprints
+    )
+    obj.add_child_expenses()
+
+    def _fail_to_fingerprint(transactions):
+        raise AssertionError("The loaded transactions were fingerprinted again")
+
+    monkeypatch.setattr(
+        fingerprint.FingerprintIndex, "from_transactions", _fail_to_fingerprint
+    )
+    rebuilt_months = obj.add_expenses(all_expenses.iloc[6:])
+
+    assert rebuilt_months == ["February-2020", "March-2020"]
+    assert obj.expense.equals(all_expenses)
+    assert len(fingerprints) == len(all_expenses)
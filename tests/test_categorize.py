@@ -0,0 +1,82 @@
+"""Test suite for the categorize module in the application."""
+import pandas as pd
+import pytest
+
+import expense_viewer.categorize as categorize
+
+
+@pytest.fixture(scope="module")
+def get_dummy_pandas_data():
+    """Create some dummy pandas data."""
+    return pd.DataFrame(
+        {
+            "Payment Details": ["REWE", "Lidl", "Shell", "Amazon", "REWE Shell"],
+            "Debit": [10.0, 20.0, 30.0, 40.0, 50.0],
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def get_dummy_config_data():
+    """Produce dummy config data for testing."""
+    return [
+        {
+            "name": "Groceries",
+            "logical_operator": "OR",
+            "identifiers": [
+                {
+                    "value": "REWE",
+                    "comparison_operator": "contains",
+                    "column": "Payment Details",
+                    "label": "Rewe",
+                },
+                {
+                    "value": "Lidl",
+                    "comparison_operator": "contains",
+                    "column": "Payment Details",
+                },
+            ],
+        },
+        {
+            "name": "Fuel",
+            "logical_operator": "OR",
+            "identifiers": [
+                {
+                    "value": "Shell",
+                    "comparison_operator": "contains",
+                    "column": "Payment Details",
+                    "label": "Shell",
+                }
+            ],
+        },
+    ]
+
+
+def test_get_category_matches(get_dummy_pandas_data, get_dummy_config_data):
+    """Test that every category gets a boolean column of matches."""
+    matches = categorize.get_category_matches(
+        get_dummy_pandas_data, get_dummy_config_data
+    )
+    assert list(matches.columns) == [0, 1]
+    assert list(matches[0]) == [True, True, False, False, True]
+    assert list(matches[1]) == [False, False, True, False, True]
+
+
+def test_label_transactions(get_dummy_pandas_data, get_dummy_config_data):
+    """Test that the first matching category and label is assigned to every row."""
+    labels = categorize.label_transactions(get_dummy_pandas_data, get_dummy_config_data)
+    assert list(labels[categorize.CATEGORY_COLUMN]) == [
+        "Groceries",
+        "Groceries",
+        "Fuel",
+        "Miscellaneous",
+        "Groceries",
+    ]
+    assert list(labels[categorize.SUB_CATEGORY_COLUMN]) == [
+        "Rewe",
+        None,
+        "Shell",
+        None,
+        "Rewe",
+    ]
+    assert list(labels["Matches"]) == [1, 1, 1, 0, 2]
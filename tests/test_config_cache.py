@@ -0,0 +1,151 @@
+"""Test suite for the config_cache.py module."""
+import collections
+
+import omegaconf
+import pandas as pd
+import pytest
+
+import expense_viewer.config_cache as config_cache
+import expense_viewer.exceptions as exceptions
+import expense_viewer.main as main
+import expense_viewer.rules as rules
+
+_CONFIG = """
+salary:
+  logical_operator: OR
+  identifiers:
+    - value: 2500.0
+      comparison_operator: ">"
+      column: Credit
+expense_categories:
+  - name: Groceries
+    logical_operator: OR
+    identifiers:
+      - value: Rewe
+        comparison_operator: contains
+        column: Payment Details
+        label: Rewe
+savings:
+  logical_operator: AND
+  identifiers:
+    - value: Vault
+      comparison_operator: contains
+      column: Payment Details
+"""
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """Write a config file and start with no configs loaded by the process."""
+    monkeypatch.setattr(config_cache, "_loaded_rule_configs", collections.OrderedDict())
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(_CONFIG)
+    return config_file
+
+
+def _fail_to_parse(*args, **kwargs):
+    raise AssertionError("The config is parsed again")
+
+
+def test_load_config(config_file, monkeypatch):
+    """Test that a config is only parsed once by the process."""
+    rule_config = config_cache.load_config(config_file)
+
+    assert rule_config == rules.parse_config(omegaconf.OmegaConf.load(config_file))
+    assert rule_config.savings.logical_operator == "AND"
+    monkeypatch.setattr(omegaconf.OmegaConf, "load", _fail_to_parse)
+    assert config_cache.load_config(str(config_file)) is rule_config
+
+
+def test_load_config_from_the_cache_dir(config_file, tmp_path, monkeypatch):
+    """Test that the next run reads the rules from the cache until they change."""
+    cache_dir = tmp_path / "cache"
+    rule_config = config_cache.load_config(config_file, cache_dir=cache_dir)
+    monkeypatch.setattr(config_cache, "_loaded_rule_configs", collections.OrderedDict())
+
+    with monkeypatch.context() as patched:
+        patched.setattr(omegaconf.OmegaConf, "load", _fail_to_parse)
+        assert config_cache.load_config(config_file, cache_dir=cache_dir) == (
+            rule_config
+        )
+
+    config_file.write_text(_CONFIG.replace("Rewe", "Lidl"))
+    changed_rule_config = config_cache.load_config(config_file, cache_dir=cache_dir)
+    assert changed_rule_config.expense_categories[0].identifiers[0].value == "Lidl"
+    assert len(list(cache_dir.glob("*.json"))) == 2
+
+
+def test_load_config_with_broken_cache(config_file, tmp_path):
+    """Test that a cached config which can not be read is parsed again."""
+    cache_dir = tmp_path / "cache"
+    rule_config = config_cache.load_config(config_file, cache_dir=cache_dir)
+    config_cache._loaded_rule_configs.clear()
+    for cache_file in cache_dir.glob("*.json"):
+        cache_file.write_text("{")
+
+    assert config_cache.load_config(config_file, cache_dir=cache_dir) == rule_config
+
+
+def test_load_config_keeps_the_last_configs(config_file, monkeypatch):
+    """Test that only the rules of the most recently loaded configs are kept."""
+    monkeypatch.setattr(config_cache, "MAX_LOADED_CONFIGS", 2)
+    other_config_files = []
+    for value in ("Lidl", "Aldi"):
+        other_config_file = config_file.with_name(f"{value}.yaml")
+        other_config_file.write_text(_CONFIG.replace("Rewe", value))
+        other_config_files.append(other_config_file)
+
+    rule_config = config_cache.load_config(config_file)
+    config_cache.load_config(other_config_files[0])
+    assert config_cache.load_config(config_file) is rule_config
+    config_cache.load_config(other_config_files[1])
+
+    assert len(config_cache._loaded_rule_configs) == 2
+    assert config_cache.load_config(config_file) is rule_config
+    monkeypatch.setattr(omegaconf.OmegaConf, "load", _fail_to_parse)
+    with pytest.raises(AssertionError):
+        config_cache.load_config(other_config_files[0])
+
+
+def test_load_invalid_config(config_file):
+    """Test that the rules are validated when the config is loaded."""
+    config_file.write_text(_CONFIG.replace('">"', '"like"'))
+
+    with pytest.raises(exceptions.InvalidRuleError):
+        config_cache.load_config(config_file)
+
+
+def test_get_expense_report_reads_the_cached_config(config_file, tmp_path, monkeypatch):
+    """Test that the config cached in the cache directory is used by the next run."""
+    statement_dir = tmp_path / "statements"
+    statement_dir.mkdir()
+    pd.DataFrame(
+        {
+            "Type": ["TOPUP", "CARD_PAYMENT"],
+            "Completed Date": ["2021-01-01 10:00:00", "2021-01-05 10:00:00"],
+            "Description": ["Salary", "Rewe"],
+            "Amount": [3000.0, -10.0],
+        }
+    ).to_csv(statement_dir / "statement.csv", index=False)
+    cache_dir = tmp_path / "cache"
+
+    def get_expense_report():
+        return main.get_expense_report(
+            str(config_file), str(statement_dir), "Revolut", cache_dir=str(cache_dir)
+        )
+
+    expense = get_expense_report()
+    # The cleanup of the cached statements keeps the cached config
+    monkeypatch.setattr(config_cache, "_loaded_rule_configs", collections.OrderedDict())
+    monkeypatch.setattr(omegaconf.OmegaConf, "load", _fail_to_parse)
+    cached_expense = get_expense_report()
+
+    pd.testing.assert_frame_equal(
+        cached_expense.get_expenses_report(), expense.get_expenses_report()
+    )
+    assert len(list(cache_dir.glob("**/*.json"))) == 1
+    # The config of the expenses is the config file and not the converted rules
+    assert cached_expense.config["expense_categories"][0]["name"] == "Groceries"
+    category = cached_expense.child_expenses["January-2021"].child_expenses["Groceries"]
+    assert category.config["name"] == "Groceries"
+    assert category.child_expenses["Rewe"].config["value"] == "Rewe"
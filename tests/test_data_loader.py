@@ -6,6 +6,7 @@ import pytest
 
 import expense_viewer.exceptions as exceptions
 import expense_viewer.data_loader as loader
+import expense_viewer.fingerprint as fingerprint
 
 
 def test_check_format_of_salary_statement_for_correct_format():
@@ -59,3 +60,329 @@ def test_load_details_from_expense_stmt(tmp_path):
     for column_name in expected_output.columns:
         assert output[column_name].dtype == expected_output[column_name].dtype
         assert list(expected_output[column_name]) == list(output[column_name])
+
+
+def _load_dummy_statement(expense_statement):
+    """Load a simple csv file and count how often it was parsed."""
+    _load_dummy_statement.calls += 1
+    return pd.read_csv(expense_statement, parse_dates=["Value date"])
+
+
+@pytest.fixture
+def dummy_statement(tmp_path):
+    """Write a simple csv statement."""
+    _load_dummy_statement.calls = 0
+    statement = tmp_path / "statement.csv"
+    pd.DataFrame(
+        {
+            "Payment Details": ["Some description1", None],
+            "Debit": [100.0, 0.0],
+            "Credit": [0.0, 3300.0],
+            "Value date": [pd.to_datetime("05/18/2020"), pd.to_datetime("06/23/2020")],
+        }
+    ).to_csv(statement, index=False)
+    return statement
+
+
+def test_statement_cache_load(tmp_path, dummy_statement):
+    """Test that an unchanged statement is only parsed once."""
+    pytest.importorskip("pyarrow")
+    cache = loader.StatementCache(tmp_path / "cache")
+
+    first = cache.load(dummy_statement, _load_dummy_statement)
+    second = cache.load(dummy_statement, _load_dummy_statement)
+
+    assert _load_dummy_statement.calls == 1
+    assert first.equals(second)
+    assert second["Payment Details"].isna().tolist() == [False, True]
+
+    dummy_statement.write_text(dummy_statement.read_text().replace("100.0", "90.0"))
+    changed = cache.load(dummy_statement, _load_dummy_statement)
+
+    assert _load_dummy_statement.calls == 2
+    assert changed["Debit"].tolist() == [90.0, 0.0]
+
+
+def test_statement_cache_cleanup(tmp_path, dummy_statement):
+    """Test that stale statements are removed and the cache keeps its size."""
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+    cache = loader.StatementCache(cache_dir, max_size_bytes=0)
+    stale_statement = cache_dir / f"_load_dummy_statement-v0-{'0' * 64}.feather"
+    stale_statement.write_bytes(b"stale")
+    temporary_file = cache_dir / f".{'0' * 32}.tmp"
+    temporary_file.write_bytes(b"half written")
+    # The other files of a shared directory are kept
+    other_files = [
+        cache_dir / "notes.txt",
+        cache_dir / "report.feather",
+        cache_dir / "_load_dummy_statement-v0-abc.feather",
+    ]
+    for other_file in other_files:
+        other_file.write_bytes(b"other")
+
+    cache.load(dummy_statement, _load_dummy_statement)
+    cache_path = cache.get_cache_path(dummy_statement, _load_dummy_statement)
+    assert cache_path.exists()
+
+    cache.cleanup()
+    assert not stale_statement.exists()
+    assert not temporary_file.exists()
+    assert not cache_path.exists()
+    assert all(other_file.exists() for other_file in other_files)
+
+
+def test_load_data_from_all_expense_stmts_with_cache(tmp_path, dummy_statement):
+    """Test that the statements are loaded through the cache when one is given."""
+    pytest.importorskip("pyarrow")
+    cache = loader.StatementCache(tmp_path / "cache")
+
+    for _ in range(2):
+        output = loader.load_data_from_all_expense_stmts(
+            [dummy_statement], callable=_load_dummy_statement, cache=cache
+        )
+
+    assert _load_dummy_statement.calls == 1
+    assert output["Credit"].tolist() == [0.0, 3300.0]
+
+
+@pytest.fixture
+def revolut_statements(tmp_path):
+    """Write a few revolut statements having transactions on the same dates."""
+    statement_dir = tmp_path / "revolut"
+    statement_dir.mkdir()
+    for month in range(1, 7):
+        pd.DataFrame(
+            {
+                "Type": ["CARD_PAYMENT", "TOPUP", "CARD_PAYMENT"],
+                "Completed Date": [f"2021-{month:02d}-05 10:00:00"] * 3,
+                "Description": [f"Shop {month}", "Top-Up", f"Cafe {month}"],
+                "Amount": [-10.5 * month, 100.0, -2.0],
+            }
+        ).to_csv(statement_dir / f"statement_{month}.csv", index=False)
+    return statement_dir
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_load_data_from_all_expense_stmts_in_parallel(
+    revolut_statements, use_processes
+):
+    """Test that loading the statements in parallel gives the same result."""
+    sequential = loader.load_data_from_all_expense_stmts(
+        revolut_statements.glob("*"), callable=loader._data_loader_revolut
+    )
+    parallel = loader.load_data_from_all_expense_stmts(
+        revolut_statements.glob("*"),
+        callable=loader._data_loader_revolut,
+        max_workers=3,
+        use_processes=use_processes,
+    )
+
+    assert len(parallel.index) == 18
+    assert parallel.equals(sequential)
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_load_data_from_all_expense_stmts_in_parallel_for_wrong_statement(
+    revolut_statements, use_processes
+):
+    """Test that a statement which can not be loaded is reported with its path."""
+    wrong_statement = revolut_statements / "statement_3.csv"
+    wrong_statement.write_text("Not;a;revolut;statement\n")
+
+    with pytest.raises(exceptions.CouldNotLoadSalaryStmtError) as error:
+        loader.load_data_from_all_expense_stmts(
+            revolut_statements.glob("*"),
+            callable=loader._data_loader_revolut,
+            max_workers=3,
+            use_processes=use_processes,
+        )
+    assert str(wrong_statement) in error.value.message
+
+
+@pytest.fixture
+def deutsche_bank_statement(tmp_path):
+    """Write a deutsche bank statement with all the columns and the footer."""
+    statement = tmp_path / "deutsche_bank.csv"
+    rows = [
+        ["Transactions Giro Account"],
+        [],
+        ["Old balance:", "", "1,000.00", "EUR"],
+        ["Transactions"],
+        [
+            "Value date",
+            "Transaction Type",
+            "Beneficiary / Originator",
+            "Payment Details",
+            "IBAN",
+            "Debit",
+            "Credit",
+            "Currency",
+        ],
+    ]
+    for day in range(1, 26):
+        rows.append(
+            [
+                f"05/{day:02d}/2020",
+                "Debit Card Payment",
+                f"Shop {day % 4}",
+                f"Payment {day}",
+                "DE12345",
+                f"-1,{day:03d}.50",
+                "",
+                "EUR",
+            ]
+        )
+    rows.append(["Account balance", "", "", "", "", "", "3,000.00", "EUR"])
+    with open(statement, "w", encoding="latin-1", newline="") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        writer.writerows(rows)
+    return statement
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 25, 100])
+def test_data_loader_deutsche_bank_in_chunks(deutsche_bank_statement, chunksize):
+    """Test that loading a statement in chunks gives the same transactions."""
+    output = loader._data_loader_deutsche_bank(deutsche_bank_statement)
+    output_in_chunks = loader._data_loader_deutsche_bank(
+        deutsche_bank_statement, chunksize=chunksize
+    )
+
+    assert len(output.index) == 25
+    assert output["Debit"].iloc[0] == 1001.5
+    assert output_in_chunks.equals(output)
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 100])
+def test_data_loader_revolut_in_chunks(revolut_statements, chunksize):
+    """Test that loading a revolut statement in chunks gives the same transactions."""
+    statement = revolut_statements / "statement_1.csv"
+    output = loader._data_loader_revolut(statement)
+    output_in_chunks = loader._data_loader_revolut(statement, chunksize=chunksize)
+
+    assert output_in_chunks.equals(output)
+
+
+def test_data_loader_deutsche_bank_german(tmp_path):
+    """Test loading a deutsche bank statement exported in german."""
+    statement = tmp_path / "deutsche_bank_german.csv"
+    rows = [
+        ["Umsätze Girokonto"],
+        [],
+        ["Alter Kontostand:", "", "1.000,00", "EUR"],
+        ["Umsätze"],
+        [
+            "Wert",
+            "Umsatzart",
+            "Begünstigter / Auftraggeber",
+            "Verwendungszweck",
+            "IBAN",
+            "Soll",
+            "Haben",
+            "Währung",
+        ],
+        ["18.05.2020", "Lastschrift", "Shop", "Einkauf", "DE1", "-1.234", "", "EUR"],
+        ["01.06.2020", "Gutschrift", "Firma", "Gehalt", "DE2", "", "3.300,50", "EUR"],
+        ["", "Kontostand", "", "", "", "", "3.066,50", "EUR"],
+    ]
+    with open(statement, "w", encoding="latin") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        for row in rows:
+            writer.writerow(row)
+
+    output = loader._data_loader_deutsche_bank_german(statement)
+
+    assert set(output.columns) == set(loader._DEUTSCHE_BANK_COLUMNS)
+    assert list(output["Debit"]) == [1234.0, 0.0]
+    assert list(output["Credit"]) == [0.0, 3300.5]
+    assert list(output["Value date"]) == [
+        pd.Timestamp("2020-05-18"),
+        pd.Timestamp("2020-06-01"),
+    ]
+
+
+def test_load_data_from_all_expense_stmts_compact(revolut_statements):
+    """Test that the compact statements have the same transactions."""
+    output = loader.load_data_from_all_expense_stmts(
+        revolut_statements.glob("*"), callable=loader._data_loader_revolut
+    )
+    compact_output = loader.load_data_from_all_expense_stmts(
+        revolut_statements.glob("*"),
+        callable=loader._data_loader_revolut,
+        compact=True,
+    )
+
+    assert compact_output["Transaction Type"].dtype == "category"
+    assert compact_output.astype(object).equals(output.astype(object))
+
+
+def test_load_data_from_all_expense_stmts_in_minor_units(revolut_statements):
+    """Test that the amounts are loaded as cents."""
+    output = loader.load_data_from_all_expense_stmts(
+        revolut_statements.glob("*"),
+        callable=loader._data_loader_revolut,
+        minor_units=True,
+    )
+
+    assert output["Debit"].dtype == "int64"
+    assert output["Debit"].iloc[0] == 1050
+    assert output["Credit"].iloc[1] == 10000
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_load_data_from_all_sources(
+    deutsche_bank_statement, revolut_statements, max_workers
+):
+    """Test that the statements of all the sources are merged and tagged."""
+    deutsche_bank_dir = deutsche_bank_statement.parent / "deutsche_bank"
+    deutsche_bank_dir.mkdir()
+    deutsche_bank_statement.rename(deutsche_bank_dir / deutsche_bank_statement.name)
+    revolut_pattern = str(revolut_statements / "statement_[1-2].csv")
+    sources = {
+        str(deutsche_bank_dir): "Deutsche Bank",
+        revolut_pattern: "Revolut",
+    }
+
+    output = loader.load_data_from_all_sources(sources, max_workers=max_workers)
+
+    assert len(output.index) == 25 + 6
+    assert output["Source"].value_counts().to_dict() == {
+        str(deutsche_bank_dir): 25,
+        revolut_pattern: 6,
+    }
+    assert output["Value date"].is_monotonic_increasing
+    assert output.loc[output["Source"] == revolut_pattern, "IBAN"].isna().all()
+
+
+def test_load_data_from_all_sources_for_unknown_bank(revolut_statements):
+    """Test that a source of a bank which is not supported is not loaded."""
+    with pytest.raises(exceptions.BankNotSupportedError):
+        loader.load_data_from_all_sources({str(revolut_statements): "Unknown Bank"})
+
+
+def test_get_statement_paths_without_statements(tmp_path):
+    """Test that a source without any statements is an error."""
+    with pytest.raises(exceptions.FileOrDirectoryNotFound):
+        loader.get_statement_paths(tmp_path / "*.csv")
+
+
+def test_load_data_from_all_expense_stmts_drops_overlapping_transactions(
+    revolut_statements,
+):
+    """Test that the transactions of overlapping statements are only loaded once."""
+    statement = revolut_statements / "statement_1.csv"
+    overlapping_statement = revolut_statements / "statement_1_again.csv"
+    overlapping_statement.write_bytes(statement.read_bytes())
+    fingerprints = fingerprint.FingerprintIndex()
+
+    output = loader.load_data_from_all_expense_stmts(
+        [statement, overlapping_statement],
+        callable=loader._data_loader_revolut,
+        fingerprints=fingerprints,
+    )
+
+    assert len(output.index) == 3
+    assert fingerprints.dropped_duplicates == {
+        str(statement): 0,
+        str(overlapping_statement): 3,
+    }
@@ -0,0 +1,283 @@
+"""Test suite for the database.py module."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import expense_viewer.categorize as categorize
+import expense_viewer.database as database_lib
+import expense_viewer.exceptions as exceptions
+import expense_viewer.expense.overall_expense as overall_expense
+import expense_viewer.normalize as normalize
+import expense_viewer.utils as utils
+
+
+@pytest.fixture
+def get_transactions():
+    """Produce normalized transactions of two months with missing values."""
+    return pd.DataFrame(
+        {
+            "Value date": [
+                datetime(2020, 5, 1),
+                datetime(2020, 5, 3),
+                datetime(2020, 5, 4),
+                datetime(2020, 5, 20),
+                datetime(2020, 5, 28),
+                datetime(2020, 6, 1),
+                datetime(2020, 6, 2),
+                datetime(2020, 6, 5),
+            ],
+            "Beneficiary / Originator": [
+                "ACME GmbH",
+                "REWE Markt GmbH",
+                None,
+                "Shell Deutschland",
+                "Own Account",
+                "ACME GmbH",
+                "rewe city",
+                "Amazon EU",
+            ],
+            "Payment Details": [
+                "Salary",
+                "REWE Markt Berlin",
+                "Lidl",
+                "Shell Tankstelle",
+                "Transfer to vault",
+                "Salary",
+                "REWE City",
+                None,
+            ],
+            "Debit": [0.0, 10.5, 20.0, 30.25, 100.0, 0.0, 40.0, 50.0],
+            "Credit": [2500.0, 0.0, 0.0, 0.0, 0.0, 2500.0, 0.0, 0.0],
+        }
+    )
+
+
+@pytest.fixture
+def get_config():
+    """Produce a config with savings, a case insensitive and a regex keyword."""
+    return {
+        "salary": {
+            "logical_operator": "OR",
+            "identifiers": [
+                {"value": 1000.0, "comparison_operator": ">", "column": "Credit"}
+            ],
+        },
+        "savings": {
+            "logical_operator": "OR",
+            "identifiers": [
+                {
+                    "value": "vault",
+                    "comparison_operator": "contains",
+                    "column": "Payment Details",
+                }
+            ],
+        },
+        "expense_categories": [
+            {
+                "name": "Groceries",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "rewe",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Rewe",
+                        "case_sensitive": False,
+                    },
+                    {
+                        "value": "Li.l",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Lidl",
+                    },
+                ],
+            },
+            {
+                "name": "Fuel",
+                "logical_operator": "AND",
+                "identifiers": [
+                    {
+                        "value": "Shell",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                    },
+                    {"value": 20.0, "comparison_operator": ">=", "column": "Debit"},
+                ],
+            },
+        ],
+    }
+
+
+@pytest.fixture
+def get_database(get_transactions):
+    """Produce a database in memory having the transactions."""
+    with database_lib.TransactionDatabase(":memory:") as database:
+        database.write_transactions(get_transactions)
+        yield database
+
+
+def test_read_transactions(tmp_path, get_transactions):
+    """Test that the transactions are read back with their types."""
+    transactions = normalize.compact_transactions(
+        normalize.to_minor_units(get_transactions)
+    )
+    database_path = tmp_path / "transactions.db"
+    with database_lib.TransactionDatabase(database_path) as database:
+        database.write_transactions(transactions)
+
+    with database_lib.TransactionDatabase(database_path) as database:
+        assert len(database) == 8
+        assert database.columns.tolist() == transactions.columns.tolist()
+        pd.testing.assert_series_equal(database["Debit"], transactions["Debit"])
+        pd.testing.assert_frame_equal(database.select_rows(np.arange(8)), transactions)
+        pd.testing.assert_frame_equal(
+            database.select_rows(np.array([1, 3, 7])),
+            transactions.iloc[[1, 3, 7]],
+        )
+        assert database.get_debit_sum(np.array([1, 2])) == 3050
+        with pytest.raises(KeyError):
+            database["Amount"]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        pd.Series(["REWE", 10, None]),
+        pd.Series(pd.date_range("2020-05-01", periods=3, tz="Europe/Berlin")),
+    ],
+)
+def test_write_unsupported_column(values):
+    """Test that the columns which can not be written are told apart."""
+    with database_lib.TransactionDatabase(":memory:") as database:
+        with pytest.raises(exceptions.UnsupportedColumnError):
+            database.write_transactions(pd.DataFrame({"Column": values}))
+
+
+def test_get_matches(get_transactions, get_config, get_database):
+    """Test that the rules evaluated in SQL match the same transactions."""
+    categories = get_config["expense_categories"]
+    rows = np.array([1, 2, 3, 6, 7])
+    category_matches, sub_category_matches = get_database.get_matches(rows, categories)
+    transactions = get_transactions.iloc[rows].set_index(pd.Index(rows))
+
+    pd.testing.assert_frame_equal(
+        category_matches, categorize.get_category_matches(transactions, categories)
+    )
+    for position, category in enumerate(categories):
+        pd.testing.assert_frame_equal(
+            sub_category_matches[position],
+            categorize.get_sub_category_matches(transactions, category),
+        )
+    assert get_database.match_rows(get_config["savings"]).tolist() == [
+        False,
+        False,
+        False,
+        False,
+        True,
+        False,
+        False,
+        False,
+    ]
+
+
+def _fail_to_read_column(database, column):
+    raise AssertionError(f"The whole column {column} is read from the database")
+
+
+@pytest.mark.parametrize("ignored", [None, np.array([False] * 6 + [True, False])])
+@pytest.mark.parametrize("salary_row_indexes", [[0, 5], [3], [7], []])
+def test_get_month_segments(
+    get_transactions, get_database, salary_row_indexes, ignored, monkeypatch
+):
+    """Test that the months divided by the database are the same."""
+    monkeypatch.setattr(
+        database_lib.TransactionDatabase, "__getitem__", _fail_to_read_column
+    )
+
+    pd.testing.assert_frame_equal(
+        get_database.get_month_segments(salary_row_indexes, ignored=ignored),
+        utils.get_month_segments(get_transactions, salary_row_indexes, ignored=ignored),
+    )
+
+
+def test_overall_expense_from_database(
+    tmp_path, get_transactions, get_config, monkeypatch
+):
+    """Test that the expenses of the database are the same and their labels kept."""
+    database_path = tmp_path / "transactions.db"
+    with database_lib.TransactionDatabase(database_path) as database:
+        database.write_transactions(get_transactions)
+    expense = overall_expense.OverallExpense(
+        expense=get_transactions, config=get_config
+    )
+    expense.add_child_expenses()
+    # Only the rows which the expenses need are read from the database
+    monkeypatch.setattr(
+        database_lib.TransactionDatabase, "__getitem__", _fail_to_read_column
+    )
+    database_expense = overall_expense.OverallExpense.from_database(
+        database_path, get_config
+    )
+    database_expense.add_child_expenses()
+
+    pd.testing.assert_frame_equal(
+        database_expense.get_expenses_report(), expense.get_expenses_report()
+    )
+    for options in [
+        dict(),
+        dict(start="2020-05-04", end="2020-06-02"),
+        dict(sub_categories=True),
+    ]:
+        pd.testing.assert_frame_equal(
+            database_expense.get_spending_matrix(**options),
+            expense.get_spending_matrix(**options),
+        )
+    for label, month in expense.child_expenses.items():
+        database_month = database_expense.child_expenses[label]
+        assert list(database_month.child_expenses) == list(month.child_expenses)
+        for name, category in month.child_expenses.items():
+            database_category = database_month.child_expenses[name]
+            pd.testing.assert_frame_equal(database_category.expense, category.expense)
+            assert list(database_category.child_expenses) == list(
+                category.child_expenses
+            )
+
+    totals = database_expense.expense.query(
+        "SELECT Month, Category, SUM(Debit) AS Total FROM transactions "
+        "JOIN labels USING (Row) WHERE Category IS NOT NULL "
+        "GROUP BY Month, Category ORDER BY Month, Category"
+    )
+    assert totals.values.tolist() == [
+        ["June-2020", "Groceries", 40.0],
+        ["June-2020", "Miscellaneous", 50.0],
+        ["May-2020", "Fuel", 30.25],
+        ["May-2020", "Groceries", 30.5],
+    ]
+    with pytest.raises(NotImplementedError):
+        database_expense.add_expenses(get_transactions)
+
+
+def test_search(get_transactions, get_config, get_database):
+    """Test that the full text index finds the same transactions as the search."""
+    expense = overall_expense.OverallExpense(
+        expense=get_transactions, config=get_config
+    )
+    expense.add_child_expenses()
+    database_expense = overall_expense.OverallExpense(
+        expense=get_database, config=get_config
+    )
+    database_expense.add_child_expenses()
+
+    assert get_database.search(["REWE"]).tolist() == [1, 6]
+    assert get_database.search(["rewe markt", "shell"]).tolist() == [1, 3]
+    assert get_database.search(["Markt Berlin"]).tolist() == [1]
+    assert get_database.search(["markt"], columns=["Payment Details"]).tolist() == [1]
+    assert get_database.search(["..."]).tolist() == []
+    with pytest.raises(KeyError):
+        get_database.search(["REWE"], columns=["IBAN"])
+    pd.testing.assert_frame_equal(
+        database_expense.search(["rewe", "amazon"], months="2020"),
+        expense.search(["rewe", "amazon"], months="2020"),
+    )
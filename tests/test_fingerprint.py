@@ -0,0 +1,62 @@
+"""Test suite for the fingerprint.py module."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import expense_viewer.fingerprint as fingerprint
+
+
+@pytest.fixture
+def transactions():
+    """Produce a few transactions, the last one being the same as the first."""
+    return pd.DataFrame(
+        {
+            "Value date": pd.to_datetime(["2020-05-18", "2020-05-18", "2020-05-18"]),
+            "Payment Details": ["Rewe", "Rewe", "Rewe"],
+            "IBAN": ["DE1", np.nan, "DE1"],
+            "Debit": [10.0, 10.0, 10.0],
+            "Credit": [0.0, 0.0, 0.0],
+        }
+    )
+
+
+def test_fingerprint_transactions(transactions):
+    """Test that only the same transactions have the same fingerprint."""
+    fingerprints = fingerprint.fingerprint_transactions(transactions)
+
+    assert fingerprints.dtype == np.uint64
+    assert fingerprints[0] == fingerprints[2]
+    assert fingerprints[0] != fingerprints[1]
+
+
+def test_fingerprint_transactions_does_not_depend_on_the_dtypes(transactions):
+    """Test that the fingerprint only depends on the values of the transactions."""
+    fingerprints = fingerprint.fingerprint_transactions(transactions)
+    other_transactions = transactions[transactions.columns[::-1]].astype(
+        {"Payment Details": "category", "IBAN": "string"}
+    )
+    # A missing column is the same as a column of missing values
+    other_transactions["Beneficiary / Originator"] = np.nan
+
+    assert list(fingerprint.fingerprint_transactions(other_transactions)) == list(
+        fingerprints
+    )
+
+
+def test_fingerprint_index_drop_duplicates(transactions):
+    """Test that the transactions are only kept the first time they are seen."""
+    index = fingerprint.FingerprintIndex()
+
+    output, fingerprints = index.drop_duplicates(transactions, name="first.csv")
+
+    assert list(output.index) == [0, 1]
+    assert len(index) == 2
+    assert list(index.contains(fingerprints)) == [True, True]
+
+    new_transactions = transactions.copy()
+    new_transactions.loc[2, "Debit"] = 20.0
+    output, _ = index.drop_duplicates(new_transactions, name="second.csv")
+
+    assert list(output.index) == [2]
+    assert len(index) == 3
+    assert index.dropped_duplicates == {"first.csv": 1, "second.csv": 2}
@@ -0,0 +1,50 @@
+"""Test suite for the __init__.py module."""
+import subprocess
+import sys
+
+import pytest
+
+import expense_viewer
+
+
+def _run(statement: str) -> str:
+    """Run the statement in a fresh interpreter and get what it printed."""
+    return subprocess.run(
+        [sys.executable, "-c", statement], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def test_import_does_not_import_the_dependencies():
+    """Test that the package is imported without pandas and the other modules."""
+    imported = _run(
+        "import sys, expense_viewer; "
+        "print(sorted(module for module in sys.modules "
+        "if module.split('.')[0] in ('pandas', 'numpy', 'omegaconf', 'dateutil') "
+        "or module.startswith('expense_viewer.')))"
+    )
+
+    assert imported.strip() == "[]"
+
+
+def test_exports_are_imported_when_used():
+    """Test that the exported functions are the ones of the main module."""
+    import expense_viewer.main as main
+
+    assert expense_viewer.get_expense_report is main.get_expense_report
+    assert expense_viewer.get_combined_expense_report is (
+        main.get_combined_expense_report
+    )
+    assert expense_viewer.stats is sys.modules["expense_viewer.stats"]
+    assert set(expense_viewer.__all__) <= set(dir(expense_viewer))
+    with pytest.raises(AttributeError):
+        expense_viewer.get_expenses
+
+
+def test_from_import_of_an_export():
+    """Test that the exports can be imported by name from a fresh interpreter."""
+    module = _run(
+        "from expense_viewer import get_expense_report; "
+        "print(get_expense_report.__module__)"
+    )
+
+    assert module.strip() == "expense_viewer.main"
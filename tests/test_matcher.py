@@ -0,0 +1,53 @@
+"""Test suite for the matcher module in the application."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import expense_viewer.matcher as matcher
+
+
+@pytest.fixture(scope="module")
+def get_dummy_keyword_matcher():
+    """Create a keyword matcher with overlapping keywords."""
+    return matcher.KeywordMatcher(
+        {
+            "rewe": matcher.Keyword("REWE"),
+            "rewe_markt": matcher.Keyword("EWE Markt"),
+            "literal": matcher.Keyword("a.b", regex=False),
+            "amazon": matcher.Keyword("amazon", case_sensitive=False),
+            "insurance": matcher.Keyword("ADAC|AXA"),
+            "repeated": matcher.Keyword(r"(x)\1"),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "text, expected_ids",
+    [
+        ("REWE Markt Berlin", {"rewe", "rewe_markt"}),
+        ("a.b", {"literal"}),
+        ("axb", set()),
+        ("AMAZON Prime", {"amazon"}),
+        ("AXA and ADAC", {"insurance"}),
+        ("xx and a.b", {"repeated", "literal"}),
+    ],
+)
+def test_find(text, expected_ids, get_dummy_keyword_matcher):
+    """Test that all the keywords in a text are found."""
+    assert get_dummy_keyword_matcher.find(text) == expected_ids
+
+
+def test_match(get_dummy_keyword_matcher):
+    """Test that the keywords are found for every row and missing values match nothing."""
+    values = pd.Series(["REWE Markt", None, "Amazon", np.nan, "REWE Markt"])
+    matches = get_dummy_keyword_matcher.match(values)
+
+    assert list(matches.keyword_ids()) == [
+        {"rewe", "rewe_markt"},
+        set(),
+        {"amazon"},
+        set(),
+        {"rewe", "rewe_markt"},
+    ]
+    assert list(matches.mask("rewe")) == [True, False, False, False, True]
+    assert list(matches.mask("literal")) == [False] * 5
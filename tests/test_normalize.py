@@ -0,0 +1,138 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import expense_viewer.normalize as normalize
+
+
+@pytest.mark.parametrize(
+    "values, thousands, decimal, expected",
+    [
+        (["1,234.56", "-3,300", " 12.5 "], ",", ".", [1234.56, -3300.0, 12.5]),
+        (["1.234,56", "-3.300", "12,5"], ".", ",", [1234.56, -3300.0, 12.5]),
+        ([1, 2, 3], ",", ".", [1.0, 2.0, 3.0]),
+    ],
+)
+def test_parse_amounts(values, thousands, decimal, expected):
+    """Test that the amounts are parsed with the given separators."""
+    output = normalize.parse_amounts(
+        pd.Series(values), thousands=thousands, decimal=decimal
+    )
+
+    assert output.dtype == "float64"
+    assert list(output) == expected
+
+
+def test_parse_amounts_keeps_missing_values():
+    """Test that the missing amounts stay missing."""
+    output = normalize.parse_amounts(pd.Series(["1,000.00", np.nan], dtype=object))
+
+    assert output.iloc[0] == 1000.0
+    assert np.isnan(output.iloc[1])
+
+
+def test_parse_amounts_for_invalid_amount():
+    """Test that an amount which is not a number raises an error."""
+    with pytest.raises(ValueError):
+        normalize.parse_amounts(pd.Series(["1,000.00", "abc"]))
+
+
+def test_parse_dates_falls_back_to_inferring_the_format():
+    """Test that dates in an unexpected format are still parsed."""
+    output = normalize.parse_dates(
+        pd.Series(["2020-05-18", "2020-06-23"]), date_format="%m/%d/%Y"
+    )
+
+    assert list(output) == [pd.Timestamp("2020-05-18"), pd.Timestamp("2020-06-23")]
+
+
+def test_normalize_transactions_with_signed_amounts():
+    """Test that signed amounts are split into debits and credits."""
+    transactions = pd.DataFrame(
+        {
+            "Value date": ["2020-05-18 10:11:12", "2020-05-19 23:59:59"],
+            "Credit": [-12.5, 100.0],
+        }
+    )
+
+    output = normalize.normalize_transactions(
+        transactions,
+        date_format="%Y-%m-%d %H:%M:%S",
+        signed_amounts=True,
+        drop_time=True,
+    )
+
+    assert list(output["Debit"]) == [12.5, 0.0]
+    assert list(output["Credit"]) == [0.0, 100.0]
+    assert list(output["Value date"]) == [
+        pd.Timestamp("2020-05-18"),
+        pd.Timestamp("2020-05-19"),
+    ]
+
+
+def test_normalize_transactions_with_debit_and_credit():
+    """Test that missing amounts become zero and debits are positive."""
+    transactions = pd.DataFrame(
+        {
+            "Value date": ["05/18/2020", "06/23/2020"],
+            "Debit": ["-1,000.50", np.nan],
+            "Credit": [np.nan, "3,300"],
+        }
+    )
+
+    output = normalize.normalize_transactions(transactions, date_format="%m/%d/%Y")
+
+    assert list(output["Debit"]) == [1000.5, 0.0]
+    assert list(output["Credit"]) == [0.0, 3300.0]
+
+
+def test_compact_transactions():
+    """Test that the repeated and free text columns get the compact dtypes."""
+    transactions = pd.DataFrame(
+        {
+            "Transaction Type": ["Card", "Card", "Transfer"],
+            "Payment Details": ["Rewe", np.nan, "Salary"],
+            "Debit": [10.0, 2.0, 0.0],
+        }
+    )
+
+    output = normalize.compact_transactions(transactions)
+
+    assert output["Transaction Type"].dtype == "category"
+    assert list(output["Transaction Type"].cat.categories) == ["Card", "Transfer"]
+    assert output["Debit"].dtype == "float64"
+    if importlib.util.find_spec("pyarrow") is not None:
+        assert output["Payment Details"].dtype == "string[pyarrow]"
+    assert output["Payment Details"].isna().tolist() == [False, True, False]
+
+
+def test_concat_transactions_keeps_the_compact_dtypes():
+    """Test that categoricals having other categories stay categorical."""
+    first = normalize.compact_transactions(
+        pd.DataFrame({"Transaction Type": ["Card", "Card"], "Debit": [1.0, 2.0]})
+    )
+    second = normalize.compact_transactions(
+        pd.DataFrame({"Transaction Type": ["Transfer"], "Debit": [3.0]})
+    )
+    third = pd.DataFrame({"Transaction Type": ["Fee"], "Debit": [4.0]})
+
+    output = normalize.concat_transactions([first, second, third], ignore_index=True)
+
+    assert output["Transaction Type"].dtype == "category"
+    assert list(output["Transaction Type"]) == ["Card", "Card", "Transfer", "Fee"]
+    assert list(output["Debit"]) == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_to_minor_units():
+    """Test that the amounts become the exact number of cents."""
+    transactions = pd.DataFrame(
+        {"Debit": [0.1, 1234.56, 0.0], "Credit": [0.0, 0.0, 3300.29]}
+    )
+
+    output = normalize.to_minor_units(transactions)
+
+    assert output["Debit"].dtype == "int64"
+    assert list(output["Debit"]) == [10, 123456, 0]
+    assert list(output["Credit"]) == [0, 0, 330029]
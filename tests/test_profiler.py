@@ -0,0 +1,181 @@
+"""Test suite for the profiler.py module."""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import expense_viewer.categorize as categorize
+import expense_viewer.expense.overall_expense as overall_expense
+import expense_viewer.profiler as profiler_lib
+
+
+@pytest.fixture(scope="module")
+def get_transactions():
+    """Produce the transactions of two months, each starting with a salary."""
+    return pd.DataFrame(
+        {
+            "Payment Details": [
+                "Salary",
+                "REWE Markt",
+                "Lidl",
+                "Shell Tankstelle",
+                "Salary",
+                "REWE City",
+                "Amazon",
+            ],
+            "Debit": [0.0, 10.0, 20.0, 30.0, 0.0, 40.0, 50.0],
+            "Credit": [2500.0, 0.0, 0.0, 0.0, 2500.0, 0.0, 0.0],
+            "Value date": [
+                datetime(2020, 5, 1),
+                datetime(2020, 5, 3),
+                datetime(2020, 5, 4),
+                datetime(2020, 5, 20),
+                datetime(2020, 6, 1),
+                datetime(2020, 6, 2),
+                datetime(2020, 6, 5),
+            ],
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def get_config():
+    """Produce a config having an identifier which never matches."""
+    return {
+        "salary": {
+            "logical_operator": "OR",
+            "identifiers": [
+                {"value": 1000.0, "comparison_operator": ">", "column": "Credit"}
+            ],
+        },
+        "expense_categories": [
+            {
+                "name": "Groceries",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "REWE",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Rewe",
+                    },
+                    {
+                        "value": "Lidl",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                    },
+                    {
+                        "value": "Aldi",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Aldi",
+                    },
+                ],
+            },
+            {
+                "name": "Fuel",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "Shell",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                    }
+                ],
+            },
+        ],
+    }
+
+
+def _build(transactions, config, single_pass=False, profiler=None):
+    """Build the overall expense of the transactions."""
+    expense = overall_expense.OverallExpense(
+        expense=transactions, config=config, single_pass=single_pass, profiler=profiler
+    )
+    expense.add_child_expenses()
+    return expense
+
+
+@pytest.mark.parametrize("single_pass", [False, True])
+def test_profiler_keeps_the_categories(get_transactions, get_config, single_pass):
+    """Test that the expenses built with a profiler are the same."""
+    profiler = profiler_lib.RuleProfiler()
+    profiled = _build(
+        get_transactions, get_config, single_pass=single_pass, profiler=profiler
+    )
+    expense = _build(get_transactions, get_config, single_pass=single_pass)
+
+    pd.testing.assert_frame_equal(
+        profiled.get_expenses_report(), expense.get_expenses_report()
+    )
+    for label, month in expense.child_expenses.items():
+        for name, category in month.child_expenses.items():
+            profiled_category = profiled.child_expenses[label].child_expenses[name]
+            pd.testing.assert_frame_equal(profiled_category.expense, category.expense)
+            assert list(profiled_category.child_expenses) == list(
+                category.child_expenses
+            )
+    assert len(profiler.records) > 0
+
+
+def test_records_of_every_month(get_transactions, get_config):
+    """Test that every category and identifier is recorded for every month."""
+    profiler = profiler_lib.RuleProfiler()
+    _build(get_transactions, get_config, profiler=profiler)
+
+    records = profiler.to_frame()
+    categories = records[
+        (records["stage"] == profiler_lib.CATEGORY_STAGE) & records["identifier"].isna()
+    ]
+    assert categories["month"].tolist() == [
+        "May-2020",
+        "May-2020",
+        "June-2020",
+        "June-2020",
+    ]
+    assert categories["category"].tolist() == [
+        "Groceries",
+        "Fuel",
+        "Groceries",
+        "Fuel",
+    ]
+    assert categories["rows_matched"].tolist() == [2, 1, 1, 0]
+    assert (records["rows_scanned"] >= records["rows_matched"]).all()
+
+
+def test_summary(get_transactions, get_config):
+    """Test that the rules are summed up over the months, the slowest first."""
+    profiler = profiler_lib.RuleProfiler()
+    _build(get_transactions, get_config, profiler=profiler)
+
+    summary = profiler.summary()
+    assert summary["seconds"].is_monotonic_decreasing
+    groceries = summary[
+        (summary["stage"] == profiler_lib.CATEGORY_STAGE)
+        & (summary["category"] == "Groceries")
+    ].set_index("identifier")
+    assert groceries["rows_matched"].to_dict() == {pd.NA: 3, 0: 2, 1: 1, 2: 0}
+    assert groceries["runs"].tolist() == [2, 2, 2, 2]
+    # The Aldi identifier never matches, neither for the categories nor for the
+    # sub categories
+    dead_rules = summary[summary["rows_matched"] == 0]
+    assert set(zip(dead_rules["stage"], dead_rules["label"])) == {
+        (profiler_lib.CATEGORY_STAGE, "Aldi"),
+        (profiler_lib.SUB_CATEGORY_STAGE, "Aldi"),
+    }
+
+
+def test_get_category_matches_with_profiler(get_transactions, get_config):
+    """Test that the matches over all the data are the same with a profiler."""
+    categories = get_config["expense_categories"]
+    profiler = profiler_lib.RuleProfiler()
+
+    pd.testing.assert_frame_equal(
+        categorize.get_category_matches(get_transactions, categories, profiler),
+        categorize.get_category_matches(get_transactions, categories),
+    )
+    pd.testing.assert_frame_equal(
+        categorize.get_sub_category_matches(get_transactions, categories[0], profiler),
+        categorize.get_sub_category_matches(get_transactions, categories[0]),
+    )
+    assert set(profiler.to_frame()["month"]) == {None}
@@ -0,0 +1,244 @@
+"""Test suite for the rules module in the application."""
+import pandas as pd
+import pytest
+
+import expense_viewer.exceptions as exceptions
+import expense_viewer.rules as rules
+
+
+@pytest.fixture(scope="module")
+def get_dummy_pandas_data():
+    """Create some dummy pandas data."""
+    return pd.DataFrame(
+        {
+            "Credit": [0.0, 2800.0, 0.0, 10.0],
+            "Payment Details": ["Rewe 'Markt'", "Salary", None, 'Amazon "Prime"'],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "condition, expected_mask",
+    [
+        (
+            {
+                "logical_operator": "OR",
+                "identifiers": [
+                    {"column": "Credit", "comparison_operator": ">", "value": 2000}
+                ],
+            },
+            [False, True, False, False],
+        ),
+        (
+            {
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "column": "Payment Details",
+                        "comparison_operator": "contains",
+                        "value": "'Markt'",
+                    },
+                    {
+                        "column": "Payment Details",
+                        "comparison_operator": "contains",
+                        "value": '"Prime"',
+                    },
+                ],
+            },
+            [True, False, False, True],
+        ),
+        (
+            {
+                "logical_operator": "AND",
+                "identifiers": [
+                    {"column": "Credit", "comparison_operator": ">=", "value": 10},
+                    {
+                        "column": "Payment Details",
+                        "comparison_operator": "contains",
+                        "value": "Amazon",
+                    },
+                ],
+            },
+            [False, False, False, True],
+        ),
+        (
+            {
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "column": "Payment Details",
+                        "comparison_operator": "contains",
+                        "value": "rewe 'm",
+                        "case_sensitive": False,
+                    },
+                    {
+                        "column": "Payment Details",
+                        "comparison_operator": "contains",
+                        "value": '"Prime"|Salary',
+                        "regex": False,
+                    },
+                ],
+            },
+            [True, False, False, False],
+        ),
+    ],
+)
+def test_compile_condition(condition, expected_mask, get_dummy_pandas_data):
+    """Test that the compiled condition gives back the right boolean mask."""
+    mask = rules.compile_condition(condition)(get_dummy_pandas_data)
+    assert list(mask) == expected_mask
+
+
+def test_compile_condition_is_cached():
+    """Test that equal conditions share the same compiled mask function."""
+    condition = {
+        "logical_operator": "OR",
+        "identifiers": [{"column": "Credit", "comparison_operator": ">", "value": 1}],
+    }
+    assert rules.compile_condition(condition) is rules.compile_condition(
+        dict(condition)
+    )
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        {"logical_operator": "OR", "identifiers": []},
+        {
+            "logical_operator": "XOR",
+            "identifiers": [
+                {"column": "Credit", "comparison_operator": ">", "value": 1}
+            ],
+        },
+        {
+            "logical_operator": "OR",
+            "identifiers": [
+                {"column": "Credit", "comparison_operator": "like", "value": 1}
+            ],
+        },
+        {"logical_operator": "OR", "identifiers": [{"column": "Credit", "value": 1}]},
+    ],
+)
+def test_parse_condition_for_invalid_config(condition):
+    """Test that an invalid condition is rejected when it is parsed."""
+    with pytest.raises(exceptions.InvalidRuleError):
+        rules.parse_condition(condition)
+
+
+def test_compile_conditions(get_dummy_pandas_data):
+    """Test that many conditions are checked together in their order."""
+    conditions = [
+        {
+            "logical_operator": "OR",
+            "identifiers": [
+                {
+                    "column": "Payment Details",
+                    "comparison_operator": "contains",
+                    "value": value,
+                }
+            ],
+        }
+        for value in ("Rewe", "Amazon", "Salary|Rewe")
+    ]
+    masks = rules.compile_conditions(conditions)(get_dummy_pandas_data)
+    assert [list(mask) for mask in masks] == [
+        [True, False, False, False],
+        [False, False, False, True],
+        [True, True, False, False],
+    ]
+
+
+@pytest.mark.parametrize("dtype", ["category", "string"])
+@pytest.mark.parametrize(
+    "comparison_operator, value, expected_mask",
+    [
+        ("contains", "a", [True, True, False, True]),
+        ("==", "Salary", [False, True, False, False]),
+        ("!=", "Salary", [True, False, True, True]),
+    ],
+)
+def test_compile_condition_for_compact_columns(
+    dtype, comparison_operator, value, expected_mask, get_dummy_pandas_data
+):
+    """Test that the compact columns give the same masks as the object ones."""
+    data = get_dummy_pandas_data.astype({"Payment Details": dtype})
+    condition = {
+        "logical_operator": "OR",
+        "identifiers": [
+            {
+                "column": "Payment Details",
+                "comparison_operator": comparison_operator,
+                "value": value,
+            }
+        ],
+    }
+
+    mask = rules.compile_condition(condition)(data)
+
+    assert list(mask) == expected_mask
+    assert list(mask) == list(rules.compile_condition(condition)(get_dummy_pandas_data))
+
+
+def test_scale_values():
+    """Test that only the values compared with the amount columns are scaled."""
+    config = {
+        "salary": {
+            "logical_operator": "OR",
+            "identifiers": [
+                {"column": "Credit", "comparison_operator": ">", "value": 2500.5},
+                {
+                    "column": "Payment Details",
+                    "comparison_operator": "==",
+                    "value": "Salary",
+                },
+            ],
+        },
+    }
+
+    scaled = rules.scale_values(config, columns=["Credit"], factor=100)
+
+    assert [identifier["value"] for identifier in scaled["salary"]["identifiers"]] == [
+        250050,
+        "Salary",
+    ]
+    assert config["salary"]["identifiers"][0]["value"] == 2500.5
+
+
+def test_parse_config():
+    """Test that the rules of a config are converted and can be converted back."""
+    config = {
+        "salary": {
+            "logical_operator": "OR",
+            "identifiers": [
+                {"column": "Credit", "comparison_operator": ">", "value": 2500.5}
+            ],
+        },
+        "expense_categories": [
+            {
+                "name": "Groceries",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "column": "Payment Details",
+                        "comparison_operator": "contains",
+                        "value": "Rewe",
+                        "label": "Rewe",
+                    }
+                ],
+            }
+        ],
+    }
+
+    rule_config = rules.parse_config(config)
+
+    assert rule_config.expense_categories[0].name == "Groceries"
+    assert rule_config.expense_categories[0].identifiers[0].label == "Rewe"
+    assert rule_config.ignored is None
+    assert rules.parse_config(rule_config) is rule_config
+    assert (
+        rules.parse_config(rules.rule_config_to_container(rule_config)) == rule_config
+    )
+    scaled = rules.scale_values(rule_config, columns=["Credit"], factor=100)
+    assert scaled.salary.identifiers[0].value == 250050
+    with pytest.raises(exceptions.InvalidRuleError):
+        rules.parse_config({"salary": config["salary"]})
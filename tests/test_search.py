@@ -0,0 +1,72 @@
+"""Test suite for the search.py module."""
+import pandas as pd
+import pytest
+
+import expense_viewer.search as search
+
+
+@pytest.fixture(scope="module")
+def get_transactions():
+    """Produce transactions with free text columns for testing."""
+    return pd.DataFrame(
+        {
+            "Payment Details": [
+                "DWS Grundbesitz GmbH",
+                "ADAC Beitrag 2023",
+                None,
+                "dws grundbesitz gmbh",
+                "Volkswagen Leasing",
+                "Grundbesitz DWS",
+            ],
+            "Beneficiary / Originator": [
+                "DWS",
+                "ADAC e.V.",
+                "AXA Versicherung",
+                None,
+                "VW",
+                "Someone",
+            ],
+        }
+    )
+
+
+def test_tokenize():
+    """Test that the words are lower cased without the punctuation."""
+    assert search.tokenize("ADAC e.V., München") == ["adac", "e", "v", "münchen"]
+
+
+def test_find_any_of_the_keywords(get_transactions):
+    """Test that the rows of all the keywords are found in order."""
+    index = search.TokenIndex(get_transactions)
+
+    assert list(index.find(["axa", "Volkswagen"])) == [2, 4]
+    assert list(index.find(["adac"])) == [1]
+    assert list(index.find(["ADA"])) == []
+    assert list(index.find([""])) == []
+
+
+def test_find_phrase(get_transactions):
+    """Test that the words of a keyword are only found next to each other."""
+    index = search.TokenIndex(get_transactions)
+
+    assert list(index.find(["DWS Grundbesitz"])) == [0, 3]
+    assert list(index.find(["grundbesitz"])) == [0, 3, 5]
+    assert list(index.find(["DWS GmbH"])) == []
+
+
+def test_find_in_columns(get_transactions):
+    """Test that only the given columns are searched."""
+    index = search.TokenIndex(get_transactions)
+
+    assert list(index.find(["DWS"], columns=["Beneficiary / Originator"])) == [0]
+    assert list(index.find(["DWS"])) == [0, 3, 5]
+    with pytest.raises(KeyError):
+        index.find(["DWS"], columns=["IBAN"])
+
+
+def test_index_of_categorical_columns(get_transactions):
+    """Test that compact columns give the same rows as object columns."""
+    index = search.TokenIndex(get_transactions.astype("category"))
+
+    assert list(index.find(["dws", "axa"])) == [0, 2, 3, 5]
+    assert index.columns == list(search.SEARCH_COLUMNS)
@@ -0,0 +1,198 @@
+"""Test suite for the server.py module."""
+import concurrent.futures
+import http.client
+import json
+import pathlib
+import socket
+import threading
+
+import pandas as pd
+import pytest
+
+import expense_viewer.exceptions as exceptions
+import expense_viewer.server as server
+
+_CONFIG = """
+salary:
+  logical_operator: OR
+  identifiers:
+    - value: 1000.0
+      comparison_operator: ">"
+      column: Credit
+expense_categories:
+  - name: Shopping
+    logical_operator: OR
+    identifiers:
+      - value: Shop
+        comparison_operator: contains
+        column: Payment Details
+        label: Shop
+  - name: Food
+    logical_operator: OR
+    identifiers:
+      - value: Cafe
+        comparison_operator: contains
+        column: Payment Details
+"""
+
+
+def _write_statement(statement_dir, month):
+    """Write the revolut statement of a month of 2021."""
+    pd.DataFrame(
+        {
+            "Type": ["TOPUP", "CARD_PAYMENT", "CARD_PAYMENT"],
+            "Completed Date": [
+                f"2021-{month:02d}-01 10:00:00",
+                f"2021-{month:02d}-05 10:00:00",
+                f"2021-{month:02d}-06 10:00:00",
+            ],
+            "Description": ["Salary", f"Shop {month}", f"Cafe ADAC {month}"],
+            "Amount": [3000.0, -10.0 * month, -2.0],
+        }
+    ).to_csv(statement_dir / f"statement_{month}.csv", index=False)
+
+
+@pytest.fixture
+def report_state(tmp_path):
+    """Build the report of the statements of three months."""
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(_CONFIG)
+    statement_dir = tmp_path / "statements"
+    statement_dir.mkdir()
+    for month in range(1, 4):
+        _write_statement(statement_dir, month)
+    return server.ReportState(
+        str(config_file), str(statement_dir), "Revolut", check_interval=0.0
+    )
+
+
+def test_query(report_state):
+    """Test that every query is answered from the report."""
+    report = report_state.report
+
+    assert server.query(report, "/report", {}).equals(report.get_expenses_report())
+    assert server.query(report, "/months/February-2021", {}) is (
+        report.child_expenses["February-2021"].expense
+    )
+    categories = server.query(report, "/months/February-2021/categories", {})
+    assert categories.to_dict("list") == {
+        "Category": ["Shopping", "Food"],
+        "Total": [20.0, 2.0],
+    }
+    shopping = server.query(report, "/months/March-2021/categories/Shopping", {})
+    assert shopping["Payment Details"].tolist() == ["Shop 3"]
+    shop = server.query(report, "/months/March-2021/categories/Shopping/Shop", {})
+    assert shop["Debit"].tolist() == [30.0]
+    found = server.query(
+        report, "/search", {"keyword": ["adac"], "months": ["March-2021"]}
+    )
+    assert found["Payment Details"].tolist() == ["Cafe ADAC 3"]
+    assert found["Category"].tolist() == ["Food"]
+
+
+@pytest.mark.parametrize(
+    "path, parameters, error",
+    [
+        ("/months/May-2021", {}, exceptions.QueryNotFoundError),
+        ("/months/March-2021/categories/Travel", {}, exceptions.QueryNotFoundError),
+        ("/months/March-2021/totals", {}, exceptions.QueryNotFoundError),
+        ("/expenses", {}, exceptions.QueryNotFoundError),
+        ("/search", {}, exceptions.InvalidQueryError),
+        (
+            "/search",
+            {"keyword": ["a"], "column": ["IBAN"]},
+            exceptions.InvalidQueryError,
+        ),
+    ],
+)
+def test_query_errors(report_state, path, parameters, error):
+    """Test that the wrong queries are told apart."""
+    with pytest.raises(error):
+        server.query(report_state.report, path, parameters)
+
+
+def test_report_is_built_again_when_the_statements_change(report_state):
+    """Test that a new statement is in the report and a broken one is not."""
+    report = report_state.report
+    assert report_state.report is report
+
+    _write_statement(pathlib.Path(report_state.salary_statement_path), 4)
+    assert "April-2021" in report_state.report.child_expenses
+
+    (pathlib.Path(report_state.salary_statement_path) / "notes.txt").write_text(
+        "Not a csv"
+    )
+    report = report_state.report
+    assert "April-2021" in report.child_expenses
+    assert report_state.report is report
+
+
+def _get(connection, path):
+    """Send a query and get the status and the answer."""
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_http_server(report_state):
+    """Test that concurrent clients get their answers over http."""
+    report_state.check_interval = 60.0
+    with server.make_server(report_state, port=0) as http_server:
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        host, port = http_server.server_address[:2]
+
+        def get(path):
+            return _get(http.client.HTTPConnection(host, port, timeout=10), path)
+
+        paths = ["/report", "/months/January-2021", "/search?keyword=shop"] * 10
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            answers = list(executor.map(get, paths))
+        not_found = get("/months/May-2021")
+        http_server.shutdown()
+
+    assert [status for status, _ in answers] == [200] * len(paths)
+    assert [month["Month"] for month in answers[0][1]] == [
+        "January-2021",
+        "February-2021",
+        "March-2021",
+    ]
+    assert answers[1][1][0]["Payment Details"] == "Shop 1"
+    assert len(answers[2][1]) == 3
+    assert not_found == (404, {"error": "May-2021 is not in Overall"})
+
+
+def test_http_server_answers_unexpected_errors(report_state, monkeypatch):
+    """Test that a query failing unexpectedly gets an error answer."""
+
+    def failing_query(report, path, parameters):
+        raise TypeError("unexpected")
+
+    report_state.check_interval = 60.0
+    monkeypatch.setattr(server, "query", failing_query)
+    with server.make_server(report_state, port=0) as http_server:
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        host, port = http_server.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        answers = [_get(connection, "/report") for _ in range(2)]
+        http_server.shutdown()
+
+    assert answers == [(500, {"error": "The query could not be answered"})] * 2
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="No unix sockets")
+def test_unix_socket_server(report_state, tmp_path):
+    """Test that the queries are answered over a unix socket."""
+    socket_path = str(tmp_path / "expense_viewer.sock")
+    with server.make_server(report_state, socket_path=socket_path) as unix_server:
+        thread = threading.Thread(target=unix_server.serve_forever, daemon=True)
+        thread.start()
+        connection = http.client.HTTPConnection("localhost", timeout=10)
+        connection.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.sock.connect(socket_path)
+        status, answer = _get(connection, "/months/May-2021")
+        unix_server.shutdown()
+
+    assert status == 404
+    assert answer == {"error": "May-2021 is not in Overall"}
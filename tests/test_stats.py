@@ -0,0 +1,62 @@
+"""Test suite for the stats.py module."""
+import logging
+
+import pytest
+
+import expense_viewer.stats as stats_lib
+
+
+def test_stage_records_the_measurements():
+    """Test that a stage is recorded with the rows set inside of it."""
+    stats = stats_lib.PipelineStats()
+    with stats.stage("load", name="statement.csv") as measurement:
+        measurement.rows = 10
+    with stats.stage("load", rows=5):
+        pass
+
+    first_record, second_record = stats.records
+    assert first_record.stage == "load"
+    assert first_record.name == "statement.csv"
+    assert first_record.rows == 10
+    assert first_record.seconds >= 0
+    assert second_record.name is None
+    assert second_record.rows == 5
+    summary = stats.summary()
+    assert summary.loc["load", "runs"] == 2
+    assert summary.loc["load", "rows"] == 15
+
+
+def test_stage_is_recorded_when_it_fails():
+    """Test that a stage raising an exception is still recorded."""
+    stats = stats_lib.PipelineStats()
+    with pytest.raises(ValueError):
+        with stats.stage("config"):
+            raise ValueError("The config is not valid")
+
+    assert [record.stage for record in stats.records] == ["config"]
+
+
+def test_stage_is_logged_with_its_measurements(caplog):
+    """Test that the measurements are in the extra fields of the log record."""
+    stats = stats_lib.PipelineStats()
+    with caplog.at_level(logging.DEBUG, logger=stats_lib.logger.name):
+        with stats.stage("month", name="May-2020", rows=3):
+            pass
+
+    (log_record,) = caplog.records
+    assert log_record.stage == "month"
+    assert log_record.stage_name == "May-2020"
+    assert log_record.rows == 3
+    assert log_record.seconds == stats.records[0].seconds
+
+
+def test_measure_without_stats():
+    """Test that a stage is only recorded when there are stats."""
+    with stats_lib.measure(None, "load", rows=3) as measurement:
+        measurement.rows = 4
+
+    stats = stats_lib.PipelineStats()
+    with stats_lib.measure(stats, "load", rows=3) as measurement:
+        measurement.rows = 4
+
+    assert [record.rows for record in stats.records] == [4]
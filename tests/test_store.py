@@ -0,0 +1,217 @@
+"""Test suite for the store.py module."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import expense_viewer.exceptions as exceptions
+import expense_viewer.expense.overall_expense as overall_expense
+import expense_viewer.normalize as normalize
+import expense_viewer.store as store
+
+
+@pytest.fixture
+def get_transactions():
+    """Produce normalized transactions of two months with missing values."""
+    return pd.DataFrame(
+        {
+            "Value date": [
+                datetime(2020, 5, 1),
+                datetime(2020, 5, 3),
+                datetime(2020, 5, 4),
+                datetime(2020, 6, 1),
+                datetime(2020, 6, 2),
+            ],
+            "Transaction Type": [
+                "Credit",
+                "Debit Card Payment",
+                "Debit Card Payment",
+                "Credit",
+                "Debit Card Payment",
+            ],
+            "Payment Details": ["Salary", "REWE Markt", None, "Salary", "Café Ütz"],
+            "Debit": [0.0, 10.5, 20.0, 0.0, 40.25],
+            "Credit": [2500.0, 0.0, 0.0, 2500.0, 0.0],
+        }
+    )
+
+
+def _is_mapped(values):
+    """Check if the values are a view of a memory mapped file."""
+    array = np.asarray(values)
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base if isinstance(array.base, np.ndarray) else None
+    return False
+
+
+def test_open_store(tmp_path, get_transactions):
+    """Test that the opened transactions are the stored ones and are not copied."""
+    store_path = tmp_path / "transactions.store"
+    store.write_store(get_transactions, store_path)
+    transactions = store.open_store(store_path)
+
+    pd.testing.assert_frame_equal(
+        transactions, get_transactions, check_dtype=False, check_exact=True
+    )
+    assert transactions["Payment Details"].dtype == "string"
+    assert transactions["Payment Details"].isna().tolist() == [
+        False,
+        False,
+        True,
+        False,
+        False,
+    ]
+    for column in ["Value date", "Debit", "Credit"]:
+        assert transactions[column].dtype == get_transactions[column].dtype
+        assert _is_mapped(transactions[column].to_numpy())
+
+
+def test_open_store_without_pyarrow(tmp_path, get_transactions, monkeypatch):
+    """Test that the strings are decoded into objects without pyarrow."""
+    store_path = tmp_path / "transactions.store"
+    store.write_store(get_transactions, store_path)
+    monkeypatch.setattr(store.importlib.util, "find_spec", lambda name: None)
+
+    pd.testing.assert_frame_equal(store.open_store(store_path), get_transactions)
+
+
+def test_open_compact_store(tmp_path, get_transactions):
+    """Test that the compact and the integer columns keep their types."""
+    transactions = normalize.compact_transactions(
+        normalize.to_minor_units(get_transactions)
+    )
+    transactions.index = pd.Index([10, 11, 12, 20, 21])
+    store_path = tmp_path / "transactions.store"
+    store.write_store(transactions, store_path)
+    opened = store.open_store(store_path)
+
+    pd.testing.assert_frame_equal(opened, transactions)
+    assert _is_mapped(opened["Transaction Type"].cat.codes.to_numpy())
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_open_store_without_the_pandas_internals(
+    tmp_path, get_transactions, monkeypatch, compact
+):
+    """Test that the frame made by the constructor is the same as the one of blocks."""
+    transactions = get_transactions
+    if compact:
+        transactions = normalize.compact_transactions(transactions)
+        transactions.index = pd.Index([10, 11, 12, 20, 21])
+    store_path = tmp_path / "transactions.store"
+    store.write_store(transactions, store_path)
+    opened = store.open_store(store_path)
+
+    def fail_to_make_blocks(columns, names, index):
+        raise ImportError("No blocks in this pandas version")
+
+    monkeypatch.setattr(store, "_make_frame_of_blocks", fail_to_make_blocks)
+    opened_by_constructor = store.open_store(store_path)
+
+    pd.testing.assert_frame_equal(opened_by_constructor, opened)
+    pd.testing.assert_frame_equal(
+        opened_by_constructor, transactions, check_dtype=False
+    )
+
+
+def test_opened_transactions_do_not_change_the_store(tmp_path, get_transactions):
+    """Test that the store is mapped copy on write."""
+    store_path = tmp_path / "transactions.store"
+    store.write_store(get_transactions, store_path)
+    transactions = store.open_store(store_path)
+    transactions["Debit"].to_numpy()[:] = 1.0
+
+    assert store.open_store(store_path)["Debit"].tolist() == [
+        0.0,
+        10.5,
+        20.0,
+        0.0,
+        40.25,
+    ]
+
+
+def test_write_store_replaces_the_store(tmp_path, get_transactions):
+    """Test that the transactions already opened are kept when it is replaced."""
+    store_path = tmp_path / "transactions.store"
+    store.write_store(get_transactions, store_path)
+    transactions = store.open_store(store_path)
+    store.write_store(get_transactions.iloc[:2], store_path)
+
+    assert len(store.open_store(store_path)) == 2
+    assert transactions["Debit"].sum() == 70.75
+    assert [path.name for path in tmp_path.iterdir()] == ["transactions.store"]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        pd.Series(["REWE", 10, None]),
+        pd.Series(pd.date_range("2020-05-01", periods=3, tz="Europe/Berlin")),
+    ],
+)
+def test_write_unsupported_column(tmp_path, values):
+    """Test that the columns which can not be stored are told apart."""
+    with pytest.raises(exceptions.UnsupportedColumnError):
+        store.write_store(pd.DataFrame({"Column": values}), tmp_path / "store")
+
+
+def test_open_broken_store(tmp_path, get_transactions, monkeypatch):
+    """Test that a file which is not a store of this version is not opened."""
+    not_a_store = tmp_path / "statement.csv"
+    not_a_store.write_text("Value date,Debit\n2020-05-01,10.0\n")
+    with pytest.raises(exceptions.CouldNotLoadStoreError):
+        store.open_store(not_a_store)
+
+    store_path = tmp_path / "transactions.store"
+    store.write_store(get_transactions, store_path)
+    truncated_store = tmp_path / "truncated.store"
+    truncated_store.write_bytes(store_path.read_bytes()[:-100])
+    with pytest.raises(exceptions.CouldNotLoadStoreError):
+        store.open_store(truncated_store)
+
+    monkeypatch.setattr(store, "STORE_VERSION", store.STORE_VERSION + 1)
+    with pytest.raises(exceptions.CouldNotLoadStoreError):
+        store.open_store(store_path)
+
+
+def test_overall_expense_from_store(tmp_path, get_transactions):
+    """Test that the report of the stored transactions is the same."""
+    config = {
+        "salary": {
+            "logical_operator": "OR",
+            "identifiers": [
+                {"value": 1000.0, "comparison_operator": ">", "column": "Credit"}
+            ],
+        },
+        "expense_categories": [
+            {
+                "name": "Groceries",
+                "logical_operator": "OR",
+                "identifiers": [
+                    {
+                        "value": "REWE",
+                        "comparison_operator": "contains",
+                        "column": "Payment Details",
+                        "label": "Rewe",
+                    }
+                ],
+            }
+        ],
+    }
+    store_path = tmp_path / "transactions.store"
+    store.write_store(get_transactions, store_path)
+    expense = overall_expense.OverallExpense(expense=get_transactions, config=config)
+    expense.add_child_expenses()
+    stored_expense = overall_expense.OverallExpense.from_store(store_path, config)
+    stored_expense.add_child_expenses()
+
+    pd.testing.assert_frame_equal(
+        stored_expense.get_expenses_report(), expense.get_expenses_report()
+    )
+    assert list(stored_expense.child_expenses["May-2020"].child_expenses) == [
+        "Groceries",
+        "Miscellaneous",
+    ]
@@ -1,6 +1,5 @@
 """Test suite for utils module in the application."""
-from datetime import datetime
-
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -66,20 +65,33 @@ def test_get_full_condition_string(config, expected_output):
     assert utils.get_full_condition_string(condition=config) == expected_output
 
 
+def _condition(logical_operator, *identifiers):
+    """Build a condition dict from (column, comparison_operator, value) tuples."""
+    return {
+        "logical_operator": logical_operator,
+        "identifiers": [
+            {"column": column, "comparison_operator": operator, "value": value}
+            for column, operator, value in identifiers
+        ],
+    }
+
+
 @pytest.mark.parametrize(
-    "condition_str, expected_value",
+    "condition, expected_value",
     [
-        ("data['Credit'] > 2000", [1, 4]),
-        ("data['Credit'] > 2000 & data['Details'].str.contains('5')", [4]),
-        ("data['Credit'] > 2000 | data['Details'].str.contains('4')", [1, 3, 4]),
+        (_condition("OR", ("Credit", ">", 2000)), [1, 4]),
+        (
+            _condition("AND", ("Credit", ">", 2000), ("Details", "contains", "5")),
+            [4],
+        ),
+        (
+            _condition("OR", ("Credit", ">", 2000), ("Details", "contains", "4")),
+            [1, 3, 4],
+        ),
     ],
 )
-def test_get_row_index_for_matching_columns(condition_str, expected_value, mocker):
+def test_get_row_index_for_matching_columns(condition, expected_value):
     """Test the function get_row_index_for_matching_columns."""
-    mocked_get_full_condition_string = mocker.patch(
-        "expense_viewer.utils.get_full_condition_string"
-    )
-    mocked_get_full_condition_string.return_value = condition_str
     df = pd.DataFrame(
         {
             "Credit": [0.0, 2800, 0.0, 0.0, 2800, 0.0],
@@ -95,47 +107,11 @@ def test_get_row_index_for_matching_columns(condition_str, expected_value, mocke
         }
     )
     assert (
-        utils.get_row_index_for_matching_columns(condition=dict(), data=df)
+        utils.get_row_index_for_matching_columns(condition=condition, data=df)
         == expected_value
     )
 
 
-@pytest.mark.parametrize(
-    ("data, expected_month"),
-    [
-        (
-            pd.DataFrame(
-                {
-                    "Value date": [
-                        datetime.strptime("05/14/20", "%m/%d/%y"),
-                        datetime.strptime("05/12/20", "%m/%d/%y"),
-                        datetime.strptime("04/11/20", "%m/%d/%y"),
-                        datetime.strptime("03/10/20", "%m/%d/%y"),
-                    ]
-                }
-            ),
-            "May-2020",
-        ),
-        (
-            pd.DataFrame(
-                {
-                    "Value date": [
-                        datetime.strptime("06/14/20", "%m/%d/%y"),
-                        datetime.strptime("06/12/20", "%m/%d/%y"),
-                        datetime.strptime("04/11/20", "%m/%d/%y"),
-                        datetime.strptime("03/10/20", "%m/%d/%y"),
-                    ]
-                }
-            ),
-            "June-2020",
-        ),
-    ],
-)
-def test_get_expense_month(data, expected_month):
-    """Test the get_expense_month function inside the utils module."""
-    assert utils.get_expense_month_year(data) == expected_month
-
-
 @pytest.mark.parametrize(
     ("month, next_month"),
     [
@@ -147,3 +123,60 @@ def test_get_expense_month(data, expected_month):
 def test_get_next_month_label(month, next_month):
     """Test for the function get_next_month_label."""
     assert utils.get_next_month_label(month) == next_month
+
+
+def test_get_month_segments():
+    """Test that the months are divided at the salary rows and summarized."""
+    data = pd.DataFrame(
+        {
+            "Value date": pd.to_datetime(
+                [
+                    "2020-04-20",
+                    "2020-04-28",
+                    "2020-04-30",
+                    "2020-05-03",
+                    "2020-05-12",
+                    "2020-05-28",
+                    "2020-06-02",
+                ]
+            ),
+            "Credit": [0.0, 3000.0, 0.0, 50.0, 20.0, 3100.0, 10.0],
+        }
+    )
+
+    output = utils.get_month_segments(
+        data, [1, 5], ignored=np.array([False] * 4 + [True] + [False] * 2)
+    )
+
+    assert list(output.index) == [0, 1]
+    assert list(output["Start"]) == [2, 6]
+    assert list(output["Stop"]) == [5, 7]
+    assert list(output["Label"]) == ["May-2020", "June-2020"]
+    assert list(output["Salary"]) == [3000.0, 3100.0]
+    assert list(output["Extra Credit"]) == [50.0, 10.0]
+
+
+def test_get_month_segments_label_ties():
+    """Test that the month seen first wins when two months are equally frequent."""
+    data = pd.DataFrame(
+        {
+            "Value date": pd.to_datetime(
+                ["2020-01-01", "2020-06-14", "2020-05-12", "2020-05-11", "2020-06-10"]
+            ),
+            "Credit": [3000.0, 0.0, 0.0, 0.0, 0.0],
+        }
+    )
+
+    output = utils.get_month_segments(data, [0])
+
+    assert list(output["Label"]) == ["June-2020"]
+
+
+def test_resolve_month_label_collisions():
+    """Test that a label which is already used is replaced by the next month."""
+    with pytest.warns(UserWarning):
+        output = utils.resolve_month_label_collisions(
+            ["May-2020", "May-2020", "July-2020"], existing_labels=["July-2020"]
+        )
+
+    assert output == ["May-2020", "June-2020", "August-2020"]